@@ -25,17 +25,35 @@ setup(
         Included functions are:
 
         -wcs_deployment_utils.dialog.copy_dialog_data: Copy a branch of dialog from a source workspace to a target workspace
+        -wcs_deployment_utils.dialog.plan_dialog_branch: Project a dialog branch copy without changing the target workspace
         -wcs_deployment_utils.dialog.generate_wcs_diagram: Generates a string representation of target workspace dialog tree
         -wcs_deployment_utils.dialog.delete_branch_from_csv: Iterate through a CSV file and prune dialog tree
+        -wcs_deployment_utils.dialog.find_references: Find the dialog nodes whose conditions use intents, entities or context variables
+        -wcs_deployment_utils.dialog.get_dialog_metrics: Structural metrics (depth, subtree size, fan-out, jumps) of a dialog
         -wcs_deployment_utils.intents.copy_intent_data: Copy intent data from a WCS workspace to a target workspace
+        -wcs_deployment_utils.intents.copy_intents: Copy many intents, selected by name or pattern, with one backup
         -wcs_deployment_utils.intents.load_csv_as_intent_data: Load intent data from a CSV file to a target workspace
         -wcs_deployment_utils.entities.copy_entity_data: Copy entity data from a WCS workspace to a target workspace
+        -wcs_deployment_utils.entities.copy_entities: Copy many entities, selected by name or pattern, with one backup
         -wcs_deployment_utils.entities.load_csv_as_entity_data: Load entity data from a CSV file to a target workspace
         -wcs_deployment_utils.util.get_and_backup_workspace: Gets an export of a workspace and stores it locally
+        -wcs_deployment_utils.util.load_workspace_export: Loads a workspace export from a local file
+        -wcs_deployment_utils.util.diff_workspaces: Structural diff of two workspace exports
+        -wcs_deployment_utils.util.sync_workspace: Applies the changes made to a workspace since the last sync to a replica
+        -wcs_deployment_utils.util.index_workspaces: Crawls every workspace of an instance into a local SQLite index for cross-workspace queries
+        -wcs_deployment_utils.util.configure_api: Sets the rate limit, retry and timeout policy for WCS calls
+        -wcs_deployment_utils.util.instrument: Collects per-phase timings and API call statistics
+        -wcs_deployment_utils.util.run_manifest: Runs a manifest of deployment steps in parallel where they do not conflict
+        -wcs_deployment_utils.aio: Async variants of the deployment functions
+
+        The `wcs-deploy` command runs any of these functions, or a manifest of steps, from the command line.
 
 
         """,
     packages=find_packages(exclude=["test"]),
+    entry_points={
+        'console_scripts': ['wcs-deploy=wcs_deployment_utils.cli:main']
+    },
     classifiers=[
         "Programming Language :: Python",
         "Programming Language :: Python :: 3 :: Only",
@@ -48,10 +66,11 @@ setup(
         "Topic :: Utilities"
         ],
     install_requires=[
-        'watson_developer_cloud>=1.0.2',
+        'watson_developer_cloud>=1.1.0',
         'pandas>=0.20.0',
         'requests>=2.8.0',
-        'anytree>=2.4.3'
+        'anytree>=2.4.3',
+        'numpy>=1.15.0'
     ],
     keywords='wcs watson conversation dialog intent entity intents entities copy deployment'
 )
@@ -0,0 +1,97 @@
+""" Unit Testing aio
+"""
+import asyncio
+import json
+import threading
+from time import sleep
+from wcs_deployment_utils import aio
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+@responses.activate
+@mock
+def test_mock_gather():
+    """ Tests that operations overlap and return the same values as the
+    blocking functions
+    """
+    export = get_stored_json('test/workspace_exports/test.json')
+    workspaces = ['ws_{}'.format(x) for x in range(10)]
+    # every export waits until all of them are in flight, which can only
+    # happen if they overlap. otherwise the barrier breaks and they fail
+    in_flight = threading.Barrier(len(workspaces), timeout=10)
+
+    def _slow_export(request): #pylint: disable=w0613
+        in_flight.wait()
+        return (200, {}, json.dumps(export))
+
+    for workspace in workspaces:
+        responses.add_callback(
+            responses.GET,
+            (BASE_URL + '?version={}').format(workspace, TEST_VERSION),
+            callback=_slow_export,
+            content_type='application/json')
+
+    async def _get_all():
+        return await asyncio.gather(*[
+            aio.get_and_backup_workspace(
+                username=TEST_USERNAME,
+                password=TEST_PASSWORD,
+                workspace=workspace,
+                version=TEST_VERSION) for workspace in workspaces])
+
+    results = _run(_get_all())
+
+    assert results == [export] * len(workspaces)
+    assert not in_flight.broken
+
+@responses.activate
+@mock
+def test_mock_cancel(tmpdir):
+    """ Tests that a cancelled operation makes no further calls
+    """
+    def _slow_export(request): #pylint: disable=w0613
+        sleep(0.3)
+        return (200, {}, json.dumps(
+            get_stored_json('test/workspace_exports/test.json')))
+
+    responses.add_callback(
+        responses.GET,
+        (BASE_URL + '?version={}').format('target', TEST_VERSION),
+        callback=_slow_export,
+        content_type='application/json')
+
+    async def _cancel():
+        task = asyncio.ensure_future(aio.load_csv_as_intent_data(
+            conversation_username=TEST_USERNAME,
+            conversation_password=TEST_PASSWORD,
+            version=TEST_VERSION,
+            workspace='target',
+            csv_file='test/parameters/load_csv_as_intent_data.csv',
+            target_backup_file='{}/export.json'.format(tmpdir)))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # let the backup finish on the worker thread
+        await asyncio.sleep(0.5)
+
+    _run(_cancel())
+
+    # only the backup was made, none of the intent calls
+    assert len(responses.calls) == 1
@@ -0,0 +1,116 @@
+""" Unit Testing the wcs-deploy command line and run_manifest
+"""
+
+import json
+from wcs_deployment_utils.cli import main
+from wcs_deployment_utils.util import run_manifest
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_SOURCE_WORKSPACE = 'source'
+TEST_TARGET_WORKSPACE = 'target'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@mock
+def test_mock_command(capsys):
+    """ Tests running a function from the command line
+    """
+    status = main([
+        'generate-wcs-diagram',
+        '--export', 'test/workspace_exports/test.json',
+        '--max-depth', '1'])
+
+    assert status == 0
+    assert capsys.readouterr().out.split('\n')[0] == 'root'
+
+@mock
+def test_mock_command_error(capsys):
+    """ Tests that errors are reported with a non zero status
+    """
+    status = main(['load-workspace-export', '--export', 'missing.json'])
+
+    assert status == 1
+    assert 'wcs-deploy: error:' in capsys.readouterr().err
+
+@responses.activate
+@mock
+def test_mock_run(tmpdir, capsys):
+    """ Tests that a manifest reuses the source export across steps
+    """
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_SOURCE_WORKSPACE),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_TARGET_WORKSPACE),
+        json=get_stored_json('test/workspace_exports/order_pizza.json'),
+        status=200)
+    for intent in ['1', '2']:
+        responses.add(
+            responses.GET,
+            (BASE_URL + '/intents/{}').format(TEST_TARGET_WORKSPACE, intent),
+            json={},
+            status=404)
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/intents').format(TEST_TARGET_WORKSPACE),
+        json={},
+        status=201)
+
+    manifest = {
+        'defaults': {
+            'source_username': TEST_USERNAME,
+            'source_password': TEST_PASSWORD,
+            'source_workspace': TEST_SOURCE_WORKSPACE,
+            'target_username': TEST_USERNAME,
+            'target_password': TEST_PASSWORD,
+            'target_workspace': TEST_TARGET_WORKSPACE,
+            'conversation_username': TEST_USERNAME,
+            'conversation_password': TEST_PASSWORD,
+            'workspace': TEST_SOURCE_WORKSPACE,
+            'version': TEST_VERSION,
+            'target_backup_file': '{}/backup.json'.format(tmpdir)},
+        'steps': [
+            {'command': 'copy_intent_data', 'args': {'intent': '1'}},
+            {'command': 'copy_intent_data', 'args': {'intent': '2'}},
+            {'name': 'diagram', 'command': 'generate_wcs_diagram'}]}
+    manifest_path = '{}/manifest.json'.format(tmpdir)
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+
+    assert main(['run', manifest_path]) == 0
+
+    # the source is only exported once
+    source_calls = [x for x in responses.calls \
+        if x.request.url.startswith(BASE_URL.format(TEST_SOURCE_WORKSPACE))]
+    assert len(source_calls) == 1
+    created = [json.loads(x.request.body)['intent'] \
+        for x in responses.calls if x.request.method == 'POST']
+    assert sorted(created) == ['1', '2']
+
+    out = capsys.readouterr().out
+    assert '0: copy_intent_data' in out
+    assert 'diagram: generate_wcs_diagram' in out
+    assert 'critical path:' in out
+
+@mock
+def test_mock_run_validation():
+    """ Tests that invalid steps are rejected before any step runs
+    """
+    with pytest.raises(ValueError):
+        run_manifest({'steps': [
+            {'command': 'load_workspace_export', 'args': {
+                'export': 'test/workspace_exports/test.json'}},
+            {'command': 'copy_intent_data', 'args': {'intnet': 'hello'}}]})
+
+    with pytest.raises(ValueError):
+        run_manifest({'steps': [{'command': 'copy_everything'}]})
@@ -0,0 +1,141 @@
+""" Unit Testing configure_api
+"""
+from time import perf_counter
+from wcs_deployment_utils.util import configure_api, get_and_backup_workspace
+from wcs_deployment_utils._api import _get_conversation, _update_workspace_collection
+from watson_developer_cloud import WatsonApiException
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_WORKSPACE = 'test'
+WORKSPACE_URL = (
+    'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+    '?version={}').format(TEST_WORKSPACE, TEST_VERSION)
+
+@pytest.fixture
+def policy():
+    """ Fast retries for the test instance, removed after the test
+    """
+    yield configure_api(TEST_USERNAME, backoff=0.01, max_backoff=0.01)
+    configure_api(TEST_USERNAME, rate_limit=0, burst=1, max_retries=5,
+                  backoff=0.5, max_backoff=30, timeout=60)
+
+def _get_workspace():
+    return get_and_backup_workspace(
+        username=TEST_USERNAME,
+        password=TEST_PASSWORD,
+        workspace=TEST_WORKSPACE,
+        version=TEST_VERSION)
+
+@responses.activate
+@mock
+def test_mock_retry(policy): #pylint: disable=w0621,w0613
+    """ Tests that throttled and failed calls are retried
+    """
+    responses.add(responses.GET, WORKSPACE_URL, json={}, status=429,
+                  headers={'Retry-After': '0'})
+    responses.add(responses.GET, WORKSPACE_URL, json={}, status=503)
+    responses.add(
+        responses.GET,
+        WORKSPACE_URL,
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    export = _get_workspace()
+
+    assert len(responses.calls) == 3
+    assert export == get_stored_json('test/workspace_exports/test.json')
+
+@responses.activate
+@mock
+def test_mock_give_up(policy): #pylint: disable=w0621,w0613
+    """ Tests that calls are retried a limited number of times, and that
+    other errors are not retried
+    """
+    configure_api(TEST_USERNAME, max_retries=2)
+    responses.add(responses.GET, WORKSPACE_URL, json={}, status=500)
+
+    with pytest.raises(WatsonApiException):
+        _get_workspace()
+    assert len(responses.calls) == 3
+
+    responses.reset()
+    responses.add(responses.GET, WORKSPACE_URL, json={}, status=404)
+    with pytest.raises(WatsonApiException):
+        _get_workspace()
+    assert len(responses.calls) == 1
+
+@responses.activate
+@mock
+def test_mock_create_not_retried(policy): #pylint: disable=w0621,w0613
+    """ Tests that a failed create is not repeated, since the service may
+    have created the item, while a throttled create and a failed update are
+    """
+    conversation = _get_conversation(TEST_USERNAME, TEST_PASSWORD, TEST_VERSION)
+    intents_url = WORKSPACE_URL.replace('?', '/intents?')
+    responses.add(responses.POST, intents_url, json={}, status=429,
+                  headers={'Retry-After': '0'})
+    responses.add(responses.POST, intents_url, json={}, status=503)
+    responses.add(responses.POST, intents_url, json={}, status=201)
+
+    with pytest.raises(WatsonApiException):
+        conversation.create_intent(workspace_id=TEST_WORKSPACE, intent='a')
+    assert len(responses.calls) == 2
+
+    # an intent named like a collection is still an update
+    responses.reset()
+    intent_url = WORKSPACE_URL.replace('?', '/intents/values?')
+    responses.add(responses.POST, intent_url, json={}, status=503)
+    responses.add(responses.POST, intent_url, json={}, status=200)
+    conversation.update_intent(workspace_id=TEST_WORKSPACE, intent='values')
+    assert len(responses.calls) == 2
+
+@responses.activate
+@mock
+def test_mock_append_not_retried(policy): #pylint: disable=w0621,w0613
+    """ Tests that a failed chunk that appends to a workspace is not
+    repeated, while a failed chunk that replaces the collection is
+    """
+    conversation = _get_conversation(TEST_USERNAME, TEST_PASSWORD, TEST_VERSION)
+    for status in [503, 200, 503]:
+        responses.add(responses.POST, WORKSPACE_URL, json={}, status=status)
+
+    with pytest.raises(RuntimeError):
+        _update_workspace_collection(
+            conversation,
+            TEST_WORKSPACE,
+            'intents',
+            [{'intent': 'a'}, {'intent': 'b'}],
+            1,
+            lambda intent: 1)
+    assert ['append=true' in x.request.url for x in responses.calls] == \
+        [False, False, True]
+
+@responses.activate
+@mock
+def test_mock_rate_limit(policy): #pylint: disable=w0621,w0613
+    """ Tests that calls to an instance are rate limited
+    """
+    configure_api(TEST_USERNAME, rate_limit=20, burst=1)
+    responses.add(responses.GET, WORKSPACE_URL, json={}, status=200)
+
+    start = perf_counter()
+    for _ in range(5):
+        _get_workspace()
+
+    # the first call uses the burst, the rest wait 1/20th of a second each
+    assert perf_counter() - start >= 0.19
+
+@mock
+def test_invalid():
+    """ Tests that negative values are rejected
+    """
+    with pytest.raises(ValueError):
+        configure_api(TEST_USERNAME, rate_limit=-1)
@@ -1,7 +1,11 @@
 """ Unit Testing copy_dialog_branch
 """
-from wcs_deployment_utils.dialog import copy_dialog_branch
-from wcs_deployment_utils.dialog._util import _get_matcher_function
+import json
+from wcs_deployment_utils.dialog import copy_dialog_branch, plan_dialog_branch
+from wcs_deployment_utils.dialog._util import (
+    _get_matcher_function,
+    _hash_subtrees,
+    _project_branch_copy)
 from watson_developer_cloud import ConversationV1
 import responses
 import pytest
@@ -142,6 +146,168 @@ def test_mock_response(params, tmpdir):
     # check that a representation is returned
     assert isinstance(rep, str)
 
+@responses.activate
+@mock
+def test_mock_source_export(tmpdir):
+    """ Tests copying from a local export against stubbed target response
+    """
+    responses.add(
+        responses.GET,
+        'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}?version={}'
+        .format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    responses.add(
+        responses.POST,
+        'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}?version={}'
+        .format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=200)
+
+    export_path = '{}/export.json'.format(tmpdir)
+
+    tree, _ = copy_dialog_branch(
+        root_node='order a pizza',
+        target_node='root',
+        target_insert_as='child',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file=export_path)
+
+    # only the target is fetched
+    assert [x.request.method for x in responses.calls] == ['GET', 'POST']
+    assert len(tree.descendants) == 38
+
+    # the backup is of the target workspace
+    assert get_stored_json(export_path) == \
+        get_stored_json('test/workspace_exports/test.json')
+
+@responses.activate
+@mock
+def test_mock_unchanged(tmpdir):
+    """ Tests that a copy which would not change the target is not published
+    """
+    # target already contains the branch from a previous copy
+    tree, _, _ = plan_dialog_branch(
+        root_node='order a pizza',
+        target_node='root',
+        target_insert_as='child',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_export='test/workspace_exports/test.json')
+    target = get_stored_json('test/workspace_exports/test.json')
+    target['dialog_nodes'] = [x.node for x in \
+        anytree.iterators.LevelOrderIter(tree) if x.id is not None]
+
+    responses.add(
+        responses.GET,
+        'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}?version={}'
+        .format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=target,
+        status=200)
+
+    tree, _ = copy_dialog_branch(
+        root_node='order a pizza',
+        target_node='root',
+        target_insert_as='child',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file='{}/export.json'.format(tmpdir))
+
+    # the target is fetched but never updated
+    assert [x.request.method for x in responses.calls] == ['GET']
+    assert len(tree.descendants) == 38
+
+@responses.activate
+@mock
+def test_mock_copy_references(tmpdir):
+    """ Tests copying the intents and entities used by the branch, from
+    the source export and with a single backup
+    """
+    url = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}' \
+        .format(TEST_TARGET_WORKSPACE)
+    responses.add(
+        responses.GET,
+        url,
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+    responses.add(responses.POST, url, json={}, status=200)
+    # nothing used by the branch exists in the target yet
+    for collection in ['intents', 'entities']:
+        for name in ['order_pizza', 'special_type', 'pizza_topping',
+                     'pizza_type']:
+            responses.add(
+                responses.GET,
+                '{}/{}/{}'.format(url, collection, name),
+                json={'error': 'not found'},
+                status=404)
+        responses.add(
+            responses.POST,
+            '{}/{}'.format(url, collection),
+            json={},
+            status=201)
+
+    copy_dialog_branch(
+        root_node='order a pizza',
+        target_node='root',
+        target_insert_as='child',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file='{}/export.json'.format(tmpdir),
+        copy_references=True)
+
+    created = sorted(
+        x.request.url.split('?')[0].rsplit('/', 1)[-1] + ':' + \
+            json.loads(x.request.body).get('intent', '') + \
+            json.loads(x.request.body).get('entity', '')
+        for x in responses.calls \
+            if x.request.method == 'POST' and x.request.url.split('?')[0] != url)
+    # system entities are not copied
+    assert created == [
+        'entities:pizza_topping',
+        'entities:pizza_type',
+        'entities:special_type',
+        'intents:order_pizza']
+    # one export of the target, and the dialog is updated last
+    assert [x.request.url.split('?')[0] for x in responses.calls \
+        if x.request.method == 'GET'].count(url) == 1
+    assert responses.calls[len(responses.calls) - 1].request.url \
+        .split('?')[0] == url
+
+@mock
+@pytest.mark.parametrize('params', CASES, ids=_test_id_name)
+def test_mock_incremental_hashes(params):
+    """ Tests that the hashes updated along the changed paths match a
+    full rehash of the projected tree
+    """
+    for target in ['test.json', 'order_pizza.json']:
+        hashes = {}
+        try:
+            tree = _project_branch_copy(
+                get_stored_json('test/workspace_exports/order_pizza.json')[
+                    'dialog_nodes'],
+                get_stored_json('test/workspace_exports/' + target)[
+                    'dialog_nodes'],
+                'order a pizza',
+                None if params['target_node'] == 'root' \
+                    else params['target_node'],
+                params['target_insert_as'],
+                hashes=hashes)
+        # target nodes of the cases are only in test.json
+        except RuntimeError:
+            continue
+        full = _hash_subtrees(tree)
+        assert {x: hashes['projected'][x] for x in full} == full
+
 # TODO add teardown for failed cases
 @live
 def test_live_response(tmpdir):
@@ -0,0 +1,83 @@
+""" Unit Testing copy_entities
+"""
+
+import json
+import re
+from wcs_deployment_utils.entities import copy_entities
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_TARGET_WORKSPACE = 'target'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@responses.activate
+@mock
+def test_mock_patterns(tmpdir):
+    """ Tests that patterns are resolved against one export of the source,
+    and that the target is backed up once
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # no entity exists in target
+    responses.add(
+        responses.GET,
+        re.compile(re.escape(BASE_URL.format(TEST_TARGET_WORKSPACE)) + \
+            '/entities/.*'),
+        json={},
+        status=404)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+
+    copied = copy_entities(
+        entities='pizza_*',
+        source_export=get_stored_json('test/workspace_exports/order_pizza.json'),
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file='{}/export.json'.format(tmpdir))
+
+    assert copied == ['pizza_topping', 'pizza_type']
+
+    methods = [x.request.method for x in responses.calls]
+    # one backup, then a lookup and create per entity
+    assert methods.count('GET') == 3
+    assert methods.count('POST') == 2
+    created = {x['entity']: x for x in (json.loads(y.request.body) \
+        for y in responses.calls if y.request.method == 'POST')}
+    assert sorted(x['value'] for x in created['pizza_topping']['values']) == \
+        ['jalapeno', 'pepperoni', 'peppers', 'sausage']
+
+@responses.activate
+@mock
+def test_mock_no_match(tmpdir):
+    """ Tests that a pattern without a match copies nothing
+    """
+    with pytest.raises(ValueError, match='drinks_\\*'):
+        copy_entities(
+            entities=['pizza_type', 'drinks_*'],
+            source_export=get_stored_json(
+                'test/workspace_exports/order_pizza.json'),
+            target_username=TEST_USERNAME,
+            target_password=TEST_PASSWORD,
+            target_workspace=TEST_TARGET_WORKSPACE,
+            version=TEST_VERSION,
+            target_backup_file='{}/export.json'.format(tmpdir))
+
+    assert not responses.calls
@@ -3,6 +3,7 @@
 import json
 from wcs_deployment_utils.entities import copy_entity_data
 from watson_developer_cloud import ConversationV1
+import responses
 import pytest
 
 from ._util import build_workspace_from_json, get_stored_json
@@ -10,6 +11,182 @@ from ._util import build_workspace_from_json, get_stored_json
 live = pytest.mark.live #pylint: disable=c0103
 mock = pytest.mark.mock #pylint: disable=c0103
 
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_TARGET_WORKSPACE = 'target'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@responses.activate
+@mock
+def test_mock_source_export(tmpdir):
+    """ Tests copying from a local export against stubbed target response
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # entity does not exist in target
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/entities/pizza_topping?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=404)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+
+    export_path = '{}/export.json'.format(tmpdir)
+
+    copy_entity_data(
+        entity='pizza_topping',
+        source_export=get_stored_json('test/workspace_exports/order_pizza.json'),
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file=export_path)
+
+    # backup, lookup and create. the source is never fetched
+    assert [x.request.method for x in responses.calls] == ['GET', 'GET', 'POST']
+    created = json.loads(responses.calls[2].request.body)
+    assert created['entity'] == 'pizza_topping'
+    assert sorted(x['value'] for x in created['values']) == \
+        ['jalapeno', 'pepperoni', 'peppers', 'sausage']
+
+@responses.activate
+@mock
+def test_mock_merge(tmpdir):
+    """ Tests that values and synonyms are merged in order, and that an
+    entity which already contains every synonym is not updated
+    """
+    source = get_stored_json('test/workspace_exports/order_pizza.json')
+    entity = [x for x in source['entities'] \
+        if x['entity'] == 'pizza_topping'][0]
+
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # first lookup is missing values and synonyms, second has them all
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/entities/pizza_topping?version={}&export=true').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={
+            'entity': 'pizza_topping',
+            'values': [
+                {'value': 'existing', 'type': 'synonyms'},
+                {'value': 'jalapeno', 'type': 'synonyms',
+                 'synonyms': ['existing']}]},
+        status=200)
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/entities/pizza_topping?version={}&export=true').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=entity,
+        status=200)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities/pizza_topping?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=200)
+
+    for _ in range(2):
+        copy_entity_data(
+            entity='pizza_topping',
+            source_export=source,
+            target_username=TEST_USERNAME,
+            target_password=TEST_PASSWORD,
+            target_workspace=TEST_TARGET_WORKSPACE,
+            version=TEST_VERSION,
+            target_backup_file='{}/export.json'.format(tmpdir),
+            delta=False)
+
+    # a single update, existing values first then new ones in order
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'GET', 'POST', 'GET', 'GET']
+    updated = json.loads(responses.calls[2].request.body)
+    assert [x['value'] for x in updated['values']] == \
+        ['existing', 'jalapeno', 'sausage', 'peppers', 'pepperoni']
+    jalapeno = [x for x in entity['values'] if x['value'] == 'jalapeno'][0]
+    assert updated['values'][1]['synonyms'] == \
+        ['existing'] + jalapeno['synonyms']
+
+@responses.activate
+@mock
+def test_mock_delta(tmpdir):
+    """ Tests that a small change to a large entity is sent as value and
+    synonym creates
+    """
+    source = get_stored_json('test/workspace_exports/order_pizza.json')
+    entity = [x for x in source['entities'] \
+        if x['entity'] == 'pizza_topping'][0]
+    jalapeno = [x for x in entity['values'] if x['value'] == 'jalapeno'][0]
+
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # a large entity, all but two of the source values are new
+    existing_values = [{'value': str(x), 'type': 'synonyms'} \
+        for x in range(1000)]
+    existing_values += [
+        {'value': 'jalapeno', 'type': 'synonyms',
+         'synonyms': jalapeno['synonyms'][:1]},
+        {'value': 'peppers', 'type': 'synonyms'}]
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/entities/pizza_topping?version={}&export=true').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={'entity': 'pizza_topping', 'values': existing_values},
+        status=200)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities/pizza_topping/values?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities/pizza_topping/values/jalapeno/synonyms'
+         '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+
+    copy_entity_data(
+        entity='pizza_topping',
+        source_export=source,
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file='{}/export.json'.format(tmpdir))
+
+    # the entity itself is never re-sent
+    posts = [x.request for x in responses.calls if x.request.method == 'POST']
+    assert not [x for x in posts if '/entities/pizza_topping?' in x.url]
+    created = sorted(json.loads(x.body)['value'] for x in posts \
+        if '/values?' in x.url)
+    assert created == ['pepperoni', 'sausage']
+    synonyms = [json.loads(x.body)['synonym'] for x in posts \
+        if '/synonyms?' in x.url]
+    assert synonyms == jalapeno['synonyms'][1:]
+
 @live
 def test_live_response(tmpdir):
     """ Tests against stubbed response
@@ -61,3 +238,82 @@ def test_live_response(tmpdir):
     # clean up
     target.delete_workspace(target_workspace)
     target.delete_workspace(source_workspace)
+
+@responses.activate
+@mock
+def test_mock_no_dataframe(tmpdir, monkeypatch):
+    """ Tests that the source values are merged without building a
+    DataFrame, and that only synonyms values are copied
+    """
+    def _fail(*args, **kwargs):
+        raise AssertionError('copies should not build a DataFrame')
+    monkeypatch.setattr('pandas.DataFrame', _fail)
+
+    source = {'entities': [{
+        'entity': 'size',
+        'values': [
+            {'value': 'small', 'type': 'synonyms', 'synonyms': ['s', 's']},
+            {'value': 'medium', 'type': 'synonyms', 'synonyms': []},
+            {'value': 'number', 'type': 'patterns', 'patterns': ['\\d+']}]}]}
+
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/entities/size?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=404)
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+
+    copy_entity_data(
+        entity='size',
+        source_export=source,
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file='{}/export.json'.format(tmpdir))
+
+    created = json.loads(responses.calls[2].request.body)
+    assert created['values'] == [
+        {'value': 'small', 'synonyms': ['s']},
+        {'value': 'medium'}]
+
+@responses.activate
+@mock
+def test_mock_no_synonyms_values(tmpdir):
+    """ Tests that an entity without synonyms values is neither created nor
+    cleared, as when its values were loaded into an empty DataFrame
+    """
+    source = {'entities': [{
+        'entity': 'number',
+        'values': [
+            {'value': 'number', 'type': 'patterns', 'patterns': ['\\d+']}]}]}
+
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    copy_entity_data(
+        entity='number',
+        source_export=source,
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        clear_existing=True,
+        target_backup_file='{}/export.json'.format(tmpdir))
+
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.method == responses.GET
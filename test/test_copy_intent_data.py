@@ -4,6 +4,7 @@
 import json
 from wcs_deployment_utils.intents import copy_intent_data
 from watson_developer_cloud import ConversationV1
+import responses
 import pytest
 
 from ._util import build_workspace_from_json, get_stored_json
@@ -11,6 +12,132 @@ from ._util import build_workspace_from_json, get_stored_json
 live = pytest.mark.live #pylint: disable=c0103
 mock = pytest.mark.mock #pylint: disable=c0103
 
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_TARGET_WORKSPACE = 'target'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@responses.activate
+@mock
+def test_mock_source_export(tmpdir):
+    """ Tests copying from a local export against stubbed target response
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # intent does not exist in target
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/intents/order_pizza?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=404)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/intents?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+
+    export_path = '{}/export.json'.format(tmpdir)
+
+    copy_intent_data(
+        intent='order_pizza',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file=export_path)
+
+    # backup, lookup and create. the source is never fetched
+    assert [x.request.method for x in responses.calls] == ['GET', 'GET', 'POST']
+    created = json.loads(responses.calls[2].request.body)
+    assert created['intent'] == 'order_pizza'
+    assert len(created['examples']) == 5
+
+@responses.activate
+@mock
+def test_mock_merge(tmpdir):
+    """ Tests that examples are merged in order, and that an intent which
+    already contains every example is not updated
+    """
+    source = get_stored_json('test/workspace_exports/order_pizza.json')
+    examples = [x['text'] for x in source['intents'][0]['examples']]
+
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # first lookup is missing examples, second has them all
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/intents/order_pizza?version={}&export=true').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={
+            'intent': 'order_pizza',
+            'description': None,
+            'examples': [{'text': 'existing'}, {'text': examples[-1]}]},
+        status=200)
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/intents/order_pizza?version={}&export=true').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=source['intents'][0],
+        status=200)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/intents/order_pizza?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=200)
+
+    for _ in range(2):
+        copy_intent_data(
+            intent='order_pizza',
+            source_export=source,
+            target_username=TEST_USERNAME,
+            target_password=TEST_PASSWORD,
+            target_workspace=TEST_TARGET_WORKSPACE,
+            version=TEST_VERSION,
+            target_backup_file='{}/export.json'.format(tmpdir))
+
+    # a single update, existing examples first then new ones in order
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'GET', 'POST', 'GET', 'GET']
+    updated = json.loads(responses.calls[2].request.body)
+    assert [x['text'] for x in updated['examples']] == \
+        ['existing', examples[-1]] + examples[:-1]
+
+@mock
+def test_mock_missing_source_intent(tmpdir):
+    """ Tests that an intent missing from the source export is an error
+    """
+    with pytest.raises(ValueError):
+        with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+            rsps.add(
+                responses.GET,
+                (BASE_URL + '?version={}').format(
+                    TEST_TARGET_WORKSPACE, TEST_VERSION),
+                json=get_stored_json('test/workspace_exports/test.json'),
+                status=200)
+            copy_intent_data(
+                intent='DOESNOTEXIST',
+                source_export='test/workspace_exports/order_pizza.json',
+                target_username=TEST_USERNAME,
+                target_password=TEST_PASSWORD,
+                target_workspace=TEST_TARGET_WORKSPACE,
+                version=TEST_VERSION,
+                target_backup_file='{}/export.json'.format(tmpdir))
+
 @live
 def test_live_response(tmpdir):
     """ Tests against stubbed response
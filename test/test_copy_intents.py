@@ -0,0 +1,88 @@
+""" Unit Testing copy_intents
+"""
+
+import json
+import re
+from wcs_deployment_utils.intents import copy_intents
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_TARGET_WORKSPACE = 'target'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@responses.activate
+@mock
+def test_mock_patterns(tmpdir):
+    """ Tests that names and patterns are resolved against one export of
+    the source, and that the target is backed up once
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # no intent exists in target
+    responses.add(
+        responses.GET,
+        re.compile(re.escape(BASE_URL.format(TEST_TARGET_WORKSPACE)) + \
+            '/intents/.*'),
+        json={},
+        status=404)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/intents?version={}').format(
+            TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json={},
+        status=201)
+
+    export_path = '{}/export.json'.format(tmpdir)
+
+    copied = copy_intents(
+        intents=['turn_*', 'greetings'],
+        source_export='test/workspace_exports/car_dash.json',
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        target_backup_file=export_path,
+        max_workers=4)
+
+    # in the order of the source
+    assert copied == ['turn_up', 'turn_down', 'turn_on', 'greetings', 'turn_off']
+
+    methods = [x.request.method for x in responses.calls]
+    # one backup, then a lookup and create per intent
+    assert methods.count('GET') == 6
+    assert methods.count('POST') == 5
+    assert responses.calls[0].request.url.split('?')[0] == \
+        BASE_URL.format(TEST_TARGET_WORKSPACE)
+    created = [json.loads(x.request.body) for x in responses.calls \
+        if x.request.method == 'POST']
+    assert sorted(x['intent'] for x in created) == sorted(copied)
+
+@responses.activate
+@mock
+def test_mock_regex(tmpdir):
+    """ Tests that a regular expression without a match copies nothing
+    """
+    with pytest.raises(ValueError, match='turn_sideways'):
+        copy_intents(
+            intents=['turn_(up|down)', 'turn_sideways'],
+            source_export='test/workspace_exports/car_dash.json',
+            target_username=TEST_USERNAME,
+            target_password=TEST_PASSWORD,
+            target_workspace=TEST_TARGET_WORKSPACE,
+            version=TEST_VERSION,
+            target_backup_file='{}/export.json'.format(tmpdir),
+            regex=True)
+
+    assert not responses.calls
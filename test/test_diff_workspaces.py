@@ -0,0 +1,69 @@
+""" Unit Testing diff_workspaces
+"""
+import gzip
+import json
+from wcs_deployment_utils.util import diff_workspaces
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+@mock
+def test_mock_identical(tmpdir):
+    """ Tests that an export and its compressed backup do not differ
+    """
+    compressed_path = '{}/export.json.gz'.format(tmpdir)
+    with gzip.open(compressed_path, 'wt', encoding='utf8') as exp:
+        json.dump(get_stored_json('test/workspace_exports/test.json'), exp)
+
+    diff = diff_workspaces('test/workspace_exports/test.json', compressed_path)
+
+    for changes in diff.values():
+        assert not any(changes.values())
+
+@mock
+def test_mock_changes():
+    """ Tests each type of change against an edited copy of an export
+    """
+    base = get_stored_json('test/workspace_exports/order_pizza.json')
+    other = get_stored_json('test/workspace_exports/order_pizza.json')
+
+    intent = other['intents'][0]
+    intent['description'] = 'changed'
+    removed_example = intent['examples'].pop(0)['text']
+    intent['examples'].append({'text': 'a brand new example'})
+
+    entity = other['entities'][-1]
+    removed_value = entity['values'].pop()['value']
+    value = entity['values'][0]
+    value['synonyms'].append('a brand new synonym')
+
+    nodes = other['dialog_nodes']
+    removed_node = nodes.pop()['dialog_node']
+    nodes[0]['title'] = 'changed'
+    nodes[1]['previous_sibling'] = 'changed'
+    nodes.append({'dialog_node': 'new_node'})
+    # audit fields are ignored
+    nodes[2]['updated'] = 'changed'
+
+    diff = diff_workspaces(base, other)
+
+    assert diff['intents'] == {
+        'added': [], 'removed': [], 'modified': [intent['intent']]}
+    assert diff['examples'] == {
+        'added': [(intent['intent'], 'a brand new example')],
+        'removed': [(intent['intent'], removed_example)]}
+    assert diff['entities'] == {'added': [], 'removed': [], 'modified': []}
+    assert diff['values'] == {
+        'added': [],
+        'removed': [(entity['entity'], removed_value)],
+        'modified': []}
+    assert diff['synonyms'] == {
+        'added': [(entity['entity'], value['value'], 'a brand new synonym')],
+        'removed': []}
+    assert diff['dialog_nodes'] == {
+        'added': ['new_node'],
+        'removed': [removed_node],
+        'modified': [nodes[0]['dialog_node']],
+        'moved': [nodes[1]['dialog_node']]}
@@ -0,0 +1,76 @@
+""" Unit Testing find_references
+"""
+from wcs_deployment_utils.dialog import find_references
+from wcs_deployment_utils.dialog._util import _get_condition_references
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_WORKSPACE = 'pizza'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@mock
+def test_mock_condition_references():
+    """ Tests the condition tokenizer. Strings and expressions are skipped
+    """
+    assert _get_condition_references(
+        "#billing && @city:(New York) || $count > 1 && " \
+        "input.text != '#nope' && intents[0].confidence > 0.5") == \
+            ['#billing', '@city:New York', '@city', '$count']
+    assert _get_condition_references(None) == []
+
+@responses.activate
+@mock
+def test_mock_workspace():
+    """ Tests finding references in a workspace from the API
+    """
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_WORKSPACE),
+        json=get_stored_json('test/workspace_exports/order_pizza.json'),
+        status=200)
+
+    nodes = find_references(
+        references=['@pizza_type', '#order_pizza', '#cancel'],
+        conversation_username=TEST_USERNAME,
+        conversation_password=TEST_PASSWORD,
+        version=TEST_VERSION,
+        workspace=TEST_WORKSPACE)
+
+    assert nodes == {
+        '@pizza_type': [
+            'handler_18_1517260282440',
+            'handler_24_1517260664579',
+            'handler_13_1517260119082'],
+        '#order_pizza': ['node_3_1517259824707'],
+        '#cancel': []}
+    assert len(responses.calls) == 1
+
+@mock
+def test_mock_export_branch():
+    """ Tests the index of a branch of a local export
+    """
+    nodes = find_references(
+        export='test/workspace_exports/order_pizza.json',
+        root_node='kind of pizza')
+
+    assert '#order_pizza' not in nodes
+    assert nodes['@pizza_topping:jalapeno'] == ['handler_20_1517260400770']
+    assert nodes['@special_type:vegetarian'] == [
+        'node_4_1517259884155',
+        'handler_33_1517260934068']
+
+@mock
+def test_mock_invalid_reference():
+    """ Tests that references must be written as in conditions
+    """
+    with pytest.raises(ValueError):
+        find_references(
+            references='order_pizza',
+            export='test/workspace_exports/order_pizza.json')
@@ -37,6 +37,112 @@ def test_mock_reponse():
 
     assert len(projection.splitlines()) == 11
 
+@responses.activate
+@mock
+def test_mock_export():
+    """ Tests against a local export. No calls are made
+    """
+    projection = generate_wcs_diagram(
+        export='test/workspace_exports/test.json')
+
+    assert not responses.calls
+    assert len(projection.splitlines()) == 11
+
+@mock
+def test_mock_options(tmpdir):
+    """ Tests rendering a branch, limiting depth and streaming to a file
+    """
+    full = generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json')
+
+    branch = generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json',
+        root_node='kind of pizza')
+    assert branch.splitlines()[0] == 'kind of pizza (jumps to: get name)'
+    assert len(branch.splitlines()) == 20
+
+    shallow = generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json',
+        max_depth=1)
+    assert shallow.splitlines() == [x for x in full.splitlines() \
+        if x == 'root' or x[:4] in ['├── ', '└── ']]
+
+    output_path = '{}/diagram.txt'.format(tmpdir)
+    result = generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json',
+        output_file=output_path)
+    assert result is None
+    with open(output_path, encoding='utf8') as diagram:
+        assert diagram.read() == full
+
+@mock
+def test_mock_graph_formats():
+    """ Tests the DOT, GraphML and JSON graph exports
+    """
+    graph = json.loads(generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json',
+        output_format='json'))
+
+    export = get_stored_json('test/workspace_exports/order_pizza.json')
+    assert len(graph['nodes']) == len(export['dialog_nodes'])
+    assert [graph['nodes'][x]['desc'] for x in graph['roots']] == \
+        ['Welcome', 'order a pizza', 'get name', 'Anything else']
+    # every node except the top level has a parent
+    assert sum(len(x) for x in graph['children'].values()) == \
+        len(export['dialog_nodes']) - 4
+    jumps = {graph['nodes'][x]['desc']: graph['nodes'][y]['desc'] \
+        for x, y in graph['jump_to'].items()}
+    assert jumps == {
+        'order a pizza': 'kind of pizza',
+        'kind of pizza': 'get name'}
+
+    dot = generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json',
+        output_format='dot')
+    assert dot.startswith('digraph dialog {')
+    assert dot.count('[type=jump_to') == 2
+
+    graphml = generate_wcs_diagram(
+        export='test/workspace_exports/order_pizza.json',
+        output_format='graphml')
+    assert graphml.count('<node ') == len(export['dialog_nodes'])
+    assert graphml.count('>jump_to<') == 2
+
+    with pytest.raises(ValueError):
+        generate_wcs_diagram(
+            export='test/workspace_exports/order_pizza.json',
+            output_format='svg')
+
+@mock
+@pytest.mark.parametrize('max_depth', [None, 0, 1, 2])
+def test_mock_graph_branch(max_depth):
+    """ Tests that the graph formats include the same nodes as the text
+    diagram of a branch, and only the edges between them
+    """
+    options = {
+        'export': 'test/workspace_exports/order_pizza.json',
+        'root_node': 'kind of pizza',
+        'max_depth': max_depth}
+    rendered = [x.lstrip('│├└─ ') for x in \
+        generate_wcs_diagram(**options).splitlines()]
+
+    graph = json.loads(generate_wcs_diagram(output_format='json', **options))
+    assert [graph['nodes'][x]['desc'] for x in graph['roots']] == \
+        ['kind of pizza']
+    assert len(graph['nodes']) == len(rendered)
+    # the jump to 'get name' leaves the branch
+    assert not graph['jump_to']
+    assert sum(len(x) for x in graph['children'].values()) == \
+        len(rendered) - 1
+
+    graphml = generate_wcs_diagram(output_format='graphml', **options)
+    assert graphml.count('<node ') == len(rendered)
+    assert '>jump_to<' not in graphml
+
+    dot = generate_wcs_diagram(output_format='dot', **options)
+    assert dot.count('[label=') == len(rendered)
+    assert dot.count('[type=child') == len(rendered) - 1
+
 @live
 def test_live_reponse():
     """ Tests against live response
@@ -0,0 +1,107 @@
+""" Unit Testing get_dialog_metrics
+"""
+from wcs_deployment_utils.dialog import get_dialog_metrics
+from wcs_deployment_utils.dialog._columnar import _DialogArrays
+from wcs_deployment_utils.dialog._util import _build_tree, _sort_child_nodes
+import anytree
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_WORKSPACE = 'pizza'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@mock
+@pytest.mark.parametrize('export', [
+    'test/workspace_exports/car_dash.json',
+    'test/workspace_exports/order_pizza.json',
+    'test/workspace_exports/test.json'])
+def test_mock_arrays(export):
+    """ Tests that the arrays have the structure of the tree
+    """
+    dialog_nodes = get_stored_json(export)['dialog_nodes']
+    arrays = _DialogArrays(dialog_nodes)
+    root = anytree.AnyNode(id=None, title=None, desc='root')
+    _build_tree(dialog_nodes, root)
+
+    index = {x: i for i, x in enumerate(arrays.ids)}
+    for node in anytree.PreOrderIter(root):
+        children = [x.id for x in _sort_child_nodes(node.children)]
+        if node.id is None:
+            assert [arrays.ids[x] for x in arrays.children()] == children
+            continue
+        position = index[node.id]
+        assert [arrays.ids[x] for x in arrays.children(position)] == children
+        assert arrays.depth[position] == node.depth
+        assert arrays.subtree_size[position] == len(node.descendants) + 1
+
+@responses.activate
+@mock
+def test_mock_metrics():
+    """ Tests the metrics of a workspace from the API
+    """
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_WORKSPACE),
+        json=get_stored_json('test/workspace_exports/order_pizza.json'),
+        status=200)
+
+    metrics = get_dialog_metrics(
+        conversation_username=TEST_USERNAME,
+        conversation_password=TEST_PASSWORD,
+        version=TEST_VERSION,
+        workspace=TEST_WORKSPACE)
+
+    assert metrics['nodes'] == 30
+    assert metrics['depth']['max'] == 5
+    assert metrics['depth']['distribution'] == {1: 4, 2: 4, 3: 8, 4: 12, 5: 2}
+    assert metrics['subtree_size']['top_level'] == {
+        'Anything else': 1,
+        'node_3_1517259824707': 23,
+        'node_2_1518828966559': 5,
+        'Welcome': 1}
+    assert metrics['fan_out']['root'] == 4
+    assert metrics['fan_out']['leaves'] == 21
+    assert metrics['jumps'] == {'count': 2, 'density': 2 / 30, 'missing': 0}
+
+@mock
+def test_mock_cycle():
+    """ Tests that a parent cycle is reported instead of looping
+    """
+    with pytest.raises(ValueError):
+        get_dialog_metrics(export={'dialog_nodes': [
+            {'dialog_node': 'a', 'parent': 'b', 'previous_sibling': None},
+            {'dialog_node': 'b', 'parent': 'a', 'previous_sibling': None}]})
+
+@mock
+def test_mock_sibling_order():
+    """ Tests that children follow the sibling chain rather than the list
+    order, and that nodes under a missing parent are orphans
+    """
+    arrays = _DialogArrays([
+        {'dialog_node': 'c', 'parent': None, 'previous_sibling': 'b'},
+        {'dialog_node': 'a_1', 'parent': 'a', 'previous_sibling': None},
+        {'dialog_node': 'b', 'parent': None, 'previous_sibling': 'a'},
+        {'dialog_node': 'x', 'parent': 'gone', 'previous_sibling': None},
+        {'dialog_node': 'x_1', 'parent': 'x', 'previous_sibling': None},
+        {'dialog_node': 'a', 'parent': None, 'previous_sibling': None},
+        {'dialog_node': 'd', 'parent': None, 'previous_sibling': 'gone'}])
+
+    assert [arrays.ids[x] for x in arrays.children()] == ['a', 'b', 'c']
+    assert [arrays.ids[x] for x in arrays.children(5)] == ['a_1']
+    assert list(arrays.previous_sibling) == [2, -1, 5, -1, -1, -1, -2]
+    assert list(arrays.orphan) == [
+        False, False, False, True, True, False, False]
+
+    metrics = get_dialog_metrics(export={'dialog_nodes': [
+        {'dialog_node': 'a', 'parent': None, 'previous_sibling': None},
+        {'dialog_node': 'x', 'parent': 'gone', 'previous_sibling': None}]})
+    assert metrics['orphans'] == 1
+    assert metrics['depth']['distribution'] == {1: 1}
+    assert metrics['fan_out']['root'] == 1
@@ -0,0 +1,67 @@
+""" Import time benchmark
+"""
+import subprocess
+import sys
+import pytest
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+HEAVY_MODULES = [
+    'pandas', 'numpy', 'anytree', 'watson_developer_cloud', 'requests']
+
+# generous, importing the package takes a few milliseconds
+MAX_IMPORT_SECONDS = 0.2
+
+def _get_imports(statement: str) -> dict:
+    """ Runs `statement` in a fresh interpreter (ignoring PYTHON*
+    environment variables), returns the cumulative import time in seconds
+    of every module it imported
+    """
+    result = subprocess.run(
+        [sys.executable, '-E', '-X', 'importtime', '-c', statement],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True)
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports[module.strip()] = int(cumulative) / 1e6
+    return imports
+
+@mock
+def test_package_import():
+    """ Tests that importing the package does not import its dependencies
+    """
+    imports = _get_imports('import wcs_deployment_utils')
+
+    assert not [x for x in HEAVY_MODULES if x in imports]
+    assert imports['wcs_deployment_utils'] < MAX_IMPORT_SECONDS
+
+@mock
+def test_diagram_import():
+    """ Tests that diagrams from an export do not need pandas or the SDK
+    """
+    imports = _get_imports(
+        'from wcs_deployment_utils.dialog import generate_wcs_diagram')
+
+    assert 'anytree' in imports
+    assert not [x for x in ['pandas', 'watson_developer_cloud'] \
+        if x in imports]
+
+@mock
+def test_lazy_attributes():
+    """ Tests that functions are not hidden by the modules of the same name
+    """
+    # importing a module directly binds it on its package
+    from wcs_deployment_utils.util.get_and_backup_workspace import \
+        get_and_backup_workspace as direct
+    from wcs_deployment_utils.util import get_and_backup_workspace
+    import wcs_deployment_utils
+
+    assert get_and_backup_workspace is direct
+    assert wcs_deployment_utils.util.get_and_backup_workspace is direct
+    assert 'copy_dialog_branch' in dir(wcs_deployment_utils.dialog)
+    with pytest.raises(AttributeError):
+        wcs_deployment_utils.dialog.does_not_exist #pylint: disable=w0104
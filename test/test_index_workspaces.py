@@ -0,0 +1,112 @@
+""" Unit Testing index_workspaces
+"""
+
+from wcs_deployment_utils.util import index_workspaces, WorkspaceIndex
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces'
+
+OLD = '2018-01-01T00:00:00.000Z'
+NEW = '2018-02-01T00:00:00.000Z'
+
+def _add_workspaces(workspaces):
+    responses.add(
+        responses.GET,
+        BASE_URL,
+        json={
+            'workspaces': [
+                {'workspace_id': x, 'updated': y} for x, y in workspaces],
+            'pagination': {}},
+        status=200)
+
+def _add_export(workspace, export_file):
+    responses.add(
+        responses.GET,
+        '{}/{}'.format(BASE_URL, workspace),
+        json=get_stored_json(export_file),
+        status=200)
+
+def _index(index_file):
+    return index_workspaces(
+        username=TEST_USERNAME,
+        password=TEST_PASSWORD,
+        version=TEST_VERSION,
+        index_file=index_file)
+
+@responses.activate
+@mock
+def test_mock_index(tmpdir):
+    """ Tests indexing and querying workspaces
+    """
+    index_file = '{}/index.sqlite'.format(tmpdir)
+    _add_workspaces([('car', OLD), ('pizza', OLD)])
+    _add_export('car', 'test/workspace_exports/car_dash.json')
+    _add_export('pizza', 'test/workspace_exports/order_pizza.json')
+
+    result = _index(index_file)
+
+    assert result == {
+        'indexed': ['car', 'pizza'],
+        'unchanged': [],
+        'removed': []}
+    with WorkspaceIndex(index_file) as index:
+        assert [x['workspace_id'] for x in index.find_intent('weather')] == \
+            ['car']
+        assert index.find_intent('order_pizza')[0]['examples'] == 5
+        assert [x['workspace_id'] for x in \
+            index.find_entity('pizza_topping', 'sausage')] == ['pizza']
+        assert index.find_entity('pizza_topping', 'anchovies') == []
+        assert [x['dialog_node'] for x in \
+            index.find_jumps('node_4_1517259884155')] == \
+                ['node_3_1517259824707']
+        assert [x['workspace_id'] for x in \
+            index.find_conditions('@PIZZA_TYPE:deep-dish')] == ['pizza']
+        assert [x['dialog_node'] for x in \
+            index.find_references('@pizza_topping:jalapeno')] == \
+                ['handler_20_1517260400770']
+        assert index.query(
+            'SELECT COUNT(*) AS nodes FROM dialog_nodes')[0]['nodes'] == 172
+
+@responses.activate
+@mock
+def test_mock_refresh(tmpdir):
+    """ Tests that only updated workspaces are exported again, and that
+    deleted workspaces are removed
+    """
+    index_file = '{}/index.sqlite'.format(tmpdir)
+    _add_workspaces([('car', OLD), ('pizza', OLD)])
+    _add_export('car', 'test/workspace_exports/car_dash.json')
+    _add_export('pizza', 'test/workspace_exports/order_pizza.json')
+    _index(index_file)
+
+    responses.reset()
+    _add_workspaces([('pizza', NEW)])
+    _add_export('pizza', 'test/workspace_exports/test.json')
+
+    result = _index(index_file)
+
+    assert result == {
+        'indexed': ['pizza'],
+        'unchanged': [],
+        'removed': ['car']}
+    assert [x.request.url.split('?')[0] for x in responses.calls] == \
+        [BASE_URL, BASE_URL + '/pizza']
+    with WorkspaceIndex(index_file) as index:
+        assert index.find_intent('weather') == []
+        assert index.find_intent('order_pizza') == []
+        assert [x['workspace_id'] for x in index.find_intent('1')] == \
+            ['pizza']
+
+    responses.reset()
+    _add_workspaces([('pizza', NEW)])
+
+    assert _index(index_file)['unchanged'] == ['pizza']
+    assert len(responses.calls) == 1
@@ -0,0 +1,85 @@
+""" Unit Testing instrument
+"""
+import json
+from wcs_deployment_utils.dialog import generate_wcs_diagram
+from wcs_deployment_utils.util import instrument
+from wcs_deployment_utils._instrumentation import _span
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_WORKSPACE = 'test'
+
+@responses.activate
+@mock
+def test_mock_response(tmpdir):
+    """ Tests that phases and API calls are reported against stubbed response
+    """
+    responses.add(
+        responses.GET,
+        'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}?version={}'
+        .format(TEST_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    report_path = '{}/timing.json'.format(tmpdir)
+
+    with instrument(report_path) as timings:
+        generate_wcs_diagram(
+            conversation_username=TEST_USERNAME,
+            conversation_password=TEST_PASSWORD,
+            workspace=TEST_WORKSPACE,
+            version=TEST_VERSION)
+
+    # calls made outside of the block are not recorded
+    generate_wcs_diagram(
+        conversation_username=TEST_USERNAME,
+        conversation_password=TEST_PASSWORD,
+        workspace=TEST_WORKSPACE,
+        version=TEST_VERSION)
+
+    report = None
+    with open(report_path) as rep:
+        report = json.load(rep)
+
+    assert report == timings.report()
+    for phase in ['export_download', 'tree_build', 'jump_resolution', 'render']:
+        assert phase in report['phase_totals']
+
+    # a single export is downloaded
+    assert report['request_count'] == 1
+    stats = report['requests']['GET workspaces/{}']
+    assert stats['count'] == 1
+    assert stats['errors'] == 0
+    assert stats['bytes_sent'] == 0
+    assert stats['bytes_received'] > 0
+
+@mock
+def test_custom_observer():
+    """ Tests that any object with `on_span` and `on_request` can observe
+    """
+    class Observer: #pylint: disable=c0111
+        def __init__(self):
+            self.phases = []
+        def on_span(self, phase, elapsed, depth): #pylint: disable=c0111,w0613
+            self.phases.append(phase)
+        def on_request(self, *args): #pylint: disable=c0111
+            pass
+
+    with instrument(observer=Observer()) as observer:
+        with _span('outer'):
+            with _span('inner'):
+                pass
+
+    assert observer.phases == ['inner', 'outer']
+
+    # a report needs an observer that can write it
+    with pytest.raises(ValueError):
+        with instrument(report_path='timing.json', observer=Observer()):
+            pass
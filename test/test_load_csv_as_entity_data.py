@@ -1,8 +1,10 @@
 """ Unit Testing load_entity_data_from_csv
 """
 import json
+import os
 from wcs_deployment_utils.entities import load_csv_as_entity_data
 from watson_developer_cloud import ConversationV1
+import responses
 import pytest
 
 from ._util import build_workspace_from_json, get_stored_json
@@ -10,6 +12,154 @@ from ._util import build_workspace_from_json, get_stored_json
 live = pytest.mark.live #pylint: disable=c0103
 mock = pytest.mark.mock #pylint: disable=c0103
 
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_WORKSPACE = 'test'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@responses.activate
+@mock
+def test_mock_bulk(tmpdir):
+    """ Tests that all changes are sent as chunked workspace updates
+    against stubbed response
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+        json={},
+        status=200)
+
+    load_csv_as_entity_data(
+        conversation_username=TEST_USERNAME,
+        conversation_password=TEST_PASSWORD,
+        version=TEST_VERSION,
+        workspace=TEST_WORKSPACE,
+        csv_file='test/parameters/load_csv_as_entity_data.csv',
+        target_backup_file='{}/export.json'.format(tmpdir),
+        bulk=True,
+        chunk_size=3)
+
+    # a single export, then the first chunk replaces and the rest append
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'POST', 'POST']
+    assert 'append=false' in responses.calls[1].request.url
+    assert 'append=true' in responses.calls[2].request.url
+    updated = [json.loads(x.request.body) for x in responses.calls[1:]]
+
+    # existing entities first, then new ones. value '2' is removed
+    assert [x['value'] for x in updated[0]['entities'][0]['values']] == \
+        ['1', '3']
+    assert updated[0]['entities'][0]['values'][0]['synonyms'] == \
+        ['TEST_1_1', 'TEST_1_2', 'TEST_ONE_APPEND']
+    assert updated[1]['entities'] == [
+        {'entity': 'TEST_2', 'values': []},
+        {'entity': 'TEST_3', 'values': [{'value': 'TEST'}]}]
+
+@responses.activate
+@mock
+def test_mock_resume(tmpdir):
+    """ Tests that a second run only retries the changes that failed
+    """
+    export = get_stored_json('test/workspace_exports/test.json')
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_WORKSPACE),
+        json=export,
+        status=200)
+    responses.add(
+        responses.DELETE,
+        (BASE_URL + '/entities/TEST_1/values/2').format(TEST_WORKSPACE),
+        json={},
+        status=200)
+    for entity in ['TEST_2', 'TEST_3']:
+        responses.add(
+            responses.GET,
+            (BASE_URL + '/entities/{}').format(TEST_WORKSPACE, entity),
+            json={},
+            status=404)
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/entities/TEST_1').format(TEST_WORKSPACE),
+        json=export['entities'][0],
+        status=200)
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/entities/TEST_1').format(TEST_WORKSPACE),
+        json={},
+        status=200)
+
+    # creating TEST_3 fails the first time
+    for status in [201, 400, 201]:
+        responses.add(
+            responses.POST,
+            (BASE_URL + '/entities').format(TEST_WORKSPACE),
+            json={},
+            status=status)
+
+    journal_file = '{}/journal.jsonl'.format(tmpdir)
+    for _ in range(2):
+        load_csv_as_entity_data(
+            conversation_username=TEST_USERNAME,
+            conversation_password=TEST_PASSWORD,
+            version=TEST_VERSION,
+            workspace=TEST_WORKSPACE,
+            csv_file='test/parameters/load_csv_as_entity_data.csv',
+            target_backup_file='{}/export.json'.format(tmpdir),
+            delta=False,
+            journal_file=journal_file)
+
+    # the first run made 8 calls. the second makes a backup, then only
+    # looks up and creates TEST_3
+    assert len(responses.calls) == 11
+    second_run = [(x.request.method, x.request.url.split('?')[0]) \
+        for x in responses.calls[8:]]
+    assert second_run == [
+        ('GET', BASE_URL.format(TEST_WORKSPACE)),
+        ('GET', (BASE_URL + '/entities/TEST_3').format(TEST_WORKSPACE)),
+        ('POST', (BASE_URL + '/entities').format(TEST_WORKSPACE))]
+    assert not os.path.exists(journal_file)
+
+@responses.activate
+@mock
+def test_mock_state(tmpdir):
+    """ Tests that a repeated bulk load with unchanged rows is skipped
+    """
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_WORKSPACE),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+    responses.add(
+        responses.POST,
+        BASE_URL.format(TEST_WORKSPACE),
+        json={},
+        status=200)
+
+    state_file = '{}/state.json'.format(tmpdir)
+    for _ in range(2):
+        load_csv_as_entity_data(
+            conversation_username=TEST_USERNAME,
+            conversation_password=TEST_PASSWORD,
+            version=TEST_VERSION,
+            workspace=TEST_WORKSPACE,
+            csv_file='test/parameters/load_csv_as_entity_data.csv',
+            target_backup_file='{}/export.json'.format(tmpdir),
+            bulk=True,
+            state_file=state_file)
+
+    # only the first load is applied
+    assert [x.request.method for x in responses.calls] == ['GET', 'POST']
+    state = get_stored_json(state_file)
+    assert sorted(state[TEST_WORKSPACE]['entities']) == \
+        ['TEST_1', 'TEST_2', 'TEST_3']
+
 @live
 def test_live_response(tmpdir):
     """ Tests against stubbed response
@@ -1,8 +1,10 @@
 """ Unit Testing load_intent_data_from_csv
 """
 import json
+import os
 from wcs_deployment_utils.intents import load_csv_as_intent_data
 from watson_developer_cloud import ConversationV1
+import responses
 import pytest
 
 from ._util import build_workspace_from_json, get_stored_json
@@ -10,6 +12,215 @@ from ._util import build_workspace_from_json, get_stored_json
 live = pytest.mark.live #pylint: disable=c0103
 mock = pytest.mark.mock #pylint: disable=c0103
 
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_WORKSPACE = 'test'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@responses.activate
+@mock
+def test_mock_bulk(tmpdir):
+    """ Tests that all changes are sent as chunked workspace updates
+    against stubbed response
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    responses.add(
+        responses.POST,
+        (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+        json={},
+        status=200)
+
+    load_csv_as_intent_data(
+        conversation_username=TEST_USERNAME,
+        conversation_password=TEST_PASSWORD,
+        version=TEST_VERSION,
+        workspace=TEST_WORKSPACE,
+        csv_file='test/parameters/load_csv_as_intent_data.csv',
+        target_backup_file='{}/export.json'.format(tmpdir),
+        bulk=True,
+        chunk_size=3)
+
+    # a single export, then the first chunk replaces and the rest append
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'POST', 'POST']
+    assert 'append=false' in responses.calls[1].request.url
+    assert 'append=true' in responses.calls[2].request.url
+    updated = [json.loads(x.request.body) for x in responses.calls[1:]]
+
+    # existing intents first, then new ones. '2' is removed
+    assert updated[0]['intents'] == [{
+        'intent': '1',
+        'description': '',
+        'examples': [
+            {'text': 'TEST_1'},
+            {'text': 'TEST_1_1'},
+            {'text': 'TEST_1_APPEND'}]}]
+    assert updated[1]['intents'] == [
+        {'intent': '3', 'examples': [{'text': 'TEST3'}]}]
+
+@responses.activate
+@mock
+def test_mock_resume(tmpdir):
+    """ Tests that a bulk load interrupted by a failed update resumes with
+    that update, sending the intents planned by the first run
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # the second update fails the first time
+    for status in [200, 400, 200]:
+        responses.add(
+            responses.POST,
+            (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+            json={},
+            status=status)
+
+    journal_file = '{}/journal.jsonl'.format(tmpdir)
+    options = {
+        'conversation_username': TEST_USERNAME,
+        'conversation_password': TEST_PASSWORD,
+        'version': TEST_VERSION,
+        'workspace': TEST_WORKSPACE,
+        'csv_file': 'test/parameters/load_csv_as_intent_data.csv',
+        'target_backup_file': '{}/export.json'.format(tmpdir),
+        'bulk': True,
+        'chunk_size': 3,
+        'journal_file': journal_file}
+
+    with pytest.raises(Exception):
+        load_csv_as_intent_data(**options)
+    assert os.path.exists(journal_file)
+
+    load_csv_as_intent_data(**options)
+
+    # backup, 2 updates, backup, then only the failed update is sent again
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'POST', 'POST', 'GET', 'POST']
+    assert 'append=true' in responses.calls[4].request.url
+    assert json.loads(responses.calls[4].request.body)['intents'] == [
+        {'intent': '3', 'examples': [{'text': 'TEST3'}]}]
+    assert not os.path.exists(journal_file)
+
+@responses.activate
+@mock
+def test_mock_restore(tmpdir):
+    """ Tests that a bulk load without a journal sends back the original
+    intents when an update after the first fails
+    """
+    responses.add(
+        responses.GET,
+        (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    # the second update fails, the restore succeeds
+    for status in [200, 400, 200]:
+        responses.add(
+            responses.POST,
+            (BASE_URL + '?version={}').format(TEST_WORKSPACE, TEST_VERSION),
+            json={},
+            status=status)
+
+    with pytest.raises(RuntimeError, match='1 of 2 items were applied, '
+                       'the original items were restored'):
+        load_csv_as_intent_data(
+            conversation_username=TEST_USERNAME,
+            conversation_password=TEST_PASSWORD,
+            version=TEST_VERSION,
+            workspace=TEST_WORKSPACE,
+            csv_file='test/parameters/load_csv_as_intent_data.csv',
+            target_backup_file='{}/export.json'.format(tmpdir),
+            bulk=True,
+            chunk_size=3)
+
+    # the restore replaces the intents with those of the backup
+    restored = responses.calls[3:]
+    assert 'append=false' in restored[0].request.url
+    assert [x['intent'] for call in restored \
+        for x in json.loads(call.request.body)['intents']] == ['1', '2']
+
+@responses.activate
+@mock
+def test_mock_state(tmpdir):
+    """ Tests that a repeated load only applies the intents whose rows
+    changed since the last load
+    """
+    export = get_stored_json('test/workspace_exports/test.json')
+    responses.add(
+        responses.GET,
+        BASE_URL.format(TEST_WORKSPACE),
+        json=export,
+        status=200)
+    responses.add(
+        responses.DELETE,
+        (BASE_URL + '/intents/2').format(TEST_WORKSPACE),
+        json={},
+        status=200)
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/intents/1').format(TEST_WORKSPACE),
+        json=export['intents'][0],
+        status=200)
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/intents/1').format(TEST_WORKSPACE),
+        json={},
+        status=200)
+    responses.add(
+        responses.GET,
+        (BASE_URL + '/intents/3').format(TEST_WORKSPACE),
+        json={},
+        status=404)
+    responses.add(
+        responses.POST,
+        (BASE_URL + '/intents').format(TEST_WORKSPACE),
+        json={},
+        status=201)
+
+    csv_file = '{}/intents.csv'.format(tmpdir)
+    with open('test/parameters/load_csv_as_intent_data.csv') as original:
+        rows = original.read()
+    with open(csv_file, 'w') as data:
+        data.write(rows.rstrip('\n') + '\n')
+
+    def _load():
+        load_csv_as_intent_data(
+            conversation_username=TEST_USERNAME,
+            conversation_password=TEST_PASSWORD,
+            version=TEST_VERSION,
+            workspace=TEST_WORKSPACE,
+            csv_file=csv_file,
+            target_backup_file='{}/export.json'.format(tmpdir),
+            state_file='{}/state.json'.format(tmpdir))
+
+    _load()
+    assert len(responses.calls) == 6
+
+    # nothing changed, not even a backup is made
+    _load()
+    assert len(responses.calls) == 6
+
+    # only intent 3 changed
+    with open(csv_file, 'a') as data:
+        data.write('ADD,3,TEST3_APPEND\n')
+    _load()
+    assert [(x.request.method, x.request.url.split('?')[0]) \
+        for x in responses.calls[6:]] == [
+            ('GET', BASE_URL.format(TEST_WORKSPACE)),
+            ('GET', (BASE_URL + '/intents/3').format(TEST_WORKSPACE)),
+            ('POST', (BASE_URL + '/intents').format(TEST_WORKSPACE))]
+    created = json.loads(responses.calls[8].request.body)
+    assert created['examples'] == [{'text': 'TEST3'}, {'text': 'TEST3_APPEND'}]
+
 @live
 def test_live_response(tmpdir):
     """ Tests against stubbed response
@@ -0,0 +1,43 @@
+""" Unit Testing load_workspace_export
+"""
+import gzip
+import json
+from wcs_deployment_utils.util import load_workspace_export
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+@mock
+def test_mock_file(tmpdir):
+    """ Tests loading plain and compressed exports
+    """
+    expected = get_stored_json('test/workspace_exports/test.json')
+
+    compressed_path = '{}/export.json.gz'.format(tmpdir)
+    with gzip.open(compressed_path, 'wt', encoding='utf8') as exp:
+        json.dump(expected, exp)
+
+    assert load_workspace_export('test/workspace_exports/test.json') == expected
+    assert load_workspace_export(compressed_path) == expected
+
+@mock
+def test_mock_dict():
+    """ Tests that a loaded export is returned as is
+    """
+    expected = get_stored_json('test/workspace_exports/test.json')
+    assert load_workspace_export(expected) is expected
+
+@mock
+def test_mock_invalid(tmpdir):
+    """ Tests that files that are not exports are rejected
+    """
+    invalid_path = '{}/invalid.json'.format(tmpdir)
+    with open(invalid_path, 'w') as exp:
+        json.dump([1, 2, 3], exp)
+
+    with pytest.raises(ValueError):
+        load_workspace_export(invalid_path)
+    with pytest.raises(ValueError):
+        load_workspace_export(None)
@@ -0,0 +1,99 @@
+""" Unit Testing plan_dialog_branch
+"""
+import json
+from wcs_deployment_utils.dialog import plan_dialog_branch
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_TARGET_WORKSPACE = 'target'
+
+@mock
+def test_mock_exports():
+    """ Tests a projection from local exports. No calls are made
+    """
+    source = get_stored_json('test/workspace_exports/order_pizza.json')
+    target = get_stored_json('test/workspace_exports/test.json')
+    original_target = json.dumps(target, sort_keys=True)
+
+    tree, rep, changes = plan_dialog_branch(
+        root_node='order a pizza',
+        target_node='2',
+        target_insert_as='child',
+        source_export=source,
+        target_export=target)
+
+    # same projection as copy_dialog_branch
+    assert len(tree.descendants) == 38
+    assert isinstance(rep, str)
+
+    # supplied exports are left untouched
+    assert json.dumps(target, sort_keys=True) == original_target
+
+    # branch and jump destination are added
+    assert len(changes['added']) == 28
+    assert not changes['removed']
+    assert not changes['modified']
+    # the displaced first child of '2' and the displaced 'Anything else'
+    assert sorted(changes['moved']) == sorted(
+        ['node_4_1518675295323', 'Anything else'])
+
+@mock
+def test_mock_recopy():
+    """ Tests copying a branch into a workspace that already has it. The
+    existing nodes are replaced, not duplicated
+    """
+    tree, _, changes = plan_dialog_branch(
+        root_node='order a pizza',
+        target_node='get name',
+        target_insert_as='sibling',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_export='test/workspace_exports/order_pizza.json')
+
+    ids = [x.id for x in tree.descendants]
+    assert len(ids) == 30
+    assert len(set(ids)) == 30
+    assert not changes['added'] and not changes['removed']
+
+@responses.activate
+@mock
+def test_mock_response():
+    """ Tests fetching the target against stubbed response. the target
+    workspace is never updated
+    """
+    responses.add(
+        responses.GET,
+        'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}?version={}'
+        .format(TEST_TARGET_WORKSPACE, TEST_VERSION),
+        json=get_stored_json('test/workspace_exports/test.json'),
+        status=200)
+
+    tree, _, changes = plan_dialog_branch(
+        root_node='order a pizza',
+        target_node='root',
+        target_insert_as='last_child',
+        source_export='test/workspace_exports/order_pizza.json',
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION)
+
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.method == 'GET'
+    assert len(tree.descendants) == 38
+    assert 'Anything else' in changes['moved']
+
+@mock
+def test_missing_source():
+    """ Tests that a source export or credentials are required
+    """
+    with pytest.raises(ValueError):
+        plan_dialog_branch(
+            root_node='order a pizza',
+            target_export='test/workspace_exports/test.json')
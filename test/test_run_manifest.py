@@ -0,0 +1,116 @@
+""" Unit Testing run_manifest scheduling
+"""
+
+import json
+import threading
+from time import sleep
+from wcs_deployment_utils.util import run_manifest
+from wcs_deployment_utils.util.run_manifest import _get_steps
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+@mock
+def test_mock_dependencies():
+    """ Tests that only conflicting steps are ordered
+    """
+    steps = _get_steps({
+        'defaults': {'target_workspace': 'target', 'workspace': 'target'},
+        'steps': [
+            {'command': 'copy_intent_data', 'args': {'intent': 'a'}},
+            {'command': 'copy_intent_data', 'args': {'intent': 'b'}},
+            {'command': 'load_csv_as_intent_data'},
+            {'command': 'copy_dialog_branch', 'args': {
+                'source_workspace': 'source'}},
+            {'command': 'delete_branch_from_csv'},
+            {'command': 'copy_entity_data', 'args': {
+                'entity': 'e',
+                'target_workspace': 'other'}},
+            {'command': 'generate_wcs_diagram', 'args': {
+                'workspace': 'source'}},
+            {'command': 'configure_api'},
+            {'command': 'load_workspace_export', 'depends_on': ['5']}]})
+
+    depends_on = [[y.name for y in x.depends_on] for x in steps]
+    assert depends_on == [
+        [],
+        [],
+        ['0', '1'],
+        [],
+        ['3'],
+        [],
+        [],
+        ['0', '1', '2', '3', '4', '5', '6'],
+        ['5', '7']]
+
+@mock
+def test_mock_dependencies_invalid():
+    """ Tests that steps can only depend on earlier steps
+    """
+    with pytest.raises(ValueError):
+        _get_steps({'steps': [
+            {'command': 'configure_api', 'depends_on': ['1']},
+            {'command': 'configure_api'}]})
+
+@responses.activate
+@mock
+def test_mock_parallel(tmpdir):
+    """ Tests that independent steps run at the same time and that the
+    critical path follows the dependent steps
+    """
+    # the three exports wait until all of them are in flight, which can
+    # only happen if they overlap. otherwise the barrier breaks
+    in_flight = threading.Barrier(3, timeout=10)
+
+    def _get_export(delay):
+        def _export(request): #pylint: disable=w0613
+            in_flight.wait()
+            sleep(delay)
+            return (200, {}, json.dumps(
+                get_stored_json('test/workspace_exports/test.json')))
+        return _export
+
+    steps = []
+    # 'c' finishes well before the diff of the slow 'a' and 'b'
+    for workspace, delay in [('a', 0.3), ('b', 0.3), ('c', 0)]:
+        responses.add_callback(
+            responses.GET,
+            BASE_URL.format(workspace),
+            callback=_get_export(delay),
+            content_type='application/json')
+        steps.append({
+            'name': workspace,
+            'command': 'get_and_backup_workspace',
+            'args': {
+                'workspace': workspace,
+                'export_path': '{}/{}.json'.format(tmpdir, workspace)}})
+    steps.append({
+        'name': 'diff',
+        'command': 'diff_workspaces',
+        'args': {
+            'base': '{}/a.json'.format(tmpdir),
+            'other': '{}/b.json'.format(tmpdir)},
+        'depends_on': ['a', 'b']})
+
+    report = run_manifest({
+        'defaults': {
+            'username': TEST_USERNAME,
+            'password': TEST_PASSWORD,
+            'version': TEST_VERSION},
+        'steps': steps})
+
+    assert not in_flight.broken
+    assert [x['name'] for x in report['steps']] == ['a', 'b', 'c', 'diff']
+    assert report['steps'][3]['depends_on'] == ['a', 'b']
+    assert report['steps'][3]['result']['intents']['added'] == []
+    assert report['critical_path'][-1] == 'diff'
+    assert report['critical_path'][0] in ['a', 'b']
+    assert report['critical_path_seconds'] >= 0.3
@@ -0,0 +1,211 @@
+""" Unit Testing sync_workspace
+"""
+
+import json
+from wcs_deployment_utils.util import sync_workspace
+import responses
+import pytest
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+TEST_USERNAME = 'test'
+TEST_PASSWORD = 'test'
+TEST_VERSION = '2017-05-26'
+TEST_SOURCE_WORKSPACE = 'source'
+TEST_TARGET_WORKSPACE = 'target'
+BASE_URL = 'https://gateway.watsonplatform.net/conversation/api/v1/workspaces/{}'
+
+OLD = '2018-01-01T00:00:00.000Z'
+NEW = '2018-02-01T00:00:00.000Z'
+
+def _add(method, workspace, path='', status=200, **kwargs):
+    responses.add(
+        method,
+        (BASE_URL + path + '?version={}').format(workspace, TEST_VERSION),
+        status=status,
+        **kwargs)
+
+def _sync(tmpdir, **kwargs):
+    return sync_workspace(
+        source_username=TEST_USERNAME,
+        source_password=TEST_PASSWORD,
+        source_workspace=TEST_SOURCE_WORKSPACE,
+        target_username=TEST_USERNAME,
+        target_password=TEST_PASSWORD,
+        target_workspace=TEST_TARGET_WORKSPACE,
+        version=TEST_VERSION,
+        state_file='{}/state.json'.format(tmpdir),
+        target_backup_file='{}/export.json'.format(tmpdir),
+        **kwargs)
+
+def _read_watermark(tmpdir):
+    with open('{}/state.json'.format(tmpdir)) as state:
+        return json.load(state)[TEST_TARGET_WORKSPACE]['sync'][
+            TEST_SOURCE_WORKSPACE]
+
+@responses.activate
+@mock
+def test_mock_first_sync(tmpdir):
+    """ Tests that the first sync replaces every collection of the target
+    and records the latest timestamp of the source
+    """
+    _add(responses.GET, TEST_TARGET_WORKSPACE, json={
+        'intents': [{'intent': 'stale', 'examples': []}],
+        'entities': [],
+        'dialog_nodes': []})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, json={
+        'intents': [{
+            'intent': 'hello',
+            'updated': NEW,
+            'examples': [{'text': 'hi', 'created': OLD, 'updated': OLD}]}],
+        'entities': [{'entity': 'size', 'updated': OLD, 'values': []}],
+        'dialog_nodes': [{'dialog_node': 'welcome', 'updated': OLD}]})
+    _add(responses.POST, TEST_TARGET_WORKSPACE, json={})
+
+    changes = _sync(tmpdir)
+
+    assert changes['intents'] == {'updated': ['hello'], 'deleted': ['stale']}
+    # backup, source export, then one update per collection
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'GET', 'POST', 'POST', 'POST']
+    sent = json.loads(responses.calls[2].request.body)
+    assert sent == {'intents': [{
+        'intent': 'hello',
+        'examples': [{'text': 'hi'}]}]}
+    assert _read_watermark(tmpdir) == NEW
+
+@responses.activate
+@mock
+def test_mock_dialog_not_chunked(tmpdir):
+    """ Tests that the dialog is validated and sent in a single update,
+    whatever the chunk size, since a child may come before its parent
+    """
+    _add(responses.GET, TEST_TARGET_WORKSPACE, json={
+        'intents': [], 'entities': [], 'dialog_nodes': []})
+    dialog_nodes = [
+        {'dialog_node': 'child', 'parent': 'parent',
+         'previous_sibling': None},
+        {'dialog_node': 'parent', 'parent': None, 'previous_sibling': None}]
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, json={
+        'intents': [], 'entities': [], 'dialog_nodes': dialog_nodes})
+    _add(responses.POST, TEST_TARGET_WORKSPACE, json={})
+
+    _sync(tmpdir, chunk_size=1)
+
+    # backup, source export, then one update per collection
+    assert [x.request.method for x in responses.calls] == \
+        ['GET', 'GET', 'POST', 'POST', 'POST']
+    assert json.loads(responses.calls[-1].request.body) == \
+        {'dialog_nodes': dialog_nodes}
+    assert 'append=false' in responses.calls[-1].request.url
+
+@responses.activate
+@mock
+def test_mock_invalid_dialog(tmpdir):
+    """ Tests that a dialog with a missing parent is not sent
+    """
+    _add(responses.GET, TEST_TARGET_WORKSPACE, json={
+        'intents': [], 'entities': [], 'dialog_nodes': []})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, json={
+        'intents': [], 'entities': [], 'dialog_nodes': [
+            {'dialog_node': 'child', 'parent': 'parent',
+             'previous_sibling': None}]})
+    _add(responses.POST, TEST_TARGET_WORKSPACE, json={})
+
+    with pytest.raises(ValueError):
+        _sync(tmpdir)
+    assert not any('dialog_nodes' in json.loads(x.request.body) \
+        for x in responses.calls if x.request.method == 'POST')
+
+@responses.activate
+@mock
+def test_mock_incremental_sync(tmpdir):
+    """ Tests that a later sync fetches only what changed after the
+    watermark or is missing from the target, and deletes what is missing
+    from the source
+    """
+    with open('{}/state.json'.format(tmpdir), 'w') as state:
+        json.dump({TEST_TARGET_WORKSPACE: {
+            'sync': {TEST_SOURCE_WORKSPACE: OLD}}}, state)
+
+    _add(responses.GET, TEST_TARGET_WORKSPACE, json={
+        'intents': [{'intent': 'hello'}, {'intent': 'stale'}],
+        'entities': [{'entity': 'size'}],
+        'dialog_nodes': [{'dialog_node': 'welcome'}]})
+
+    # the intents are listed on two pages
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/intents', json={
+        'intents': [{'intent': 'hello', 'updated': NEW}],
+        'pagination': {'next_cursor': 'page2'}})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/intents', json={
+        'intents': [{'intent': 'goodbye', 'updated': OLD}],
+        'pagination': {}})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/entities', json={
+        'entities': [{'entity': 'size', 'updated': OLD}]})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/dialog_nodes', json={
+        'dialog_nodes': [{'dialog_node': 'welcome', 'updated': OLD}]})
+
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/intents/hello', json={
+        'intent': 'hello',
+        'description': None,
+        'examples': [{'text': 'hi', 'updated': NEW}]})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/intents/goodbye', json={
+        'intent': 'goodbye',
+        'examples': [{'text': 'bye', 'updated': OLD}]})
+    _add(responses.POST, TEST_TARGET_WORKSPACE, '/intents/hello', json={})
+    _add(responses.POST, TEST_TARGET_WORKSPACE, '/intents', json={})
+    _add(responses.DELETE, TEST_TARGET_WORKSPACE, '/intents/stale', json={})
+
+    changes = _sync(tmpdir, max_workers=1)
+
+    assert changes == {
+        'intents': {'updated': ['hello', 'goodbye'], 'deleted': ['stale']},
+        'entities': {'updated': [], 'deleted': []},
+        'dialog_nodes': {'updated': [], 'deleted': []}}
+    # entities and dialog nodes are only listed
+    assert [(x.request.method, x.request.url.split('?')[0].split('/')[-1]) \
+        for x in responses.calls] == [
+            ('GET', TEST_TARGET_WORKSPACE),
+            ('GET', 'intents'),
+            ('GET', 'intents'),
+            ('GET', 'hello'),
+            ('POST', 'hello'),
+            ('GET', 'goodbye'),
+            ('POST', 'intents'),
+            ('DELETE', 'stale'),
+            ('GET', 'entities'),
+            ('GET', 'dialog_nodes')]
+    assert 'cursor=page2' in responses.calls[2].request.url
+    assert json.loads(responses.calls[4].request.body)['examples'] == \
+        [{'text': 'hi'}]
+    assert _read_watermark(tmpdir) == NEW
+
+@responses.activate
+@mock
+def test_mock_failed_sync(tmpdir):
+    """ Tests that the watermark is kept when a change fails
+    """
+    with open('{}/state.json'.format(tmpdir), 'w') as state:
+        json.dump({TEST_TARGET_WORKSPACE: {
+            'sync': {TEST_SOURCE_WORKSPACE: OLD}}}, state)
+
+    _add(responses.GET, TEST_TARGET_WORKSPACE, json={
+        'intents': [], 'entities': [], 'dialog_nodes': []})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/intents', json={
+        'intents': []})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/entities', json={
+        'entities': [{'entity': 'size', 'updated': NEW}]})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/entities/size', json={
+        'entity': 'size',
+        'values': [{'value': 'small', 'type': 'synonyms', 'updated': NEW}]})
+    _add(responses.POST, TEST_TARGET_WORKSPACE, '/entities', status=400,
+         json={'error': 'invalid'})
+    _add(responses.GET, TEST_SOURCE_WORKSPACE, '/dialog_nodes', json={
+        'dialog_nodes': []})
+
+    changes = _sync(tmpdir, max_workers=1)
+
+    assert changes['entities'] == {'updated': ['size'], 'deleted': []}
+    created = json.loads(responses.calls[4].request.body)
+    assert created['values'] == [{'value': 'small', 'type': 'synonyms'}]
+    assert _read_watermark(tmpdir) == OLD
@@ -0,0 +1,80 @@
+""" Unit Testing the validation of dialog nodes before they are published
+"""
+from wcs_deployment_utils._validation import (
+    _get_dialog_problems,
+    _validate_dialog_nodes)
+from wcs_deployment_utils.dialog._util import _update_workspace
+import responses
+import pytest
+
+from ._util import get_stored_json
+
+mock = pytest.mark.mock #pylint: disable=c0103
+
+def _node(dialog_node, parent=None, previous_sibling=None, jump_to=None):
+    node = {
+        'dialog_node': dialog_node,
+        'parent': parent,
+        'previous_sibling': previous_sibling}
+    if jump_to is not None:
+        node['next_step'] = {
+            'behavior': 'jump_to',
+            'dialog_node': jump_to,
+            'selector': 'condition'}
+    return node
+
+VALID = [
+    _node('a'),
+    _node('b', previous_sibling='a', jump_to='a_1'),
+    _node('a_1', parent='a'),
+    _node('a_2', parent='a', previous_sibling='a_1')]
+
+CASES = [
+    ('duplicate', VALID + [_node('a_1', parent='a')], 'Duplicate'),
+    ('missing parent', VALID + [_node('c', parent='x')], 'missing parent'),
+    ('missing sibling', VALID + [_node('c', previous_sibling='x')],
+     'missing previous sibling'),
+    ('other parent', VALID + [_node('c', previous_sibling='a_1')],
+     'another parent'),
+    ('fork', VALID + [_node('c', previous_sibling='a')], 'both follow'),
+    ('two first children', VALID + [_node('c', parent='a')], 'both follow'),
+    ('parent cycle', VALID + [
+        _node('x', parent='y'),
+        _node('y', parent='x')], 'cannot be reached'),
+    ('sibling cycle', VALID + [
+        _node('x', parent='a', previous_sibling='y'),
+        _node('y', parent='a', previous_sibling='x')], 'cannot be reached'),
+    ('jump', VALID + [_node('c', previous_sibling='b', jump_to='x')],
+     'jumps to missing')]
+
+@mock
+@pytest.mark.parametrize('nodes', [
+    'test/workspace_exports/car_dash.json',
+    'test/workspace_exports/order_pizza.json',
+    'test/workspace_exports/test.json'])
+def test_mock_valid(nodes):
+    """ Tests that exported dialogs are valid
+    """
+    assert _get_dialog_problems(get_stored_json(nodes)['dialog_nodes']) == []
+    assert _get_dialog_problems(VALID) == []
+
+@mock
+@pytest.mark.parametrize('case', CASES, ids=[x[0] for x in CASES])
+def test_mock_invalid(case):
+    """ Tests each kind of broken dialog
+    """
+    _, nodes, problem = case
+    problems = _get_dialog_problems(nodes)
+    assert len(problems) == 1
+    assert problem in problems[0]
+    with pytest.raises(ValueError):
+        _validate_dialog_nodes(nodes)
+
+@responses.activate
+@mock
+def test_mock_not_published():
+    """ Tests that a broken dialog is never sent
+    """
+    with pytest.raises(ValueError):
+        _update_workspace('test', 'test', 'target', CASES[0][1])
+    assert not responses.calls
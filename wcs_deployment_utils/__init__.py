@@ -1,10 +1,8 @@
 """ root package
 """
+from ._lazy import _make_lazy
 
-from . import dialog as dialog
-from . import intents as intents
-from . import entities as entities
-from . import util as util
+__all__ = ['dialog', 'intents', 'entities', 'util', 'aio']
 
-
-__all__ = ['dialog', 'intents', 'entities', 'util']
+# subpackages are imported on first use
+_make_lazy(__name__, {name: ('.' + name, None) for name in __all__})
@@ -0,0 +1,7 @@
+""" Allows running the command line as `python -m wcs_deployment_utils`
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,543 @@
+""" WCS API access shared by all packages
+
+All calls to the WCS service are made through the objects and functions in
+this module so that they can be instrumented, rate limited and retried in a
+single place.
+
+`requests` and the WCS SDK are only imported once a call is made.
+"""
+
+import random
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from functools import lru_cache
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Callable, List, Union
+from urllib.parse import parse_qs, urlparse
+
+from ._instrumentation import _get_hooks, _span
+from ._validation import _validate_dialog_nodes
+
+if TYPE_CHECKING:
+    import requests # pylint: disable=C0412
+    from watson_developer_cloud import ConversationV1
+
+# responses that are worth another attempt
+_RETRY_STATUS = [429, 500, 502, 503, 504]
+
+# request policy for every WCS instance, overridden per instance (username)
+# with `wcs_deployment_utils.util.configure_api`
+_DEFAULT_POLICY = {
+    # requests per second, 0 for no limit
+    'rate_limit': 0,
+    # requests that can be made at once before the rate limit applies
+    'burst': 1,
+    'max_retries': 5,
+    # seconds, doubled for each retry
+    'backoff': 0.5,
+    'max_backoff': 30.0,
+    # seconds to wait for the service to respond
+    'timeout': 60.0}
+_POLICIES = {}
+_LIMITERS = {}
+_POLICY_LOCK = threading.Lock()
+
+# cancellation event of the operation running on each thread
+_LOCAL = threading.local()
+
+class _TokenBucket:
+    """ Thread safe token bucket. Each request takes a token, tokens are
+    refilled at `rate` per second up to `capacity`
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """ Wait until a token is available and take it
+        """
+        while True:
+            with self._lock:
+                now = monotonic()
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self.rate <= 0:
+                        return
+                    self._tokens = min(
+                        self.capacity,
+                        self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """ Hold every request for `seconds` (ex. when throttled)
+        """
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until,
+                monotonic() + seconds)
+
+def _set_policy(username: Union[str, None], **values) -> dict:
+    """ Update the request policy of one WCS instance, or the default
+    policy of all instances if `username` is None
+
+    parameters:
+    username: WCS username identifying the instance, or None
+    values: policy values to change (see `_DEFAULT_POLICY`)
+
+    returns:
+    policy: the resulting policy
+    """
+    with _POLICY_LOCK:
+        if username is None:
+            _DEFAULT_POLICY.update(values)
+            # limiters are rebuilt from the new policy on next use
+            _LIMITERS.clear()
+        else:
+            _POLICIES.setdefault(username, {}).update(values)
+            _LIMITERS.pop(username, None)
+    return _get_policy(username)
+
+def _get_policy(username: Union[str, None]) -> dict:
+    """ Returns the request policy of a WCS instance
+
+    parameters:
+    username: WCS username identifying the instance
+
+    returns:
+    policy: dict of policy values (see `_DEFAULT_POLICY`)
+    """
+    with _POLICY_LOCK:
+        policy = dict(_DEFAULT_POLICY)
+        policy.update(_POLICIES.get(username, {}))
+        return policy
+
+def _get_limiter(username: Union[str, None]) -> _TokenBucket:
+    policy = _get_policy(username)
+    with _POLICY_LOCK:
+        if username not in _LIMITERS:
+            _LIMITERS[username] = _TokenBucket(
+                policy['rate_limit'],
+                policy['burst'])
+        return _LIMITERS[username]
+
+def _get_retry_delay(
+        policy: dict,
+        attempt: int,
+        response: Union['requests.Response', None]) -> float:
+    """ Seconds to wait before the next attempt. Honors `Retry-After`,
+    otherwise exponential backoff with full jitter
+
+    parameters:
+    policy: request policy
+    attempt: number of the failed attempt, from 0
+    response: the failed response, if any
+
+    returns:
+    delay: seconds to wait
+    """
+    retry_after = None
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(retry_after) - \
+                    datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(
+        0,
+        min(policy['max_backoff'], policy['backoff'] * 2 ** attempt))
+
+def _set_cancel_event(event: Union[threading.Event, None]) -> None:
+    """ Set the cancellation event for operations on the current thread.
+    Once the event is set, the next WCS call raises `CancelledError`
+
+    parameters:
+    event: event to check before each call, or None
+    """
+    _LOCAL.cancel_event = event
+
+def _map_concurrently(
+        func: Callable,
+        items: List,
+        max_workers: int) -> List:
+    """ Call `func` for each item on up to `max_workers` threads. Worker
+    threads share the cancellation event of the calling thread
+
+    parameters:
+    func: function taking a single item
+    items: list of items
+    max_workers: maximum number of concurrent calls. 1 calls `func` on
+        the calling thread
+
+    returns:
+    results: results of `func`, in the order of `items`
+    """
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(x) for x in items]
+
+    cancel_event = getattr(_LOCAL, 'cancel_event', None)
+
+    def _call(item):
+        _set_cancel_event(cancel_event)
+        try:
+            return func(item)
+        finally:
+            _set_cancel_event(None)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_call, items))
+
+def _is_idempotent(method: str, url: str) -> bool:
+    """ Whether a request can be repeated without changing its outcome.
+    Every request is, except the POSTs to a collection (ex.
+    /v1/workspaces/{workspace_id}/intents), which create an item. Paths
+    after /v1 alternate between collections and item ids, so collections
+    are told apart by position rather than by name, which may also be an
+    intent or entity name. POSTs to an item send its whole new content,
+    callers that append to it instead pass their own idempotency
+
+    parameters:
+    method: HTTP method
+    url: request url or path
+    """
+    if method.upper() != 'POST':
+        return True
+    segments = urlparse(url).path.strip('/').split('/')
+    if 'v1' in segments:
+        segments = segments[segments.index('v1') + 1:]
+    return len(segments) % 2 == 0
+
+def _execute(
+        username: Union[str, None],
+        send: Callable,
+        idempotent: bool = True):
+    """ Run a request through the rate limiter of the WCS instance,
+    retrying throttled requests and, if the request is idempotent, failed
+    and timed out requests. A failed or timed out request may have been
+    applied by the service, so repeating a create could report a conflict
+    for an item it created
+
+    parameters:
+    username: WCS username identifying the instance
+    send: sends the request, given the timeout in seconds. returns a
+        response or raises `WatsonApiException`
+    idempotent: the request can be repeated after a failure (5xx) or a
+        timeout. throttled requests (429) are never applied, so they are
+        always retried
+
+    returns:
+    result: the return value of `send`
+    """
+    import requests
+    from watson_developer_cloud import WatsonApiException
+
+    policy = _get_policy(username)
+    limiter = _get_limiter(username)
+    cancel_event = getattr(_LOCAL, 'cancel_event', None)
+    attempt = 0
+    while True:
+        limiter.acquire()
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError()
+        try:
+            result = send(policy['timeout'])
+        except WatsonApiException as err:
+            if attempt >= policy['max_retries'] or \
+                    not _is_retryable(err.code, idempotent):
+                raise
+            response = err.httpResponse
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= policy['max_retries'] or not idempotent:
+                raise
+            response = None
+        else:
+            if attempt >= policy['max_retries'] or \
+                    not isinstance(result, requests.Response) or \
+                    not _is_retryable(result.status_code, idempotent):
+                return result
+            response = result
+
+        delay = _get_retry_delay(policy, attempt, response)
+        # throttling applies to the whole instance, not just this thread
+        if response is not None and response.status_code == 429:
+            limiter.pause(delay)
+        attempt += 1
+        with _span('retry_wait'):
+            sleep(delay)
+
+def _is_retryable(status: int, idempotent: bool) -> bool:
+    return status == 429 or (idempotent and status in _RETRY_STATUS)
+
+@lru_cache(maxsize=None)
+def _get_conversation_class() -> type:
+    """ Returns the Conversation SDK class whose requests go through
+    `_execute`
+    """
+    from watson_developer_cloud import ConversationV1
+
+    class _Conversation(ConversationV1):
+        # idempotent: see `_execute`, guessed from the url if None
+        def request( # pylint: disable=W0221
+                self, method, url, idempotent=None, **kwargs):
+            def _send(timeout):
+                return super(_Conversation, self).request(
+                    method,
+                    url,
+                    timeout=timeout,
+                    **kwargs)
+            return _execute(
+                self.username,
+                _send,
+                _is_idempotent(method, url) if idempotent is None \
+                    else idempotent)
+
+    return _Conversation
+
+def _get_conversation(
+        username: str,
+        password: str,
+        version: str) -> 'ConversationV1':
+    """ Build an instance of the Conversation SDK for the given credentials
+
+    parameters:
+    username: WCS username
+    password: WCS password
+    version: WCS API version
+
+    returns:
+    conversation: instance of Conversation from WDC SDK
+    """
+    conversation = _get_conversation_class()(
+        username=username,
+        password=password,
+        version=version
+    )
+    conversation.set_http_config({'hooks': _get_hooks()})
+    return conversation
+
+def _request(method: str, url: str, **kwargs) -> 'requests.Response':
+    """ Issue a raw HTTP request against the WCS service
+
+    parameters:
+    method: HTTP method
+    url: full request url
+    kwargs: passed through to `requests.request`
+
+    returns:
+    response: the `requests` response
+    """
+    import requests
+
+    username = (kwargs.get('auth') or (None,))[0]
+    return _execute(
+        username,
+        lambda timeout: requests.request(
+            method,
+            url,
+            hooks=_get_hooks(),
+            timeout=timeout,
+            **kwargs),
+        _is_idempotent(method, url))
+
+def _list_collection(
+        conversation: 'ConversationV1',
+        workspace_id: Union[str, None],
+        collection: str,
+        **params) -> List[dict]:
+    """ Every item of a workspace collection, or every workspace, following
+    the pages of the list endpoint
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: workspace id, None for 'workspaces'
+    collection: name of the collection ('intents', 'entities',
+        'dialog_nodes' or 'workspaces')
+    params: passed through to the list method, ex. export
+
+    returns:
+    items: list of items, in the order listed
+    """
+    list_items = getattr(conversation, 'list_' + collection)
+    if workspace_id is not None:
+        params['workspace_id'] = workspace_id
+    items = []
+    cursor = None
+    while True:
+        response = list_items(cursor=cursor, **params)
+        items.extend(response.get(collection, []))
+        pagination = response.get('pagination') or {}
+        cursor = pagination.get('next_cursor')
+        # older API versions only return the url of the next page
+        if cursor is None and pagination.get('next_url'):
+            cursor = parse_qs(urlparse(pagination['next_url']).query).get(
+                'cursor', [None])[0]
+        if cursor is None:
+            return items
+
+def _chunk_items(
+        items: List[dict],
+        chunk_size: int,
+        get_size: Callable[[dict], int]) -> List[List[dict]]:
+    """ Split items into chunks with a total size of at most `chunk_size`.
+    An item larger than `chunk_size` is sent in a chunk of its own
+
+    parameters:
+    items: list of items to split
+    chunk_size: maximum total size of a chunk
+    get_size: returns the size of a single item
+
+    returns:
+    chunks: list of chunks, always at least one
+    """
+    chunks = [[]]
+    size = 0
+    for item in items:
+        item_size = get_size(item)
+        if chunks[-1] and size + item_size > chunk_size:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(item)
+        size += item_size
+    return chunks
+
+def _update_workspace_collection(
+        conversation: 'ConversationV1',
+        workspace_id: str,
+        collection: str,
+        items: List[dict],
+        chunk_size: int,
+        get_size: Union[Callable[[dict], int], None],
+        completed: int = 0,
+        on_update: Union[Callable[[int], None], None] = None,
+        original: Union[List[dict], None] = None) -> int:
+    """ Replace an entire collection of a workspace (ex. 'intents') with
+    `items` in as few workspace updates as the chunk size allows. The first
+    update replaces the collection and the rest are appended to it. Dialog
+    nodes are validated and sent in a single update: a chunk of nodes could
+    refer to parents, siblings or jump targets of a later chunk
+
+    Between the first update and the last, the workspace only has the items
+    sent so far. If a later update fails, the collection is restored from
+    `original` when given, and a RuntimeError reports how many items had
+    been applied
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: target workspace id
+    collection: name of the workspace collection ('intents', 'entities' or
+        'dialog_nodes')
+    items: complete list of items for the collection
+    chunk_size: maximum total size of each update, not used for dialog
+        nodes
+    get_size: returns the size of a single item, not used for dialog nodes
+    completed: number of updates already made by an earlier, interrupted
+        call with the same items. these are not sent again
+    on_update: called with the index of each update once it is made
+    original: items of the collection before the first update, sent back
+        if a later update fails. a resumed call (see `completed`) should
+        not restore, the units of the earlier call are already recorded
+
+    returns:
+    updates: number of workspace updates made
+    """
+    if collection == 'dialog_nodes':
+        with _span('validation'):
+            _validate_dialog_nodes(items)
+        chunks = [items]
+    else:
+        chunks = _chunk_items(items, chunk_size, get_size)
+    applied = sum(len(x) for x in chunks[:completed])
+    for index, chunk in enumerate(chunks):
+        if index < completed:
+            continue
+        try:
+            _send_chunk(conversation, workspace_id, collection, chunk, index)
+        except Exception as err: # pylint: disable=W0703
+            # the collection is intact until the first update replaces it
+            if index == 0:
+                raise
+            restored = original is not None and _restore_collection(
+                conversation,
+                workspace_id,
+                collection,
+                original,
+                chunk_size,
+                get_size)
+            raise RuntimeError(
+                ("Update {} of {} of the {} of workspace '{}' failed after "
+                 "{} of {} items were applied, {}").format(
+                     index + 1,
+                     len(chunks),
+                     collection,
+                     workspace_id,
+                     applied,
+                     len(items),
+                     'the original items were restored' if restored \
+                        else 'the workspace only has the items applied')) \
+                from err
+        applied += len(chunk)
+        if on_update is not None:
+            on_update(index)
+    return max(0, len(chunks) - completed)
+
+def _send_chunk(
+        conversation: 'ConversationV1',
+        workspace_id: str,
+        collection: str,
+        chunk: List[dict],
+        index: int) -> None:
+    """ Make one update of `_update_workspace_collection`, which replaces
+    the collection if it is the first (index 0) and appends to it otherwise.
+    An append is not repeated after a failure, the chunk may have been added
+    """
+    with _span('publish'):
+        conversation.request(
+            method='POST',
+            url='/v1/workspaces/{}'.format(workspace_id),
+            params={
+                'version': conversation.version,
+                'append': 'false' if index == 0 else 'true'},
+            json={collection: chunk},
+            accept_json=True,
+            idempotent=index == 0)
+
+def _restore_collection(
+        conversation: 'ConversationV1',
+        workspace_id: str,
+        collection: str,
+        original: List[dict],
+        chunk_size: int,
+        get_size: Callable[[dict], int]) -> bool:
+    """ Send back the original items of a collection after a failed
+    `_update_workspace_collection`
+
+    returns:
+    restored: False if the restore failed too
+    """
+    try:
+        for index, chunk in enumerate(
+                _chunk_items(original, chunk_size, get_size)):
+            _send_chunk(conversation, workspace_id, collection, chunk, index)
+    except Exception as err: # pylint: disable=W0703
+        print("Restoring the {} of workspace '{}' failed: {}".format(
+            collection,
+            workspace_id,
+            repr(err)))
+        return False
+    return True
@@ -3,3 +3,10 @@
 
 _BASE_WCS_ENDPOINT = 'https://gateway.watsonplatform.net/conversation/api/v1/'
 _DEFAULT_BACKUP_FILE = 'backup/{}.json'
+_DEFAULT_CHUNK_SIZE = 5000
+_DEFAULT_MAX_WORKERS = 8
+_DEFAULT_AIO_WORKERS = 64
+# audit fields are returned by the service but never sent back to it
+_AUDIT_KEYS = ['created', 'updated']
+_DEFAULT_SYNC_STATE_FILE = 'sync/state.json'
+_DEFAULT_INDEX_FILE = 'index/workspaces.sqlite'
@@ -0,0 +1,125 @@
+""" Instrumentation hooks shared by all packages
+
+Functions in this package report timed phases through `_span` and every
+HTTP response through `_record_response`. Both are no-ops unless an
+observer has been registered with `wcs_deployment_utils.util.instrument`.
+"""
+
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterator, List
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import requests # pylint: disable=C0412
+
+# registered observers. each observer implements `on_span` and `on_request`
+_OBSERVERS = []
+_OBSERVERS_LOCK = threading.Lock()
+
+# nesting depth of spans, tracked per thread
+_LOCAL = threading.local()
+
+def _add_observer(observer) -> None:
+    """ Register an observer for spans and requests
+
+    parameters:
+    observer: object implementing `on_span` and `on_request`
+    """
+    with _OBSERVERS_LOCK:
+        _OBSERVERS.append(observer)
+
+def _remove_observer(observer) -> None:
+    """ Unregister a previously registered observer
+
+    parameters:
+    observer: object previously passed to `_add_observer`
+    """
+    with _OBSERVERS_LOCK:
+        if observer in _OBSERVERS:
+            _OBSERVERS.remove(observer)
+
+def _get_observers() -> List:
+    """ Returns a snapshot of the registered observers
+
+    returns:
+    observers: list of registered observers
+    """
+    with _OBSERVERS_LOCK:
+        return list(_OBSERVERS)
+
+@contextmanager
+def _span(phase: str) -> Iterator[None]:
+    """ Time the enclosed block and report it to any observers as `phase`
+
+    parameters:
+    phase: name of the phase being timed (ex. 'export_download')
+    """
+    if not _OBSERVERS:
+        yield
+        return
+
+    depth = getattr(_LOCAL, 'depth', 0)
+    _LOCAL.depth = depth + 1
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = perf_counter() - start
+        _LOCAL.depth = depth
+        for observer in _get_observers():
+            observer.on_span(phase, elapsed, depth)
+
+def _get_endpoint(url: str) -> str:
+    """ Reduce a WCS url to its endpoint template so that calls against
+    different workspaces, intents, entities, etc. are counted together
+
+    ex. .../api/v1/workspaces/abc/intents/hello -> workspaces/{}/intents/{}
+
+    parameters:
+    url: the full request url
+
+    returns:
+    endpoint: the templated endpoint path
+    """
+    segments = [x for x in urlparse(url).path.split('/') if x]
+    if 'v1' in segments:
+        segments = segments[segments.index('v1') + 1:]
+    # collections and identifiers alternate in the WCS api paths
+    return '/'.join(
+        x if index % 2 == 0 else '{}' for index, x in enumerate(segments))
+
+def _record_response(response: 'requests.Response', *args, **kwargs) -> None: # pylint: disable=W0613
+    """ `requests` response hook reporting the call to any observers
+
+    parameters:
+    response: the response returned by `requests`
+    """
+    if not _OBSERVERS:
+        return
+
+    body = response.request.body
+    if body is None:
+        bytes_sent = 0
+    elif isinstance(body, str):
+        bytes_sent = len(body.encode('utf-8'))
+    else:
+        bytes_sent = len(body)
+
+    for observer in _get_observers():
+        observer.on_request(
+            response.request.method,
+            _get_endpoint(response.request.url),
+            response.status_code,
+            bytes_sent,
+            len(response.content),
+            response.elapsed.total_seconds())
+
+def _get_hooks() -> dict:
+    """ Returns the `requests` hooks used to instrument API calls
+
+    returns:
+    hooks: dict suitable for the `hooks` argument of `requests`
+    """
+    return {'response': [_record_response]}
@@ -0,0 +1,130 @@
+""" Journal of the changes applied by a CSV load
+
+A load is split into units (clearing an intent, a REMOVE row, the adds of
+an entity, a bulk workspace update, ...). Each unit is recorded in the
+journal file once applied, so that a load interrupted part way can be run
+again and resume with the first unit that was not applied.
+"""
+
+import hashlib
+import json
+import threading
+from os import makedirs, path, remove
+from typing import List, Union
+
+# bytes read at a time when fingerprinting a CSV file
+_READ_SIZE = 1 << 20
+
+def _get_fingerprint(csv_file: str, **options) -> str:
+    """ Identifies a load by the contents of its CSV file and the options
+    that change what is applied
+
+    parameters:
+    csv_file: CSV file being loaded
+    options: JSON serializable options of the load
+
+    returns:
+    fingerprint: hex digest of the file and options
+    """
+    digest = hashlib.sha256()
+    with open(csv_file, 'rb') as data:
+        for block in iter(lambda: data.read(_READ_SIZE), b''):
+            digest.update(block)
+    digest.update(json.dumps(options, sort_keys=True).encode('utf8'))
+    return digest.hexdigest()
+
+class _Journal:
+    """ Units applied by a load. Without a path nothing is stored and
+    every unit is applied
+    """
+
+    def __init__(
+            self,
+            journal_file: Union[str, None] = None,
+            fingerprint: Union[str, None] = None):
+        self.path = journal_file
+        self.applied = set()
+        self.plan = None
+        self.failed = False
+        # units can be applied on several threads
+        self._lock = threading.Lock()
+        if journal_file is None:
+            return
+
+        if path.exists(journal_file):
+            self._read(fingerprint)
+        if not self.applied and self.plan is None:
+            if path.dirname(journal_file):
+                makedirs(path.dirname(journal_file), exist_ok=True)
+            with open(journal_file, 'w', encoding='utf8') as journal:
+                journal.write(json.dumps({'fingerprint': fingerprint}) + '\n')
+        else:
+            print("Resuming from journal '{}', {} units already applied".format(
+                journal_file,
+                len(self.applied)))
+
+    def _read(self, fingerprint: str) -> None:
+        with open(self.path, 'r', encoding='utf8') as journal:
+            lines = journal.read().split('\n')
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = {}
+        if header.get('fingerprint') != fingerprint:
+            print(("Journal '{}' is for a different load, "
+                   "starting over").format(self.path))
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            # the last line is incomplete if the load was killed mid write
+            except ValueError:
+                break
+            if 'plan' in entry:
+                self.plan = entry['plan']
+            else:
+                self.applied.add(entry['unit'])
+
+    def __contains__(self, unit: str) -> bool:
+        return unit in self.applied
+
+    def _write(self, entry: dict) -> None:
+        if self.path is None:
+            return
+        with open(self.path, 'a', encoding='utf8') as journal:
+            journal.write(json.dumps(entry) + '\n')
+
+    def record(self, unit: str) -> None:
+        """ Record that a unit was applied
+
+        parameters:
+        unit: identifier of the unit, ex. 'add:order_pizza'
+        """
+        with self._lock:
+            self.applied.add(unit)
+            self._write({'unit': unit})
+
+    def set_plan(self, plan: List[dict]) -> None:
+        """ Record the items a bulk load will send, so that a resumed load
+        sends the same items rather than recomputing them from a partly
+        updated workspace
+
+        parameters:
+        plan: complete list of items for the collection
+        """
+        with self._lock:
+            self.plan = plan
+            self._write({'plan': plan})
+
+    def finish(self) -> None:
+        """ Remove the journal if every unit was applied, otherwise keep
+        it so that the failed units are retried by the next run
+        """
+        if self.path is None or not path.exists(self.path):
+            return
+        if self.failed:
+            print(("Some changes failed, run the load again to retry "
+                   "them. Applied changes are recorded in '{}'").format(
+                       self.path))
+        else:
+            remove(self.path)
@@ -0,0 +1,61 @@
+""" Lazy loading of package attributes
+
+The packages only import their modules (and through them pandas, anytree
+and the WCS SDK) when one of their public attributes is first used, so that
+importing the package itself is cheap.
+"""
+
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import Dict, Union
+
+class _LazyPackage(ModuleType):
+    """ Package whose public attributes are imported on first access.
+    `_LAZY_ATTRIBUTES` maps each attribute to the module it is defined in,
+    or to itself for subpackages
+    """
+
+    def __getattr__(self, name: str):
+        # only called when normal lookup fails
+        lazy_attributes = ModuleType.__getattribute__(self, '_LAZY_ATTRIBUTES')
+        if name not in lazy_attributes:
+            raise AttributeError("module '{}' has no attribute '{}'".format(
+                self.__name__,
+                name))
+        module_name, attribute = lazy_attributes[name]
+        value = import_module(module_name, self.__name__)
+        if attribute is not None:
+            value = getattr(value, attribute)
+        ModuleType.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name: str, value) -> None:
+        # the import system binds every imported module on its package.
+        # most modules are named after the function they define, which
+        # would then hide the function
+        lazy_attributes = self.__dict__.get('_LAZY_ATTRIBUTES', {})
+        if name in lazy_attributes and isinstance(value, ModuleType) and \
+                lazy_attributes[name][1] is not None:
+            return
+        ModuleType.__setattr__(self, name, value)
+
+    def __dir__(self):
+        return sorted(set(ModuleType.__dir__(self)) | set(self._LAZY_ATTRIBUTES))
+
+def _make_lazy(
+        package_name: str,
+        lazy_attributes: Dict[str, Union[str, tuple]]) -> None:
+    """ Make the public attributes of a package lazy. Called at the end of
+    the package `__init__`
+
+    parameters:
+    package_name: `__name__` of the package
+    lazy_attributes: dict of attribute name to the relative name of the
+        module defining it, or to (module, None) for a subpackage
+    """
+    package = sys.modules[package_name]
+    package._LAZY_ATTRIBUTES = { # pylint: disable=W0212
+        name: target if isinstance(target, tuple) else (target, name) \
+            for name, target in lazy_attributes.items()}
+    package.__class__ = _LazyPackage
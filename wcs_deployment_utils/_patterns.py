@@ -0,0 +1,42 @@
+""" Selection of intents and entities by name pattern
+"""
+
+import re
+from fnmatch import translate
+from typing import List, Union
+
+def _match_names(
+        names: List[str],
+        patterns: Union[str, List[str]],
+        regex: bool = False) -> List[str]:
+    """ Names matching any of the patterns, in the order of `names`. Every
+    pattern must match at least one name
+
+    parameters:
+    names: names to select from
+    patterns: pattern or list of patterns. shell style wildcards (ex.
+        'order_*') or, if `regex`, regular expressions matching the whole
+        name. plain names match themselves
+    regex: patterns are regular expressions
+
+    returns:
+    selected: names matching any pattern
+    """
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    matchers = [re.compile(x if regex else translate(x)).fullmatch \
+        for x in patterns]
+
+    selected = []
+    matched = set()
+    for name in names:
+        hits = [index for index, match in enumerate(matchers) if match(name)]
+        if hits:
+            selected.append(name)
+            matched.update(hits)
+
+    unmatched = [x for index, x in enumerate(patterns) if index not in matched]
+    if unmatched:
+        raise ValueError("No match in source for: {}".format(
+            ', '.join(unmatched)))
+    return selected
@@ -0,0 +1,145 @@
+""" State of previous CSV loads and syncs
+
+Records a hash of the rows of each intent or entity once they are applied
+to a workspace, so that later loads of the same CSV only apply the groups
+of rows that changed. Syncs record the latest `updated` timestamp of each
+source workspace they copied from.
+
+{
+    "<workspace id>": {
+        "intents": {"<intent>": "<hash>", ...},
+        "entities": {"<entity>": "<hash>", ...},
+        "sync": {"<source workspace id>": "<timestamp>", ...}
+    }
+}
+"""
+
+import hashlib
+import json
+import threading
+from os import close, makedirs, path, remove, replace
+from tempfile import mkstemp
+from typing import Dict, Iterable, Union
+
+import pandas as pd
+
+# loads running in parallel can share a state file
+_STATE_LOCK = threading.Lock()
+
+def _hash_groups(
+        data: pd.DataFrame,
+        key: str,
+        **options) -> Dict[str, str]:
+    """ Hash the rows of each group, in order, with the options that change
+    how they are applied
+
+    parameters:
+    data: DataFrame of CSV rows
+    key: column the rows are grouped by ('intent' or 'entity')
+    options: JSON serializable options of the load
+
+    returns:
+    hashes: dict of group name to hex digest
+    """
+    seed = json.dumps(options, sort_keys=True).encode('utf8')
+    column = list(data.columns).index(key)
+    digests = {}
+    for row in data.itertuples(index=False):
+        digest = digests.get(row[column])
+        if digest is None:
+            digest = digests[row[column]] = hashlib.sha256(seed)
+        digest.update(json.dumps(list(row)).encode('utf8'))
+    return {name: digest.hexdigest() for name, digest in digests.items()}
+
+def _get_applied_groups(
+        data: pd.DataFrame,
+        key: str,
+        applied_units: Union[Iterable[str], None],
+        clear_existing: bool) -> list:
+    """ Groups whose every unit (see `_journal`) was applied
+
+    parameters:
+    data: DataFrame of the CSV rows that were loaded
+    key: column the rows are grouped by ('intent' or 'entity')
+    applied_units: units recorded as applied, None if every unit was
+    clear_existing: if the groups were cleared before they were loaded
+
+    returns:
+    groups: names of the groups that were applied
+    """
+    groups = list(data[key].unique())
+    if applied_units is None:
+        return groups
+
+    applied_units = set(applied_units)
+    failed = set()
+    for index, row in data.iterrows():
+        if row['action'] == 'REMOVE':
+            unit = 'remove:{}'.format(index)
+        elif row['action'] == 'ADD':
+            unit = 'add:{}'.format(row[key])
+        else:
+            continue
+        if unit not in applied_units:
+            failed.add(row[key])
+    if clear_existing:
+        failed.update(x for x in groups \
+            if 'clear:{}'.format(x) not in applied_units)
+    return [x for x in groups if x not in failed]
+
+def _read_state(
+        state_file: str,
+        workspace: str,
+        collection: str) -> Dict[str, str]:
+    """ Returns the hashes of the groups last applied to a workspace
+
+    parameters:
+    state_file: path of the state file
+    workspace: workspace id
+    collection: 'intents', 'entities' or 'sync'
+
+    returns:
+    hashes: dict of group name to hex digest
+    """
+    with _STATE_LOCK:
+        state = _load(state_file)
+    return state.get(workspace, {}).get(collection, {})
+
+def _write_state(
+        state_file: str,
+        workspace: str,
+        collection: str,
+        hashes: Dict[str, str]) -> None:
+    """ Records the hashes of groups applied to a workspace, keeping those
+    of every other group
+
+    parameters:
+    state_file: path of the state file
+    workspace: workspace id
+    collection: 'intents', 'entities' or 'sync'
+    hashes: dict of group name to hex digest
+    """
+    with _STATE_LOCK:
+        state = _load(state_file)
+        state.setdefault(workspace, {}).setdefault(collection, {}).update(
+            hashes)
+        if path.dirname(state_file):
+            makedirs(path.dirname(state_file), exist_ok=True)
+        # never leave a partly written state file
+        handle, temp_path = mkstemp(
+            dir=path.dirname(state_file) or '.',
+            suffix='.tmp')
+        close(handle)
+        try:
+            with open(temp_path, 'w', encoding='utf8') as state_data:
+                json.dump(state, state_data, indent=2, sort_keys=True)
+            replace(temp_path, state_file)
+        except BaseException:
+            remove(temp_path)
+            raise
+
+def _load(state_file: str) -> dict:
+    if not path.exists(state_file):
+        return {}
+    with open(state_file, 'r', encoding='utf8') as state_data:
+        return json.load(state_data)
@@ -0,0 +1,108 @@
+""" Integrity checks of dialog node lists before they are published
+"""
+
+from typing import List
+
+# problems reported in the error, the rest are counted
+_MAX_REPORTED = 10
+
+def _get_dialog_problems(dialog_nodes: List[dict]) -> List[str]:
+    """ Problems with the structure of a list of dialog nodes, found in a
+    fixed number of passes over the list: duplicate ids, parents and
+    previous siblings that are not in the list, siblings of another parent,
+    forks of a sibling chain, nodes that cannot be reached from the root
+    (parent cycles, sibling cycles and their orphans) and jumps to nodes
+    that are not in the list
+
+    parameters:
+    dialog_nodes: list of WCS dialog nodes, in any order
+
+    returns:
+    problems: description of each problem, empty if the list is valid
+    """
+    problems = []
+    nodes = {}
+    for node in dialog_nodes:
+        if node['dialog_node'] in nodes:
+            problems.append("Duplicate dialog node '{}'".format(
+                node['dialog_node']))
+        nodes[node['dialog_node']] = node
+
+    # the first child and the next sibling of every node, which must be
+    # unique for the siblings to form a single chain
+    first_children = {}
+    next_siblings = {}
+    for node_id, node in nodes.items():
+        parent = node.get('parent')
+        previous = node.get('previous_sibling')
+        if parent is not None and parent not in nodes:
+            problems.append("Node '{}' has missing parent '{}'".format(
+                node_id, parent))
+            continue
+        if previous is None:
+            chain, key = first_children, parent
+        elif previous not in nodes:
+            problems.append(
+                "Node '{}' has missing previous sibling '{}'".format(
+                    node_id, previous))
+            continue
+        elif nodes[previous].get('parent') != parent:
+            problems.append(
+                "Node '{}' follows '{}', which has another parent".format(
+                    node_id, previous))
+            continue
+        else:
+            chain, key = next_siblings, previous
+        if key in chain:
+            problems.append("Nodes '{}' and '{}' both follow {}".format(
+                chain[key],
+                node_id,
+                "'{}'".format(previous) if previous is not None \
+                    else "the start of the siblings of {}".format(
+                        "'{}'".format(parent) if parent is not None \
+                            else 'the root')))
+            continue
+        chain[key] = node_id
+
+    # walk the tree from the root, following only the first child and next
+    # sibling links, so every node is visited at most once
+    reached = set()
+    pending = [first_children[None]] if None in first_children else []
+    while pending:
+        node_id = pending.pop()
+        if node_id in reached:
+            continue
+        reached.add(node_id)
+        if node_id in next_siblings:
+            pending.append(next_siblings[node_id])
+        if node_id in first_children:
+            pending.append(first_children[node_id])
+    unreached = [x for x in nodes if x not in reached]
+    if unreached and not problems:
+        problems.append(
+            "{} nodes cannot be reached from the root (cycle or orphans): "
+            "'{}'".format(len(unreached), "', '".join(unreached[:5])))
+
+    for node_id, node in nodes.items():
+        next_step = node.get('next_step') or {}
+        if next_step.get('behavior') == 'jump_to' and \
+                next_step.get('dialog_node') not in nodes:
+            problems.append("Node '{}' jumps to missing node '{}'".format(
+                node_id, next_step.get('dialog_node')))
+    return problems
+
+def _validate_dialog_nodes(dialog_nodes: List[dict]) -> None:
+    """ Raises a ValueError describing the problems with the structure of
+    a list of dialog nodes (see `_get_dialog_problems`), so that a broken
+    dialog fails before it is published
+
+    parameters:
+    dialog_nodes: complete list of WCS dialog nodes for a workspace
+    """
+    problems = _get_dialog_problems(dialog_nodes)
+    if not problems:
+        return
+    message = '\n'.join(problems[:_MAX_REPORTED])
+    if len(problems) > _MAX_REPORTED:
+        message += '\n... and {} more'.format(len(problems) - _MAX_REPORTED)
+    raise ValueError('Invalid dialog nodes:\n' + message)
@@ -0,0 +1,20 @@
+""" Asyncio package
+"""
+from .._lazy import _make_lazy
+
+__all__ = [
+    'copy_dialog_branch',
+    'copy_entities',
+    'copy_entity_data',
+    'copy_intent_data',
+    'copy_intents',
+    'delete_branch_from_csv',
+    'get_and_backup_workspace',
+    'index_workspaces',
+    'load_csv_as_entity_data',
+    'load_csv_as_intent_data',
+    'set_max_workers',
+    'sync_workspace']
+
+# the blocking functions are imported on first use
+_make_lazy(__name__, {name: '._async' for name in __all__})
@@ -0,0 +1,107 @@
+""" Async Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are async variants of the deployment functions,
+with the same parameters and return values:
+
+copy_dialog_branch, delete_branch_from_csv, copy_intent_data,
+copy_intents, load_csv_as_intent_data, copy_entity_data, copy_entities,
+load_csv_as_entity_data, get_and_backup_workspace, sync_workspace and
+index_workspaces
+
+The variants are not a native async client: the WCS SDK only makes blocking
+calls, so each operation runs on a shared pool of worker threads while the
+event loop stays free. At most `set_max_workers` operations (default 64)
+run at the same time, however many are awaited; the rest wait for a
+worker
+
+set_max_workers: Sets how many operations can run at the same time
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from typing import Callable
+
+from .. import dialog, entities, intents, util
+from .._api import _set_cancel_event
+from .._constants import _DEFAULT_AIO_WORKERS
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+def set_max_workers(max_workers: int = _DEFAULT_AIO_WORKERS) -> None:
+    """ Sets how many operations can run at the same time. Operations
+    beyond this wait for a running operation to finish. Calls to each
+    WCS instance are still limited by `util.configure_api`
+
+    parameters:
+    max_workers: maximum number of concurrent operations
+    """
+    global _EXECUTOR # pylint: disable=W0603
+    if max_workers < 1:
+        raise ValueError("Argument 'max_workers' must be at least 1")
+    with _EXECUTOR_LOCK:
+        previous = _EXECUTOR
+        _EXECUTOR = ThreadPoolExecutor(max_workers=max_workers)
+    # running operations are allowed to finish
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR # pylint: disable=W0603
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=_DEFAULT_AIO_WORKERS)
+        return _EXECUTOR
+
+def _run(cancel_event: threading.Event, func: Callable, *args, **kwargs):
+    """ Runs `func` on a worker thread, with WCS calls checking
+    `cancel_event`
+    """
+    _set_cancel_event(cancel_event)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _set_cancel_event(None)
+
+# get_event_loop is deprecated in coroutines, get_running_loop is only
+# available from Python 3.7
+_get_running_loop = getattr(
+    asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+def _make_async(func: Callable) -> Callable:
+    """ Build an async variant of a blocking deployment function. When the
+    awaiting task is cancelled, the operation stops before its next WCS
+    call
+    """
+    @wraps(func)
+    async def _async(*args, **kwargs):
+        cancel_event = threading.Event()
+        future = _get_running_loop().run_in_executor(
+            _get_executor(),
+            partial(_run, cancel_event, func, *args, **kwargs))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+    _async.__doc__ = 'Async variant of `{}`\n\n{}'.format(
+        func.__name__,
+        func.__doc__)
+    return _async
+
+copy_dialog_branch = _make_async(dialog.copy_dialog_branch)
+delete_branch_from_csv = _make_async(dialog.delete_branch_from_csv)
+copy_intent_data = _make_async(intents.copy_intent_data)
+copy_intents = _make_async(intents.copy_intents)
+load_csv_as_intent_data = _make_async(intents.load_csv_as_intent_data)
+copy_entity_data = _make_async(entities.copy_entity_data)
+copy_entities = _make_async(entities.copy_entities)
+load_csv_as_entity_data = _make_async(entities.load_csv_as_entity_data)
+get_and_backup_workspace = _make_async(util.get_and_backup_workspace)
+sync_workspace = _make_async(util.sync_workspace)
+index_workspaces = _make_async(util.index_workspaces)
@@ -0,0 +1,183 @@
+""" Command Line Module
+
+`wcs-deploy` command line entry point. Every public function is a command
+taking its parameters as options, ex.
+
+wcs-deploy copy-intent-data --intent hello --source-workspace ...
+
+`run` executes a manifest of steps (see `util.run_manifest`) in a single
+process, so a deployment of many steps pays startup once and reuses the
+workspace exports it downloads. Steps that do not conflict run in parallel
+and the critical path of the run is reported.
+
+Options can also be set with environment variables named `WCS_` followed
+by the parameter in upper case, ex. WCS_TARGET_PASSWORD
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from contextlib import ExitStack
+from inspect import Parameter, cleandoc, signature
+from typing import Callable, Dict, List, Union
+
+from ._constants import _DEFAULT_MAX_WORKERS
+from .util.instrument import instrument
+from .util.run_manifest import _COMMANDS, _get_command, run_manifest
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """ Runs the `wcs-deploy` command line
+
+    parameters:
+    argv: command line arguments. Default None uses `sys.argv`
+
+    returns:
+    status: exit status, 0 on success
+    """
+    args = vars(_build_parser().parse_args(argv))
+    command = args.pop('command').replace('-', '_')
+    timing_report = args.pop('timing_report')
+
+    try:
+        with ExitStack() as stack:
+            if timing_report is not None:
+                stack.enter_context(instrument(timing_report))
+            if command == 'run':
+                report = run_manifest(**args)
+                for step in report['steps']:
+                    print('{}: {} ({:.2f}s at {:.2f}s)'.format(
+                        step['name'],
+                        step['command'],
+                        step['seconds'],
+                        step['start']))
+                    _print_result(step['result'])
+                print('critical path: {} ({:.2f}s of {:.2f}s)'.format(
+                    ' -> '.join(report['critical_path']),
+                    report['critical_path_seconds'],
+                    report['seconds']))
+            else:
+                _print_result(_get_command(command)(**args))
+    except Exception as err: # pylint: disable=W0703
+        print('wcs-deploy: error: {}'.format(err), file=sys.stderr)
+        return 1
+    return 0
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='wcs-deploy',
+        description='Manage deployments of Watson Conversation workspaces')
+    parser.add_argument(
+        '--timing-report',
+        help='write a JSON timing report to this file')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+
+    run = subparsers.add_parser(
+        'run',
+        help='run a JSON manifest of steps in a single process')
+    run.add_argument('manifest', help='path of the manifest')
+    run.add_argument(
+        '--max-workers',
+        type=int,
+        default=_DEFAULT_MAX_WORKERS,
+        help='maximum number of steps running at the same time')
+
+    for name in _COMMANDS:
+        func = _get_command(name)
+        docs = _get_parameter_docs(func.__doc__)
+        subparser = subparsers.add_parser(
+            name.replace('_', '-'),
+            help=_escape(_get_summary(func.__doc__)))
+        for key, parameter in signature(func).parameters.items():
+            # argparse converts string defaults with `type`
+            default = os.environ.get('WCS_' + key.upper(), parameter.default)
+            subparser.add_argument(
+                '--' + key.replace('_', '-'),
+                dest=key,
+                type=_get_type(parameter),
+                nargs='+' if _is_list(parameter) else None,
+                default=default,
+                help=_escape(docs.get(key, '')))
+    return parser
+
+def _get_summary(doc: str) -> str:
+    """ First paragraph of a docstring, without any example that follows
+    """
+    summary = ' '.join(cleandoc(doc or '').split('\n\n')[0].split())
+    if summary.endswith(' ex:'):
+        summary = summary[:-len(' ex:')]
+    return summary
+
+def _get_parameter_docs(doc: str) -> Dict[str, str]:
+    """ Reads the description of each parameter from the `parameters:`
+    section of a docstring
+    """
+    docs = {}
+    key = None
+    in_parameters = False
+    for line in cleandoc(doc or '').split('\n'):
+        if line.strip() == 'parameters:':
+            in_parameters = True
+            continue
+        if not in_parameters:
+            continue
+        if not line.strip() or line.startswith('returns'):
+            break
+        match = re.match(r'^(\w+): ?(.*)$', line)
+        if match:
+            key = match.group(1)
+            docs[key] = match.group(2)
+        elif key is not None:
+            docs[key] += ' ' + line.strip()
+    return docs
+
+def _escape(text: str) -> str:
+    # argparse formats help with %
+    return text.replace('%', '%%')
+
+def _get_type(parameter: Parameter) -> Callable:
+    """ Option type from the annotation, or the default when there is none.
+    Only the first type of a Union is used, ex. file paths for exports
+    """
+    annotation = parameter.annotation
+    if annotation is Parameter.empty:
+        if parameter.default in (None, Parameter.empty):
+            return str
+        annotation = type(parameter.default)
+    if getattr(annotation, '__origin__', None) is Union:
+        annotation = [x for x in annotation.__args__ if x is not type(None)][0]
+    if annotation is bool:
+        return _parse_bool
+    if annotation in (int, float):
+        return annotation
+    return str
+
+def _is_list(parameter: Parameter) -> bool:
+    """ If the parameter accepts a list, ex. names or patterns to select
+    """
+    types = [parameter.annotation]
+    if getattr(parameter.annotation, '__origin__', None) is Union:
+        types = parameter.annotation.__args__
+    return any(getattr(x, '__origin__', None) in (list, List) for x in types)
+
+def _parse_bool(value: str) -> bool:
+    if value.lower() in ('true', 'yes', '1'):
+        return True
+    if value.lower() in ('false', 'no', '0'):
+        return False
+    raise argparse.ArgumentTypeError(
+        "expected true or false, got '{}'".format(value))
+
+def _print_result(result) -> None:
+    """ Prints text results as they are and data as JSON. Trees are not
+    printed, their text representation is returned with them
+    """
+    if isinstance(result, tuple):
+        for item in result:
+            _print_result(item)
+    elif isinstance(result, str):
+        print(result)
+    elif isinstance(result, (dict, list)):
+        print(json.dumps(result, indent=2, default=str))
@@ -1,7 +1,14 @@
 """ Dialog package
 """
-from .copy_dialog_branch import copy_dialog_branch as copy_dialog_branch
-from .delete_branch_from_csv import delete_branch_from_csv  as delete_branch_from_csv
-from .generate_wcs_diagram import generate_wcs_diagram  as generate_wcs_diagram
+from .._lazy import _make_lazy
 
-__all__ = ['copy_dialog_branch', 'delete_branch_from_csv', 'generate_wcs_diagram']
+__all__ = [
+    'copy_dialog_branch',
+    'delete_branch_from_csv',
+    'find_references',
+    'generate_wcs_diagram',
+    'get_dialog_metrics',
+    'plan_dialog_branch']
+
+# functions are imported from their modules on first use
+_make_lazy(__name__, {name: '.' + name for name in __all__})
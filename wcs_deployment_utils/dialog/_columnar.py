@@ -0,0 +1,218 @@
+""" Columnar representation of a dialog for structural analysis
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# index of the dialog root, and of no node, in the arrays
+_NONE = -1
+# index of a parent, previous sibling or jump target that is not in the list
+_MISSING = -2
+
+class _DialogArrays:
+    """ The structure of a list of dialog nodes as arrays, indexed by the
+    position of each node in the list. Parents, previous siblings and jump
+    targets are indexes (-1 for the root or none, -2 for nodes that are not
+    in the list), so structural queries need no tree of AnyNodes. Children
+    are ordered by their sibling chains like `_sort_child_nodes`, and depths
+    count the root as 0 like AnyNode depths.
+
+    Nodes under a missing parent are orphans: they are not children of the
+    root, as `_build_tree` leaves them out of the tree, and their depths are
+    counted from the missing parent
+    """
+
+    def __init__(self, dialog_nodes: List[dict]):
+        self.ids = [x['dialog_node'] for x in dialog_nodes]
+        index = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        def _get_index(node_id):
+            return index.get(node_id, _MISSING) if node_id is not None \
+                else _NONE
+
+        count = len(dialog_nodes)
+        self.parent = np.fromiter(
+            (_get_index(x.get('parent')) for x in dialog_nodes),
+            dtype=np.int64,
+            count=count)
+        self.previous_sibling = np.fromiter(
+            (_get_index(x.get('previous_sibling')) for x in dialog_nodes),
+            dtype=np.int64,
+            count=count)
+        next_steps = [x.get('next_step') or {} for x in dialog_nodes]
+        self.has_jump = np.fromiter(
+            (x.get('behavior') == 'jump_to' for x in next_steps),
+            dtype=bool,
+            count=count)
+        self.jump_target = np.fromiter(
+            (_get_index(x.get('dialog_node')) if jump else _NONE \
+                for x, jump in zip(next_steps, self.has_jump)),
+            dtype=np.int64,
+            count=count)
+        self.depth, top = _get_depths(self.parent)
+        self.orphan = self.parent[top] == _MISSING if count \
+            else np.zeros(0, dtype=bool)
+        self.subtree_size = _get_subtree_sizes(self.parent, self.depth)
+
+        # children of every node as one array, in sibling order. the
+        # children of node i start at child_offsets[i + 1], those of the
+        # root at 0. nodes off the sibling chain of their parent are left out
+        position = _get_sibling_positions(self.parent, self.previous_sibling)
+        chained = np.flatnonzero((position >= 0) & (self.parent != _MISSING))
+        self.children_order = chained[
+            np.lexsort((position[chained], self.parent[chained]))]
+        self.child_offsets = np.concatenate(([0], np.cumsum(np.bincount(
+            self.parent[chained] + 1, minlength=count + 1))))
+
+    def children(self, node: int = _NONE) -> np.ndarray:
+        """ Indexes of the children of a node in sibling order, default the
+        root
+        """
+        return self.children_order[
+            self.child_offsets[node + 1]:self.child_offsets[node + 2]]
+
+    def fan_out(self) -> np.ndarray:
+        """ Number of children of each node
+        """
+        return np.diff(self.child_offsets)[1:]
+
+def _get_depths(parent: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ Depth of every node by pointer jumping: each round adds the distance
+    to the current ancestor of every node and replaces the ancestor with its
+    own, so the loop runs log2 of the maximum depth times
+
+    parameters:
+    parent: index of the parent of each node, -1 for the root and -2 for a
+        missing parent
+
+    returns:
+    depth: depth of each node, 1 for the children of the root (or of a
+        missing parent)
+    top: index of the highest ancestor of each node, itself included
+    """
+    depth = np.ones(len(parent), dtype=np.int64)
+    top = np.arange(len(parent))
+    ancestor = parent.copy()
+    for _ in range(max(1, len(parent)).bit_length() + 1):
+        pending = np.flatnonzero(ancestor >= 0)
+        if not len(pending):
+            return depth, top
+        depth[pending] += depth[ancestor[pending]]
+        top[pending] = top[ancestor[pending]]
+        ancestor[pending] = ancestor[ancestor[pending]]
+    raise ValueError('Dialog nodes have a parent cycle')
+
+def _get_sibling_positions(
+        parent: np.ndarray,
+        previous_sibling: np.ndarray) -> np.ndarray:
+    """ Position of every node in the sibling chain of its parent, ranked by
+    pointer jumping like `_get_depths`. As in `_sort_child_nodes`, a chain
+    starts at the first node of the parent without a previous sibling and
+    follows the first node of the same parent after each node. Nodes off
+    that chain (missing or forked previous siblings, sibling cycles) get -1
+
+    parameters:
+    parent: index of the parent of each node
+    previous_sibling: index of the previous sibling of each node, -1 for
+        none and -2 for a missing one
+
+    returns:
+    position: position of each node among its siblings, from 0, or -1
+    """
+    count = len(parent)
+    ancestor = np.full(count, _MISSING, dtype=np.int64)
+    # the first node of each parent without a previous sibling
+    heads = np.flatnonzero(previous_sibling == _NONE)
+    _, first = np.unique(parent[heads], return_index=True)
+    ancestor[heads[first]] = _NONE
+    # the first node of the same parent after each node
+    linked = np.flatnonzero(previous_sibling >= 0)
+    linked = linked[parent[previous_sibling[linked]] == parent[linked]]
+    _, first = np.unique(previous_sibling[linked], return_index=True)
+    ancestor[linked[first]] = previous_sibling[linked[first]]
+
+    position = (ancestor >= 0).astype(np.int64)
+    for _ in range(max(1, count).bit_length() + 1):
+        pending = np.flatnonzero(ancestor >= 0)
+        if not len(pending):
+            break
+        position[pending] += position[ancestor[pending]]
+        ancestor[pending] = ancestor[ancestor[pending]]
+    # chains that do not reach a first child are broken or cycles
+    position[ancestor != _NONE] = -1
+    return position
+
+def _get_subtree_sizes(parent: np.ndarray, depth: np.ndarray) -> np.ndarray:
+    """ Number of nodes in the subtree of every node, itself included.
+    Sizes are added to the parents one level at a time, deepest first
+
+    parameters:
+    parent: index of the parent of each node, -1 for the root and -2 for a
+        missing parent
+    depth: depth of each node
+
+    returns:
+    subtree_size: size of the subtree of each node
+    """
+    size = np.ones(len(parent), dtype=np.int64)
+    if not len(parent):
+        return size
+    for level in range(int(depth.max()), 1, -1):
+        nodes = np.flatnonzero(depth == level)
+        np.add.at(size, parent[nodes], size[nodes])
+    return size
+
+def _get_distribution(values: np.ndarray) -> Dict[int, int]:
+    """ Number of occurrences of each value
+    """
+    counts = np.bincount(values) if len(values) else np.array([])
+    return {int(x): int(counts[x]) for x in np.flatnonzero(counts)}
+
+def _get_structure_metrics(arrays: _DialogArrays) -> dict:
+    """ Structural metrics of a dialog, computed with array operations
+
+    parameters:
+    arrays: columnar dialog
+
+    returns:
+    metrics: dict of
+        nodes: number of dialog nodes
+        orphans: number of nodes under a missing parent
+        depth: max, mean and distribution (nodes by depth) of the nodes
+            that are not orphans
+        subtree_size: max and mean, and the size of each top level branch
+        fan_out: max, mean over nodes with children, distribution and the
+            number of leaves
+        jumps: number of jumps, jumps per node and jumps to nodes that are
+            not in the dialog
+    """
+    count = len(arrays.ids)
+    depth = arrays.depth[~arrays.orphan]
+    fan_out = arrays.fan_out()
+    top_level = arrays.children()
+    jumps = int(arrays.has_jump.sum())
+    return {
+        'nodes': count,
+        'orphans': int(arrays.orphan.sum()),
+        'depth': {
+            'max': int(depth.max()) if len(depth) else 0,
+            'mean': float(depth.mean()) if len(depth) else 0.0,
+            'distribution': _get_distribution(depth)},
+        'subtree_size': {
+            'max': int(arrays.subtree_size.max()) if count else 0,
+            'mean': float(arrays.subtree_size.mean()) if count else 0.0,
+            'top_level': {
+                arrays.ids[x]: int(arrays.subtree_size[x]) \
+                    for x in top_level}},
+        'fan_out': {
+            'root': int(len(top_level)),
+            'max': int(fan_out.max()) if count else 0,
+            'mean': float(fan_out[fan_out > 0].mean()) \
+                if (fan_out > 0).any() else 0.0,
+            'distribution': _get_distribution(fan_out),
+            'leaves': int((fan_out == 0).sum())},
+        'jumps': {
+            'count': jumps,
+            'density': jumps / count if count else 0.0,
+            'missing': int((arrays.jump_target == _MISSING).sum())}}
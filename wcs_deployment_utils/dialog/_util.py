@@ -1,38 +1,56 @@
 """ Utility functions for dialog package
 """
 
-from queue import Queue
+from collections import deque
 from copy import deepcopy
-from typing import List, Union
+from hashlib import sha1
+import json
+import re
+from typing import Dict, Iterator, List, TextIO, Union
 from types import FunctionType
 from warnings import warn
+from xml.sax.saxutils import escape, quoteattr
 
-import requests
 import anytree
 from anytree import AnyNode
 from anytree.iterators.levelorderiter import LevelOrderIter
+from anytree.iterators.postorderiter import PostOrderIter
+from anytree.iterators.preorderiter import PreOrderIter
 
-from .._constants import _BASE_WCS_ENDPOINT
+from .._api import _request
+from .._constants import _AUDIT_KEYS, _BASE_WCS_ENDPOINT
+from .._instrumentation import _span
+from .._validation import _validate_dialog_nodes
 
 # TREE BUILDING FUNCTIONS
 # WCS Exports -> AnyTree instances
 
-def _build_tree(nodes: List[dict], root: AnyNode) -> None:
+def _build_tree(
+        nodes: List[dict],
+        root: AnyNode) -> Dict[Union[str, None], AnyNode]:
     """ Build a tree from a list of dialog nodes from a WCS export beginning
     from root
 
     parameters:
     nodes: list of dialog nodes from a WCS workspace export
     root: root node for tree
+
+    returns:
+    nodes_by_id: every tree node by id, the root under its id (None)
     """
-    parents = Queue()
-    parents.put(root)
+    # index the children of every node once, in export order
+    children_by_parent = {}
+    for node in nodes:
+        children_by_parent.setdefault(node['parent'], []).append(node)
+
+    nodes_by_id = {root.id: root}
+    parents = deque([root])
 
-    while not parents.empty():
+    while parents:
         # get our parent
-        parent = parents.get()
+        parent = parents.popleft()
         # find their children from the array returned from WCS
-        children = _find_children(parent.id, nodes)
+        children = children_by_parent.get(parent.id, [])
         for child in children:
             # add the children and then add them to the parents queue
             if child['title'] is not None:
@@ -46,13 +64,14 @@ def _build_tree(nodes: List[dict], root: AnyNode) -> None:
                     desc = child['type'] + ' - ' + child['conditions']
                 else:
                     desc = child['type']
-            parents.put(
-                AnyNode(parent=parent,
-                        id=child['dialog_node'],
-                        title=child['title'],
-                        node=child,
-                        desc=desc)
-            )
+            tree_node = AnyNode(parent=parent,
+                                id=child['dialog_node'],
+                                title=child['title'],
+                                node=child,
+                                desc=desc)
+            nodes_by_id[tree_node.id] = tree_node
+            parents.append(tree_node)
+    return nodes_by_id
 
 def _find_first_node(dialog_nodes: List[dict]) -> dict:
     """ Find the first node evaluated in a WCS dialog flow (first child of
@@ -96,44 +115,61 @@ def _insert_into_target_tree(
         source_root: AnyNode,
         target_node: AnyNode,
         target_tree_root: AnyNode,
-        insert_type: str) -> None: # Dict[str, dict]:
+        insert_type: str,
+        nodes_by_id: Union[Dict[Union[str, None], AnyNode], None] = None,
+        changed: Union[List[AnyNode], None] = None) -> AnyNode:
     """ Inserts the source root at the target root by insert type
 
     parameters:
     source_root: Tree node to copy into target
     target_node: Insert source at this node
     target_tree_root: root node for target
-    target_tree: dict of nodes from the target (to validate relationships)
     insert_type: 'child', 'sibling', 'last_child' insert method
+    nodes_by_id: index of the target tree from `_build_tree`, kept up to
+        date as nodes are removed and inserted. built if not provided
+    changed: list extended with the target nodes whose content or children
+        the insert changes, not including the inserted copy
 
 
     Returns:
-    inserted_nodes: dict of inserted nodes as dict['id'] = node
+    source_copy: the inserted copy of the source root
     """
+    if nodes_by_id is None:
+        nodes_by_id = {x.id: x for x in PreOrderIter(target_tree_root)}
+    if changed is None:
+        changed = []
+
     # remove any prior references to the id
     for node in LevelOrderIter(source_root):
         # can't remove the root node
         if node.id is None:
             continue
-        existing = _get_all_matches(target_tree_root, node.id)
-        for ex in existing:
-            previous_sibling = _get_previous_sibling(ex)
-            next_sibling = _get_next_sibling(ex)
-            ex.parent = None
-            # if there's no next sibling, nothing to update
-            if not next_sibling:
-                continue
-            # removed node was a first child
-            if previous_sibling is None:
-                next_sibling.node['previous_sibling'] = None
-            else:
-                next_sibling.node['previous_sibling'] = \
-                    previous_sibling.id
+        ex = nodes_by_id.get(node.id)
+        if ex is None:
+            continue
+        previous_sibling = _get_previous_sibling(ex)
+        next_sibling = _get_next_sibling(ex)
+        changed.append(ex.parent)
+        ex.parent = None
+        # the whole subtree leaves the target tree
+        for removed in PreOrderIter(ex):
+            if nodes_by_id.get(removed.id) is removed:
+                del nodes_by_id[removed.id]
+        # if there's no next sibling, nothing to update
+        if not next_sibling:
+            continue
+        # removed node was a first child
+        changed.append(next_sibling)
+        if previous_sibling is None:
+            next_sibling.node['previous_sibling'] = None
+        else:
+            next_sibling.node['previous_sibling'] = \
+                previous_sibling.id
 
     # verify that we have not removed the target node by nature of clearing
     # out colliding nodes
 
-    if not _get_all_matches(target_tree_root, target_node.id):
+    if nodes_by_id.get(target_node.id) is not target_node:
         raise RuntimeError("""target node has been removed
                               when pruning source collisions""")
 
@@ -194,6 +230,13 @@ def _insert_into_target_tree(
         source_copy.node['previous_sibling'] = \
             target_node.id
 
+    changed.append(source_copy.parent)
+    if displaced is not None:
+        changed.append(displaced)
+    for inserted in PreOrderIter(source_copy):
+        nodes_by_id[inserted.id] = inserted
+    return source_copy
+
 def _get_matcher_function(identifier: str, id_only: bool = True) -> FunctionType:
     """ Returns a function that will match nodes on a given identifier
     Depending on the node configuration, it will match on id and if present,
@@ -234,10 +277,11 @@ def _get_nodes_with_jump(node: AnyNode) -> bool:
     Returns:
     has_jump: boolean if the node has a jump
     """
-    if 'node' not in dir(node):
+    dialog_node = getattr(node, 'node', None)
+    if dialog_node is None:
         return False
-    if (node.node['next_step'] is not None and
-            node.node['next_step']['behavior'] == 'jump_to'):
+    if (dialog_node['next_step'] is not None and
+            dialog_node['next_step']['behavior'] == 'jump_to'):
         return True
     return False
 
@@ -359,38 +403,32 @@ def _get_branch_node(root_node: AnyNode, identifier: Union[str, None], name: str
     # we only have one value for these branches
     return branch_node[0]
 
-def _get_all_matches(root_node: AnyNode, identifier: Union[str, None]) -> List[AnyNode]:
-    """ get all nodes matching a specified id. should only match one node at a time if
-    ids are maintained as unique
-
-    parameters:
-    root_node: the root node to search from
-    identifier: the id to match on
-
-    returns:
-    matched_nodes: the nodes matching the criteria
-    """
-    matched_nodes = anytree.search.findall(
-        root_node,
-        filter_=_get_matcher_function(identifier))
-
-    # we only have one value for these branches
-    return matched_nodes
-
 def _sort_child_nodes(children: List[AnyNode]) -> List[AnyNode]:
-    """ sorts a list of child nodes in the proper order per WCS standards
+    """ sorts a list of child nodes in the proper order per WCS standards.
+    runs in linear time by indexing the siblings by previous sibling
 
     params:
     children: list of child nodes
     """
-    ordered = []
     if not children:
         return []
-    else:
-        child = _get_first_child(children[0].parent)
-    while child is not None:
+
+    parent_id = children[0].parent.id
+    child = None
+    next_siblings = {}
+    for sibling in children:
+        if sibling.node['previous_sibling'] is None:
+            if child is None and sibling.node['parent'] == parent_id:
+                child = sibling
+        else:
+            next_siblings.setdefault(sibling.node['previous_sibling'], sibling)
+
+    ordered = []
+    visited = set()
+    while child is not None and child.id not in visited:
+        visited.add(child.id)
         ordered.append(child)
-        child = _get_next_sibling(child)
+        child = next_siblings.get(child.id)
     return ordered
 
 # NODE UTILITIES
@@ -460,6 +498,634 @@ def _is_matching_node(
         return (node['dialog_node'].lower() == identifier.lower() or
                 node['title'].lower() == identifier.lower())
 
+# PROJECTION FUNCTIONS
+# Applying a branch copy to a target tree in memory
+
+def _project_branch_copy(
+        source_dialog_nodes: List[dict],
+        target_dialog_nodes: List[dict],
+        root_node: str,
+        target_node: Union[str, None],
+        insert_type: str,
+        copied: Union[List[AnyNode], None] = None,
+        hashes: Union[dict, None] = None) -> AnyNode:
+    """ Builds the source and target trees and inserts a copy of the source
+    branch (and any nodes it jumps to) into the target tree. Nothing is
+    written to the service.
+
+    parameters:
+    source_dialog_nodes: list of dialog nodes from the source export
+    target_dialog_nodes: list of dialog nodes from the target export. nodes
+        are updated in place as the branch is inserted
+    root_node: ID or title of the root node in source
+    target_node: ID or title of the root node in target (None for root)
+    insert_type: 'child', 'sibling', 'last_child' insert method
+    copied: list extended with the root of each inserted copy. a copy
+        replaced by a later, larger copy is left outside the target tree
+    hashes: dict filled with the subtree hashes (see `_hash_subtrees`) of
+        the target tree before the copy ('original') and after it
+        ('projected'). after the copy only the inserted subtrees and the
+        paths from the changed nodes to the root are hashed
+
+    returns:
+    target_nodes: the root node of the projected target tree
+    """
+    if copied is None:
+        copied = []
+    changed = []
+
+    # we will need to walk up the trees
+    tree_walker = anytree.walker.Walker()
+
+    # build tree roots
+    source_nodes = AnyNode(id=None, title=None, desc='root')
+    target_nodes = AnyNode(id=None, title=None, desc='root')
+
+    # build our trees, with an index of each by id so that collisions and
+    # jumps are resolved without searching the trees
+    with _span('tree_build'):
+        source_by_id = _build_tree(source_dialog_nodes, source_nodes)
+        target_by_id = _build_tree(target_dialog_nodes, target_nodes)
+
+    # the target nodes are changed in place, so hash them first
+    if hashes is not None:
+        with _span('hashing'):
+            hashes['original'] = _hash_subtrees(target_nodes)
+
+    # we only have one value for these branches
+    source_branch = _get_branch_node(source_nodes, root_node, 'source')
+    target_branch = _get_branch_node(target_nodes, target_node, 'target')
+
+    # we need to have ensure branches in order to insert
+    if source_branch is None:
+        raise RuntimeError('No matching root node found in source')
+    if target_branch is None:
+        raise RuntimeError('No target node found in target')
+
+    # insert a copy of the source branch into the target tree
+    with _span('insert'):
+        copied.append(_insert_into_target_tree(
+            source_branch,
+            target_branch,
+            target_nodes,
+            insert_type,
+            target_by_id,
+            changed))
+
+    with _span('jump_resolution'):
+        # check for any jumps, these will need to be accounted for
+        nodes_with_jumps = anytree.search.findall(
+            source_branch,
+            filter_=_get_nodes_with_jump)
+
+        # this is the set of nodes that jumped to
+        to_jump_to = [x.node['next_step']['dialog_node'] \
+            for x in nodes_with_jumps]
+
+        # make sure that we have a valid destination for the jump
+        # if not, we will insert at the first common ancestor
+        for jump_id in to_jump_to:
+            # destination exists, move on
+            if jump_id in target_by_id:
+                continue
+
+            # we need to find the common ancestor
+            source_branch = source_by_id.get(jump_id)
+
+            if source_branch is None:
+                raise RuntimeError('No matching jump node found in source')
+
+            ancestors, _, _ = tree_walker.walk(source_branch, source_nodes)
+
+            # assume we need to insert at the root (the last ancestor as we
+            # walk up the tree)
+            common_ancestor = ancestors[-1]
+            for node in ancestors:
+                # otherwise, if we have found a common ancestor, we can
+                # insert at that point
+                if node.id in target_by_id:
+                    common_ancestor = node
+                    continue
+
+            # set our insert point
+            target_branch = target_nodes
+            if common_ancestor.parent.id is not None:
+                target_branch = target_by_id.get(common_ancestor.id)
+
+            # insert the jump to information
+            # will always be done as last child
+            copied.append(_insert_into_target_tree(
+                common_ancestor,
+                target_branch,
+                target_nodes,
+                'last_child',
+                target_by_id,
+                changed))
+
+            # find any new jumps
+            nodes_with_jumps = anytree.search.findall(
+                common_ancestor,
+                filter_=_get_nodes_with_jump)
+
+            # add these new jumps to be checked
+            for node in nodes_with_jumps:
+                to_jump_to.append(node.node['next_step']['dialog_node'])
+
+        # for rendering, let's update the desc fields with titles of the jump
+        _label_jumps(target_nodes)
+
+    if hashes is not None:
+        with _span('hashing'):
+            hashes['projected'] = _update_subtree_hashes(
+                hashes['original'],
+                target_nodes,
+                changed,
+                copied)
+
+    return target_nodes
+
+def _label_jumps(root_node: AnyNode) -> None:
+    """ Appends the description of the jump destination to the description
+    of every node with a jump
+
+    parameters:
+    root_node: root of the tree to label
+    """
+    # index the nodes by id in a single pass
+    nodes_by_id = {}
+    nodes_with_jumps = []
+    for node in PreOrderIter(root_node):
+        nodes_by_id.setdefault(node.id, []).append(node)
+        if _get_nodes_with_jump(node):
+            nodes_with_jumps.append(node)
+
+    # update the descriptions
+    for node in nodes_with_jumps:
+        dest = nodes_by_id.get(node.node['next_step']['dialog_node'], [])
+        if len(dest) == 1:
+            node.desc = node.desc + ' (jumps to: {})'.format(dest[0].desc)
+
+def _get_change_set(
+        original_nodes: List[dict],
+        projected_nodes: List[dict]) -> Dict[str, List[str]]:
+    """ Compares the dialog nodes of a workspace before and after a
+    projected change
+
+    parameters:
+    original_nodes: list of dialog nodes before the change
+    projected_nodes: list of dialog nodes after the change
+
+    returns:
+    change_set: dict of dialog node ids by type of change
+        added: nodes that only exist in the projection
+        removed: nodes that no longer exist in the projection
+        moved: nodes with a new parent or previous sibling
+        modified: nodes with any other changed content
+    """
+    original = {x['dialog_node']: x for x in original_nodes}
+    projected = {x['dialog_node']: x for x in projected_nodes}
+    position_keys = ['parent', 'previous_sibling']
+
+    change_set = {
+        'added': [x for x in projected if x not in original],
+        'removed': [x for x in original if x not in projected],
+        'moved': [],
+        'modified': []}
+
+    for node_id, node in projected.items():
+        if node_id not in original:
+            continue
+        existing = original[node_id]
+        if any(node.get(x) != existing.get(x) for x in position_keys):
+            change_set['moved'].append(node_id)
+        content = {k: v for k, v in node.items() if k not in position_keys}
+        existing_content = {k: v for k, v in existing.items() \
+            if k not in position_keys}
+        if content != existing_content:
+            change_set['modified'].append(node_id)
+
+    return change_set
+
+def _render_tree(root_node: AnyNode, max_depth: Union[int, None] = None) -> str:
+    """ Renders a tree as text, with children in WCS evaluation order
+
+    parameters:
+    root_node: root of the tree to render
+    max_depth: only render nodes up to this many levels below root_node
+
+    returns:
+    rendering: string representation of the tree
+    """
+    with _span('render'):
+        return '\n'.join(_iter_rendered_lines(root_node, max_depth))
+
+def _iter_rendered_lines(
+        root_node: AnyNode,
+        max_depth: Union[int, None] = None) -> Iterator[str]:
+    """ Yields the lines of a text rendering of a tree, with children in WCS
+    evaluation order. Each node is visited once, so lines can be streamed
+    to a file without building the rendering in memory
+
+    root
+    ├── child
+    │   └── grandchild
+    └── child
+
+    parameters:
+    root_node: root of the tree to render
+    max_depth: only render nodes up to this many levels below root_node
+
+    returns:
+    lines: generator of the lines of the rendering
+    """
+    # stack of (node, depth, prefix of the node, prefix of its children)
+    stack = [(root_node, 0, '', '')]
+    while stack:
+        node, depth, prefix, fill = stack.pop()
+        lines = str(node.desc).splitlines() or ['']
+        yield prefix + lines[0]
+        for line in lines[1:]:
+            yield fill + line
+
+        if max_depth is not None and depth >= max_depth:
+            continue
+        children = _sort_child_nodes(node.children)
+        # push in reverse so that the first child is rendered first
+        for index in range(len(children) - 1, -1, -1):
+            if index == len(children) - 1:
+                stack.append(
+                    (children[index], depth + 1, fill + '└── ', fill + '    '))
+            else:
+                stack.append(
+                    (children[index], depth + 1, fill + '├── ', fill + '│   '))
+
+def _write_lines(output_file: TextIO, lines: Iterator[str]) -> None:
+    """ Writes each line to the file, separated by newlines
+
+    parameters:
+    output_file: open text file
+    lines: lines to write
+    """
+    for index, line in enumerate(lines):
+        if index:
+            output_file.write('\n')
+        output_file.write(line)
+
+# GRAPH EXPORT FUNCTIONS
+# Machine readable representations of a tree
+
+_GRAPH_FORMATS = ['dot', 'graphml', 'json']
+
+def _iter_ordered_nodes(
+        root_node: AnyNode,
+        max_depth: Union[int, None] = None) -> Iterator[AnyNode]:
+    """ Yields the nodes of a tree in pre-order, with children in WCS
+    evaluation order. The root of a branch is yielded, the root of the
+    whole tree (which is not a dialog node) is not. Depths are counted like
+    `_iter_rendered_lines`
+
+    parameters:
+    root_node: root of the tree or of a branch
+    max_depth: only yield nodes up to this many levels below root_node
+
+    returns:
+    nodes: generator of tree nodes
+    """
+    stack = [(root_node, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if node.id is not None:
+            yield node
+        if max_depth is not None and depth >= max_depth:
+            continue
+        for child in reversed(_sort_child_nodes(node.children)):
+            stack.append((child, depth + 1))
+
+def _get_graph(
+        root_node: AnyNode,
+        max_depth: Union[int, None] = None) -> Dict[str, list]:
+    """ Collects the nodes and the child, sibling and jump edges of a tree in
+    a single pass. Only edges between included nodes are kept, so jumps out
+    of a branch or beyond max_depth are left out
+
+    parameters:
+    root_node: root of the tree or of a branch
+    max_depth: only include nodes up to this many levels below root_node
+
+    returns:
+    graph: dict of
+        nodes: list of dicts with id, title, type, conditions and desc
+        edges: list of (source id, target id, edge type) tuples where edge
+            type is one of 'child', 'sibling' or 'jump_to'
+    """
+    nodes = list(_iter_ordered_nodes(root_node, max_depth))
+    included = set(x.id for x in nodes)
+
+    graph = {'nodes': [], 'edges': []}
+    for node in nodes:
+        dialog_node = node.node
+        graph['nodes'].append({
+            'id': node.id,
+            'title': dialog_node.get('title'),
+            'type': dialog_node.get('type'),
+            'conditions': dialog_node.get('conditions'),
+            'desc': node.desc})
+        if dialog_node['parent'] in included:
+            graph['edges'].append((dialog_node['parent'], node.id, 'child'))
+        if dialog_node['previous_sibling'] in included:
+            graph['edges'].append(
+                (dialog_node['previous_sibling'], node.id, 'sibling'))
+        if _get_nodes_with_jump(node) and \
+                dialog_node['next_step']['dialog_node'] in included:
+            graph['edges'].append(
+                (node.id, dialog_node['next_step']['dialog_node'], 'jump_to'))
+    return graph
+
+def _iter_graph_lines(
+        root_node: AnyNode,
+        output_format: str,
+        max_depth: Union[int, None] = None) -> Iterator[str]:
+    """ Yields a tree as DOT, GraphML or compact JSON adjacency lists
+
+    parameters:
+    root_node: root of the tree or of a branch
+    output_format: one of 'dot', 'graphml' or 'json'
+    max_depth: only include nodes up to this many levels below root_node
+
+    returns:
+    lines: generator of the lines of the graph
+    """
+    graph = _get_graph(root_node, max_depth)
+
+    if output_format == 'json':
+        adjacency = {'nodes': {}, 'roots': [], 'children': {},
+                     'next_sibling': {}, 'jump_to': {}}
+        children = set()
+        for node in graph['nodes']:
+            adjacency['nodes'][node['id']] = {
+                key: value for key, value in node.items() if key != 'id'}
+        for source, target, edge_type in graph['edges']:
+            if edge_type == 'child':
+                adjacency['children'].setdefault(source, []).append(target)
+                children.add(target)
+            elif edge_type == 'sibling':
+                adjacency['next_sibling'][source] = target
+            else:
+                adjacency['jump_to'][source] = target
+        # top level nodes in evaluation order
+        adjacency['roots'] = [x['id'] for x in graph['nodes'] \
+            if x['id'] not in children]
+        yield json.dumps(adjacency, separators=(',', ':'))
+
+    elif output_format == 'dot':
+        def quote(value): # pylint: disable=C0111
+            return '"{}"'.format(
+                str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        styles = {
+            'child': '',
+            'sibling': ', style=dashed',
+            'jump_to': ', style=bold, color=blue'}
+        yield 'digraph dialog {'
+        for node in graph['nodes']:
+            yield '  {} [label={}];'.format(
+                quote(node['id']), quote(node['desc']))
+        for source, target, edge_type in graph['edges']:
+            yield '  {} -> {} [type={}{}];'.format(
+                quote(source), quote(target), edge_type, styles[edge_type])
+        yield '}'
+
+    elif output_format == 'graphml':
+        yield '<?xml version="1.0" encoding="UTF-8"?>'
+        yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">'
+        for key in ['title', 'type', 'conditions', 'desc']:
+            yield ('  <key id="{0}" for="node" attr.name="{0}" '
+                   'attr.type="string"/>').format(key)
+        yield ('  <key id="edge_type" for="edge" attr.name="type" '
+               'attr.type="string"/>')
+        yield '  <graph id="dialog" edgedefault="directed">'
+        for node in graph['nodes']:
+            yield '    <node id={}>'.format(quoteattr(node['id']))
+            for key in ['title', 'type', 'conditions', 'desc']:
+                if node[key] is not None:
+                    yield '      <data key="{}">{}</data>'.format(
+                        key, escape(str(node[key])))
+            yield '    </node>'
+        for source, target, edge_type in graph['edges']:
+            yield ('    <edge source={} target={}><data key="edge_type">'
+                   '{}</data></edge>').format(
+                       quoteattr(source), quoteattr(target), edge_type)
+        yield '  </graph>'
+        yield '</graphml>'
+
+    else:
+        raise ValueError('output_format must be one of {}'.format(
+            ', '.join(_GRAPH_FORMATS)))
+
+# SUBTREE HASHING FUNCTIONS
+# Content hashes to detect unchanged branches
+
+def _hash_dialog_node(dialog_node: dict) -> str:
+    """ Returns a content hash of a single dialog node
+
+    parameters:
+    dialog_node: WCS dialog node
+
+    returns:
+    node_hash: hex digest of the node content
+    """
+    content = {key: value for key, value in dialog_node.items() \
+        if key not in _AUDIT_KEYS}
+    return sha1(json.dumps(
+        content,
+        sort_keys=True,
+        separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def _hash_subtrees(root_node: AnyNode) -> Dict[Union[str, None], dict]:
+    """ Computes a hash of every subtree, bottom up, in a single pass. Two
+    subtrees with the same hash have the same content and the same shape
+
+    parameters:
+    root_node: root of the tree to hash
+
+    returns:
+    hashes: dict of node id (None for root) to a dict of
+        subtree: hash of the node and all its descendants, in order
+        node: hash of the node content alone
+        children: ids of the children in WCS evaluation order
+    """
+    hashes = {}
+    for node in PostOrderIter(root_node):
+        hashes[node.id] = _hash_subtree_node(node, hashes)
+    return hashes
+
+def _hash_subtree_node(
+        node: AnyNode,
+        hashes: Dict[Union[str, None], dict]) -> dict:
+    """ Hashes of a single node of a tree, given the hashes of its
+    children (see `_hash_subtrees`)
+    """
+    ordered = _sort_child_nodes(node.children)
+    # children outside of the sibling chain are still content
+    if len(ordered) != len(node.children):
+        included = set(x.id for x in ordered)
+        ordered = ordered + sorted(
+            [x for x in node.children if x.id not in included],
+            key=lambda x: x.id)
+    children = [x.id for x in ordered]
+
+    if node.id is None:
+        node_hash = ''
+    else:
+        node_hash = _hash_dialog_node(node.node)
+
+    subtree = sha1(node_hash.encode('utf-8'))
+    for child_id in children:
+        subtree.update(hashes[child_id]['subtree'].encode('utf-8'))
+
+    return {
+        'subtree': subtree.hexdigest(),
+        'node': node_hash,
+        'children': children}
+
+def _update_subtree_hashes(
+        hashes: Dict[Union[str, None], dict],
+        root_node: AnyNode,
+        changed: List[AnyNode],
+        inserted: List[AnyNode]) -> Dict[Union[str, None], dict]:
+    """ Subtree hashes of a tree after some of its nodes changed, reusing
+    the hashes of every unchanged subtree. Only the inserted subtrees and
+    the paths from the changed nodes up to the root are hashed
+
+    parameters:
+    hashes: subtree hashes of the tree before the change. not modified
+    root_node: root of the changed tree
+    changed: nodes whose content or children changed. nodes no longer in
+        the tree are ignored
+    inserted: roots of the subtrees inserted into the tree
+
+    returns:
+    hashes: subtree hashes of the changed tree. entries of removed nodes
+        are left in place
+    """
+    hashes = dict(hashes)
+    dirty = {}
+    for node in inserted:
+        if node.root is not root_node:
+            continue
+        for inserted_node in PostOrderIter(node):
+            hashes[inserted_node.id] = _hash_subtree_node(
+                inserted_node,
+                hashes)
+        changed = changed + [node.parent]
+
+    # every ancestor of a changed node changes too
+    for node in changed:
+        if node is None or node.root is not root_node:
+            continue
+        while node is not None and id(node) not in dirty:
+            dirty[id(node)] = node
+            node = node.parent
+
+    # children before their parents
+    for node in sorted(dirty.values(), key=lambda x: x.depth, reverse=True):
+        hashes[node.id] = _hash_subtree_node(node, hashes)
+    return hashes
+
+def _get_changed_subtrees(
+        original: Dict[Union[str, None], dict],
+        projected: Dict[Union[str, None], dict]) -> List[Union[str, None]]:
+    """ Compares two sets of subtree hashes from the root down, only
+    descending into subtrees whose hashes differ
+
+    parameters:
+    original: subtree hashes of the original tree
+    projected: subtree hashes of the changed tree
+
+    returns:
+    changed: ids of the highest nodes (None for root) whose content,
+        children or child order differ. new nodes are reported as the root
+        of their branch. removed nodes are reported through their parent
+    """
+    changed = []
+    to_visit = [None]
+    while to_visit:
+        node_id = to_visit.pop()
+        current = projected[node_id]
+        existing = original.get(node_id)
+        if existing is not None and existing['subtree'] == current['subtree']:
+            continue
+        if existing is None:
+            changed.append(node_id)
+            continue
+        if (existing['node'] != current['node'] or
+                existing['children'] != current['children']):
+            changed.append(node_id)
+        to_visit.extend(reversed(current['children']))
+    return changed
+
+# CONDITION REFERENCE FUNCTIONS
+# Intents, entities and context variables used by node conditions
+
+# string literals in a condition are not references
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+
+# shorthand references: #intent, @entity, @entity:value,
+# @entity:(value with spaces) and $context
+_REFERENCE = re.compile(
+    r'(?<![\w.$@#])(?:'
+    r'#([\w\-.]*[\w\-])|'
+    r'@([\w\-]+)(?::(?:\(([^)]*)\)|([\w\-.]*[\w\-])))?|'
+    r'\$(\w+))')
+
+def _get_condition_references(conditions: Union[str, None]) -> List[str]:
+    """ Tokenizes a condition into the intents, entities, entity values and
+    context variables it references, written as in conditions ('#intent',
+    '@entity', '@entity:value' and '$variable'). A reference to an entity
+    value is also a reference to its entity
+
+    parameters:
+    conditions: condition of a dialog node
+
+    returns:
+    references: references in the order they appear, without duplicates
+    """
+    if not conditions:
+        return []
+    references = {}
+    for match in _REFERENCE.finditer(_STRING_LITERAL.sub('', conditions)):
+        intent, entity, spaced_value, value, variable = match.groups()
+        if intent is not None:
+            references['#' + intent] = None
+        elif entity is not None:
+            value = spaced_value if spaced_value is not None else value
+            if value is not None:
+                references['@{}:{}'.format(entity, value.strip())] = None
+            references['@' + entity] = None
+        else:
+            references['$' + variable] = None
+    return list(references)
+
+def _index_references(root_node: AnyNode) -> Dict[str, List[str]]:
+    """ Builds an inverted index of the references in the conditions of
+    every node below `root_node`, in a single pass over the tree
+
+    parameters:
+    root_node: root of a tree from `_build_tree`
+
+    returns:
+    references: dict of reference (see `_get_condition_references`) to the
+        ids of the nodes whose conditions use it, in tree order
+    """
+    references = {}
+    for node in PreOrderIter(root_node):
+        dialog_node = getattr(node, 'node', None)
+        if dialog_node is None:
+            continue
+        for reference in _get_condition_references(
+                dialog_node.get('conditions')):
+            references.setdefault(reference, []).append(node.id)
+    return references
+
 # WCS API UTILITIES
 # Utilities to interact with WCS service
 
@@ -468,7 +1134,8 @@ def _update_workspace(
         password: str,
         workspace: str,
         dialog_nodes: List[dict]) -> None:
-    """ Updates the target workspace with the list of dialog nodes
+    """ Updates the target workspace with the list of dialog nodes. The
+    nodes are validated first, so a broken dialog is never sent
 
     parameters:
     username: WCS username
@@ -477,15 +1144,19 @@ def _update_workspace(
     dialog_nodes: list of WCS dialog nodes
 
     """
-    res = requests.request(
-        "POST",
-        _BASE_WCS_ENDPOINT + "workspaces/{}".format(workspace),
-        params={
-            "version": "2017-05-26",
-            "append": "false"},
-        json={
-            "dialog_nodes": dialog_nodes},
-        auth=(username, password))
+    with _span('validation'):
+        _validate_dialog_nodes(dialog_nodes)
+
+    with _span('publish'):
+        res = _request(
+            "POST",
+            _BASE_WCS_ENDPOINT + "workspaces/{}".format(workspace),
+            params={
+                "version": "2017-05-26",
+                "append": "false"},
+            json={
+                "dialog_nodes": dialog_nodes},
+            auth=(username, password))
 
     if not res.ok:
         print(res.text)
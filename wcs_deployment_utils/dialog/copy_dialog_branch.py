@@ -10,21 +10,24 @@ copy_dialog_data: Copy dialog nodes from a source WCS workspace to a
 """
 
 from datetime import datetime
-from typing import Tuple
+from functools import partial
+from typing import List, Tuple, Union
 
 import anytree
 from anytree.iterators.levelorderiter import LevelOrderIter
 
-from .._constants import _DEFAULT_BACKUP_FILE
+from .._api import _get_conversation, _map_concurrently
+from .._constants import _DEFAULT_BACKUP_FILE, _DEFAULT_MAX_WORKERS
+from .._instrumentation import _span
+from ..entities._util import _get_export_values, _load_entity_data
+from ..intents._util import _load_intent_data
 from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
 from ._util import (
-    _build_tree,
-    _get_branch_node,
-    _insert_into_target_tree,
-    _get_all_matches,
-    _get_nodes_with_jump,
-    _get_matcher_function,
-    _sort_child_nodes,
+    _get_changed_subtrees,
+    _index_references,
+    _project_branch_copy,
+    _render_tree,
     _update_workspace
     )
 
@@ -39,12 +42,22 @@ def copy_dialog_branch(
         target_password: str = '',
         target_workspace: str = '',
         version: str = '',
-        target_backup_file: str = _DEFAULT_BACKUP_FILE) -> \
+        target_backup_file: str = _DEFAULT_BACKUP_FILE,
+        source_export: Union[str, dict, None] = None,
+        copy_references: bool = False,
+        max_workers: int = _DEFAULT_MAX_WORKERS) -> \
             Tuple[anytree.AnyNode, str]:
     """ Copy a dialog branch (and any jumps) to a target workspace at
     `target_node` using `target_insert_as` strategy (child, last_child,
     or sibling). Writes a backup of the target workspace to
-    `target_backup_file`
+    `target_backup_file`. If the target already contains an identical
+    copy of the branch, the target workspace is not updated, otherwise the
+    highest subtrees that differ are printed. With
+    `copy_references`, the intents and entities used by the conditions of
+    the copied nodes are copied too, when they are missing from the target
+    or lack some of the examples, values or synonyms of the source. Like
+    `copy_entity_data`, only synonyms values are compared and copied,
+    pattern values are not
 
     Root
     |
@@ -76,6 +89,12 @@ def copy_dialog_branch(
     target_workspace: Workspace ID for target WCS instance
     version: WCS API version
     target_backup_file: write a backup of target workspace to this file
+    source_export: export of the source workspace (dict or file path). if
+        provided, the source credentials are not required
+    copy_references: also copy the intents and entities used by the
+        copied nodes, from the same source export and with the same backup
+    max_workers: copy_references only, number of intents and entities
+        copied at the same time
 
     returns:
     target_nodes: the root node of the projected target tree
@@ -84,19 +103,22 @@ def copy_dialog_branch(
 
     #validate that values are provided
     args = locals()
-    for key in [
-            'root_node',
-            'target_node',
-            'target_insert_as',
+    required = [
+        'root_node',
+        'target_node',
+        'target_insert_as',
+        'target_username',
+        'target_password',
+        'target_workspace',
+        'version',
+        'target_backup_file']
+    if source_export is None:
+        required += [
             'source_username',
             'source_password',
-            'source_workspace',
-            'target_username',
-            'target_password',
-            'target_workspace',
-            'version',
-            'target_backup_file']:
-        if args[key] is '':
+            'source_workspace']
+    for key in required:
+        if args[key] == '':
             raise ValueError("Argument '{}' requires a value".format(key))
 
     # can't copy the entire root
@@ -119,138 +141,184 @@ def copy_dialog_branch(
     if target_node == 'root':
         target_node = None
 
-    # we will need to walk up the trees
-    tree_walker = anytree.walker.Walker()
-
     # get export of workspaces
-    source_export = get_and_backup_workspace(
-        username=source_username,
-        password=source_password,
-        version=version,
-        workspace=source_workspace,
-        export_path=target_backup_file)
+    if source_export is None:
+        source_export = get_and_backup_workspace(
+            username=source_username,
+            password=source_password,
+            version=version,
+            workspace=source_workspace,
+            export_path=None)
+    else:
+        source_export = load_workspace_export(source_export)
 
     target_export = get_and_backup_workspace(
         username=target_username,
         password=target_password,
         version=version,
         workspace=target_workspace,
-        export_path=None)
-
-    # build tree roots
-    source_nodes = anytree.AnyNode(id=None, title=None, desc='root')
-    target_nodes = anytree.AnyNode(id=None, title=None, desc='root')
-
-    # build our trees
-    _build_tree(source_export['dialog_nodes'], source_nodes)
-    _build_tree(target_export['dialog_nodes'], target_nodes)
-
-    # we only have one value for these branches
-    source_branch = _get_branch_node(source_nodes, root_node, 'source')
-    target_branch = _get_branch_node(target_nodes, target_node, 'target')
-
-    # we need to have ensure branches in order to insert
-    if source_branch is None:
-        raise RuntimeError('No matching root node found in source')
-    if target_branch is None:
-        raise RuntimeError('No target node found in target')
+        export_path=target_backup_file)
 
-    # insert a copy of the source branch into the target tree
-    _insert_into_target_tree(
-        source_branch,
-        target_branch,
-        target_nodes,
-        target_insert_as)
+    # insert a copy of the source branch (and jumps) into the target tree.
+    # the target is hashed before and, along the changed paths only, after
+    # the copy so that we can tell if the copy is a no-op
+    copied = []
+    hashes = {}
+    target_nodes = _project_branch_copy(
+        source_export['dialog_nodes'],
+        target_export['dialog_nodes'],
+        root_node,
+        target_node,
+        target_insert_as,
+        copied,
+        hashes)
+
+    # copy the intents and entities before the dialog that uses them
+    if copy_references:
+        references = {}
+        with _span('reference_index'):
+            for node in copied:
+                # replaced by a later copy of one of its ancestors
+                if node.root is not target_nodes:
+                    continue
+                references.update(_index_references(node))
+        _copy_references(
+            list(references),
+            source_export,
+            target_export,
+            target_username,
+            target_password,
+            target_workspace,
+            version,
+            max_workers)
+
+    with _span('hashing'):
+        changed_subtrees = _get_changed_subtrees(
+            hashes['original'],
+            hashes['projected'])
+
+    # the target already contains an identical copy of the branch
+    if not changed_subtrees:
+        print('dialog unchanged, skipping update')
+    else:
+        # go ahead and update the workspace
+        with _span('serialization'):
+            dialog_nodes = [x.node for x in LevelOrderIter(target_nodes) \
+                if x.id is not None]
+        _update_workspace(
+            target_username,
+            target_password,
+            target_workspace,
+            dialog_nodes)
+        print('dialog update complete, changed subtrees: {}'.format(
+            ', '.join('root' if x is None else x for x in changed_subtrees)))
 
-    # check for any jumps, these will need to be accounted for
-    nodes_with_jumps = anytree.search.findall(
-        source_branch,
-        filter_=_get_nodes_with_jump)
+    # projected rendering of tree
+    projected = _render_tree(target_nodes)
 
-    # this is the set of nodes that jumped to
-    to_jump_to = [x.node['next_step']['dialog_node'] \
-        for x in nodes_with_jumps]
+    return target_nodes, projected
 
+def _copy_references(
+        references: List[str],
+        source_export: dict,
+        target_export: dict,
+        target_username: str,
+        target_password: str,
+        target_workspace: str,
+        version: str,
+        max_workers: int) -> Tuple[List[str], List[str]]:
+    """ Copies the referenced intents and entities that are missing from the
+    target export, or that lack some of the examples, values or synonyms of
+    the source export. Pattern values are neither compared nor copied, see
+    `_get_export_values`. Intents and entities are copied at the same time
 
-    # make sure that we have a valid destination for the jump
-    # if not, we will insert at the first common ancestor
-    for jump_id in to_jump_to:
-        # destination exists, move on
-        jump_node = anytree.search.findall(
-            target_nodes,
-            filter_=_get_matcher_function(jump_id))
+    parameters:
+    references: references from `_index_references`
+    source_export: export of the source workspace
+    target_export: export of the target workspace, before any update
+    target_username: Username for target WCS instance
+    target_password: Password for target WCS instance
+    target_workspace: Workspace ID for target WCS instance
+    version: WCS API version
+    max_workers: number of intents and entities copied at the same time
 
-        if jump_node:
+    returns:
+    intents: names of the intents copied
+    entities: names of the entities copied
+    """
+    source_intents = {x['intent']: x for x in source_export['intents']}
+    target_intents = {x['intent']: x for x in target_export['intents']}
+    source_entities = {x['entity']: x for x in source_export['entities']}
+    target_entities = {x['entity']: x for x in target_export['entities']}
+
+    intents_to_add = {}
+    entities_to_add = {}
+    for reference in references:
+        # entity values are copied with their entity
+        if reference[0] == '$' or ':' in reference:
             continue
-
-        # we need to find the common ancestor
-        source_branch = _get_branch_node(source_nodes, jump_id, 'source')
-
-        if source_branch is None:
-            raise RuntimeError('No matching jump node found in source')
-
-        ancestors, _, _ = tree_walker.walk(source_branch, source_nodes)
-
-        # assume we need to insert at the root (the last ancestor as we walk
-        # up the tree)
-        common_ancestor = ancestors[-1]
-        for node in ancestors:
-            # otherwise, if we have found a common ancestor, we can insert at
-            # that point
-            if _get_branch_node(target_nodes, node.id, 'target') is not None:
-                common_ancestor = node
+        name = reference[1:]
+        if reference[0] == '#':
+            if name not in source_intents:
+                print("Intent '{}' is not in source, skipping".format(name))
                 continue
+            examples = [x['text'] for x in source_intents[name]['examples']]
+            existing = target_intents.get(name, {}).get('examples', [])
+            if name not in target_intents or \
+                    set(examples) - {x['text'] for x in existing}:
+                intents_to_add[name] = examples
+        # system entities are enabled rather than copied
+        elif not name.startswith('sys-'):
+            if name not in source_entities:
+                print("Entity '{}' is not in source, skipping".format(name))
+                continue
+            values = _get_export_values(source_entities[name])
+            if name not in target_entities or _has_missing_values(
+                    values,
+                    _get_export_values(target_entities[name])):
+                entities_to_add[name] = values
 
-        # set our insert point
-        target_branch = target_nodes
-        if common_ancestor.parent.id is not None:
-            target_branch = _get_branch_node(
-                target_nodes,
-                common_ancestor.id,
-                'target')
-
-        # insert the jump to information
-        # will always be done as last child
-        _insert_into_target_tree(
-            common_ancestor,
-            target_branch,
-            target_nodes,
-            'last_child')
-
-        # find any new jumps
-        nodes_with_jumps = anytree.search.findall(
-            common_ancestor,
-            filter_=_get_nodes_with_jump)
-
-        # add these new jumps to be checked
-        for node in nodes_with_jumps:
-            to_jump_to.append(node.node['next_step']['dialog_node'])
-
-    # for rendering, let's update the desc fields with titles of the jump
-    nodes_with_jumps = anytree.search.findall(
-        target_nodes,
-        filter_=_get_nodes_with_jump)
-
-    # update the descriptions
-    for node in nodes_with_jumps:
-        dest = _get_all_matches(
-            target_nodes,
-            node.node['next_step']['dialog_node'])
-        if len(dest) == 1:
-            node.desc = node.desc + ' (jumps to: {})'.format(dest[0].desc)
-
-    # go ahead and update the workspace
-    _update_workspace(
+    target_conv = _get_conversation(
         target_username,
         target_password,
-        target_workspace,
-        [x.node for x in LevelOrderIter(target_nodes) \
-            if x.id is not None])
-    print('dialog update complete')
-
-    # projected rendering of tree
-    projected = anytree.RenderTree(
-        target_nodes,
-        childiter=_sort_child_nodes).by_attr(attrname='desc')
-
-    return target_nodes, projected
+        version)
+
+    loads = []
+    if intents_to_add:
+        loads.append(partial(
+            _load_intent_data,
+            conversation=target_conv,
+            workspace_id=target_workspace,
+            config_data={
+                "clear_existing": False,
+                "max_workers": max_workers},
+            intents_to_add=intents_to_add))
+    if entities_to_add:
+        loads.append(partial(
+            _load_entity_data,
+            conversation=target_conv,
+            workspace_id=target_workspace,
+            config_data={
+                "clear_existing": False,
+                "max_workers": max_workers},
+            entities_to_add=entities_to_add))
+
+    with _span('apply'):
+        _map_concurrently(lambda load: load(), loads, len(loads))
+
+    print("copied {} intents and {} entities used by the branch".format(
+        len(intents_to_add),
+        len(entities_to_add)))
+    return list(intents_to_add), list(entities_to_add)
+
+def _has_missing_values(values: List[dict], existing: List[dict]) -> bool:
+    """ Whether any value or synonym of `values` is not in `existing`.
+    Both are synonyms values from `_get_export_values`, patterns are not
+    compared
+    """
+    existing_synonyms = {
+        x['value']: set(x.get('synonyms', [])) for x in existing}
+    return any(
+        x['value'] not in existing_synonyms or \
+            set(x.get('synonyms', [])) - existing_synonyms[x['value']]
+        for x in values)
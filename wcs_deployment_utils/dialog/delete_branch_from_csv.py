@@ -11,11 +11,13 @@ delete_branch_from_csv: Delete branches as specified as in a CSV file
 from datetime import datetime
 from typing import Tuple, List
 import pandas as pd
-from watson_developer_cloud import ConversationV1, WatsonException
+from watson_developer_cloud import WatsonException
 from ._util import _find_node
 from ..util.get_and_backup_workspace import get_and_backup_workspace
 
+from .._api import _get_conversation
 from .._constants import _DEFAULT_BACKUP_FILE
+from .._instrumentation import _span
 
 def delete_branch_from_csv(
         conversation_username: str = '',
@@ -66,11 +68,10 @@ def delete_branch_from_csv(
             str(datetime.now().timestamp()))
 
     # setup conversation class
-    conversation = ConversationV1(
-        username=conversation_username,
-        password=conversation_password,
-        version=version
-    )
+    conversation = _get_conversation(
+        conversation_username,
+        conversation_password,
+        version)
 
     # get and backup our target instance
     dialog_export = get_and_backup_workspace(
@@ -82,10 +83,11 @@ def delete_branch_from_csv(
     )
 
     # load data
-    dialog_data = pd.read_csv(
-        csv_file,
-        dtype='str',
-        keep_default_na=False)
+    with _span('csv_read'):
+        dialog_data = pd.read_csv(
+            csv_file,
+            dtype='str',
+            keep_default_na=False)
 
     nodes_removed = []
     nodes_not_existing = []
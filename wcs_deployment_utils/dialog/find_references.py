@@ -0,0 +1,96 @@
+""" Find References Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+find_references: finds the dialog nodes whose conditions use intents,
+    entities, entity values or context variables
+"""
+
+from typing import Dict, List, Union
+
+import anytree
+
+from ._util import (
+    _build_tree,
+    _get_branch_node,
+    _get_condition_references,
+    _index_references)
+from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
+from .._instrumentation import _span
+
+def find_references(
+        references: Union[str, List[str], None] = None,
+        conversation_username: str = None,
+        conversation_password: str = None,
+        version: str = None,
+        workspace: str = None,
+        export: Union[str, dict, None] = None,
+        root_node: Union[str, None] = None) -> Dict[str, List[str]]:
+    """ Finds the dialog nodes whose conditions use intents, entities,
+    entity values or context variables, ex. before removing an intent.
+    Conditions are indexed once, so any number of references can be
+    looked up. Only shorthand references are found, not ones written as
+    expressions (ex. intents[0].intent == 'billing')
+
+    parameters:
+    references: reference, or list of references, written as in conditions:
+        '#intent', '@entity', '@entity:value' or '$variable'. A reference to
+        an entity also finds the nodes that use its values. Default every
+        reference in the workspace
+    conversation_username: WCS instance username
+    conversation_password: WCS instance password
+    version: WCS API version
+    workspace: WCS instance workspace
+    export: export of the workspace (dict or file path). if provided, the
+        workspace is not fetched and credentials are not required
+    root_node: ID or title of a node. only the branch beginning at this
+        node is searched
+
+    returns:
+    nodes: dict of each reference to the ids of the nodes that use it, in
+        tree order
+    """
+    if isinstance(references, str):
+        references = [references]
+    # written the way the tokenizer writes them, ex. '@city:New York'
+    if references is not None:
+        normalized = []
+        for reference in references:
+            tokens = _get_condition_references(reference)
+            if not tokens:
+                raise ValueError(
+                    "Invalid reference '{}'".format(reference))
+            normalized.append(tokens[0])
+        references = normalized
+
+    if export is None:
+        export = get_and_backup_workspace(
+            username=conversation_username,
+            password=conversation_password,
+            version=version,
+            workspace=workspace,
+            export_path=None)
+    else:
+        export = load_workspace_export(export)
+
+    root = anytree.AnyNode(id=None, title=None, desc='root')
+    with _span('tree_build'):
+        _build_tree(export['dialog_nodes'], root)
+
+    # search only the requested branch
+    if root_node is not None and root_node != 'root':
+        branch = _get_branch_node(root, root_node, 'workspace')
+        if branch is None:
+            raise RuntimeError('No matching root node found in workspace')
+        root = branch
+
+    with _span('reference_index'):
+        index = _index_references(root)
+
+    if references is None:
+        return index
+    return {x: index.get(x, []) for x in references}
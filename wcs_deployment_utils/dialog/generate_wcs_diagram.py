@@ -8,20 +8,33 @@ Included in this module are:
 generate_wcs_diagram: generates a text based diagram of a WCS workspace.
 """
 
+from typing import TextIO, Union
+
 import anytree
 
 from ._util import (
+    _GRAPH_FORMATS,
     _build_tree,
-    _sort_child_nodes,
-    _get_nodes_with_jump,
-    _get_all_matches)
+    _get_branch_node,
+    _iter_graph_lines,
+    _iter_rendered_lines,
+    _label_jumps,
+    _render_tree,
+    _write_lines)
 from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
+from .._instrumentation import _span
 
 def generate_wcs_diagram(
         conversation_username: str = None,
         conversation_password: str = None,
         version: str = None,
-        workspace: str = None) -> str:
+        workspace: str = None,
+        export: Union[str, dict, None] = None,
+        root_node: Union[str, None] = None,
+        max_depth: Union[int, None] = None,
+        output_file: Union[str, TextIO, None] = None,
+        output_format: str = 'text') -> Union[str, None]:
     """ generates a compact, text represation of a WCS instance.
     ex:
 
@@ -42,40 +55,71 @@ def generate_wcs_diagram(
     conversation_password: WCS instance password
     version: WCS API version
     workspace: WCS instance workspace
+    export: export of the workspace (dict or file path). if provided, the
+        workspace is not fetched and credentials are not required
+    root_node: ID or title of a node. only the branch beginning at this
+        node is rendered
+    max_depth: only render nodes up to this many levels below the root
+    output_file: file path or open text file. if provided, the lines are
+        streamed to the file as they are rendered and nothing is returned
+    output_format: Default 'text'. 'dot', 'graphml' or 'json' produce a
+        graph of the dialog nodes with their child, sibling and jump_to
+        edges instead of a diagram. 'json' is a compact set of adjacency
+        lists (children, next_sibling and jump_to)
 
     returns:
     projection: a string representation of the WCS workspace
     """
 
-    export = get_and_backup_workspace(
-        username=conversation_username,
-        password=conversation_password,
-        version=version,
-        workspace=workspace,
-        export_path=None)
+    if output_format not in ['text'] + _GRAPH_FORMATS:
+        raise ValueError("output_format must be one of 'text', {}".format(
+            ', '.join("'{}'".format(x) for x in _GRAPH_FORMATS)))
+
+    if export is None:
+        export = get_and_backup_workspace(
+            username=conversation_username,
+            password=conversation_password,
+            version=version,
+            workspace=workspace,
+            export_path=None)
+    else:
+        export = load_workspace_export(export)
 
     # build tree roots
     root = anytree.AnyNode(id=None, title=None, desc='root')
 
     # build our trees
-    _build_tree(export['dialog_nodes'], root)
+    with _span('tree_build'):
+        _build_tree(export['dialog_nodes'], root)
 
     # for rendering, let's update the desc fields with titles of the jump
-    nodes_with_jumps = anytree.search.findall(
-        root,
-        filter_=_get_nodes_with_jump)
-
-    # update the descriptions
-    for node in nodes_with_jumps:
-        dest = _get_all_matches(
-            root,
-            node.node['next_step']['dialog_node'])
-        if len(dest) == 1:
-            node.desc = node.desc + ' (jumps to: {})'.format(dest[0].desc)
-
-    # projected rendering of tree
-    projected = anytree.RenderTree(
-        root,
-        childiter=_sort_child_nodes).by_attr(attrname='desc')
-
-    return projected
+    # graphs carry the jumps as edges instead
+    if output_format == 'text':
+        with _span('jump_resolution'):
+            _label_jumps(root)
+
+    # render only the requested branch
+    if root_node is not None and root_node != 'root':
+        branch = _get_branch_node(root, root_node, 'workspace')
+        if branch is None:
+            raise RuntimeError('No matching root node found in workspace')
+        root = branch
+
+    if output_format == 'text':
+        if output_file is None:
+            # projected rendering of tree
+            return _render_tree(root, max_depth)
+        lines = _iter_rendered_lines(root, max_depth)
+    else:
+        lines = _iter_graph_lines(root, output_format, max_depth)
+
+    with _span('render'):
+        if output_file is None:
+            return '\n'.join(lines)
+        # stream the rendering, a line at a time
+        if isinstance(output_file, str):
+            with open(output_file, mode='w', encoding='utf8') as diagram_file:
+                _write_lines(diagram_file, lines)
+        else:
+            _write_lines(output_file, lines)
+    return None
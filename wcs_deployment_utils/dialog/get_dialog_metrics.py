@@ -0,0 +1,63 @@
+""" Get Dialog Metrics Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+get_dialog_metrics: structural metrics of the dialog of a workspace
+"""
+
+from typing import Union
+
+from ._columnar import _DialogArrays, _get_structure_metrics
+from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
+from .._instrumentation import _span
+
+def get_dialog_metrics(
+        conversation_username: str = None,
+        conversation_password: str = None,
+        version: str = None,
+        workspace: str = None,
+        export: Union[str, dict, None] = None) -> dict:
+    """ Structural metrics of the dialog of a workspace: depths, subtree
+    sizes, fan-out and jumps. The dialog is converted to arrays instead of a
+    tree, so the metrics of many workspaces can be compared cheaply
+
+    parameters:
+    conversation_username: WCS instance username
+    conversation_password: WCS instance password
+    version: WCS API version
+    workspace: WCS instance workspace
+    export: export of the workspace (dict or file path). if provided, the
+        workspace is not fetched and credentials are not required
+
+    returns:
+    metrics: dict of
+        nodes: number of dialog nodes
+        orphans: number of nodes under a parent that is not in the dialog
+        depth: max, mean and distribution (number of nodes at each depth,
+            1 for the top level) of the nodes that are not orphans
+        subtree_size: max and mean number of nodes in the subtree of a node
+            (itself included), and the size of each top level branch
+        fan_out: number of top level nodes, max and mean number of children
+            of the nodes that have any, distribution (number of nodes with
+            each number of children) and number of leaves
+        jumps: number of jumps, jumps per node and jumps to missing nodes
+    """
+    if export is None:
+        export = get_and_backup_workspace(
+            username=conversation_username,
+            password=conversation_password,
+            version=version,
+            workspace=workspace,
+            export_path=None)
+    else:
+        export = load_workspace_export(export)
+
+    with _span('tree_build'):
+        arrays = _DialogArrays(export['dialog_nodes'])
+
+    with _span('metrics'):
+        return _get_structure_metrics(arrays)
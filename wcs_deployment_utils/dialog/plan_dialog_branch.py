@@ -0,0 +1,148 @@
+""" Plan Dialog Branch Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+plan_dialog_branch: Project a dialog branch copy without making any changes
+    to the target workspace
+"""
+
+from copy import deepcopy
+from typing import Tuple, Union
+
+import anytree
+from anytree.iterators.levelorderiter import LevelOrderIter
+
+from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
+from ._util import (
+    _get_change_set,
+    _get_changed_subtrees,
+    _project_branch_copy,
+    _render_tree
+    )
+
+def plan_dialog_branch(
+        root_node: str = '',
+        target_node: str = 'root',
+        target_insert_as: str = 'child',
+        source_export: Union[str, dict, None] = None,
+        target_export: Union[str, dict, None] = None,
+        source_username: str = '',
+        source_password: str = '',
+        source_workspace: str = '',
+        target_username: str = '',
+        target_password: str = '',
+        target_workspace: str = '',
+        version: str = '') -> \
+            Tuple[anytree.AnyNode, str, dict]:
+    """ Project the copy of a dialog branch (and any jumps) to a target
+    workspace exactly as `copy_dialog_branch` would, without writing a
+    backup or updating the target workspace.
+
+    Either workspace can be supplied as an export (a dict or the path of a
+    JSON export) instead of credentials. Supplied exports are not modified.
+
+    parameters:
+    root_node: ID or title of the root node in source
+    target_node: ID or title of the root node in target
+    target_insert_as: Default 'child'. Location of branch insertion, with
+        respect to the target node. valid options ['child', 'last_child'
+        or 'sibling']
+    source_export: export of the source workspace (dict or file path)
+    target_export: export of the target workspace (dict or file path)
+    source_username: Username for source WCS instance
+    source_password: Password for source WCS instance
+    source_workspace: Workspace ID for source WCS instance
+    target_username: Username for target WCS instance
+    target_password: Password for target WCS instance
+    target_workspace: Workspace ID for target WCS instance
+    version: WCS API version
+
+    returns:
+    target_nodes: the root node of the projected target tree
+    projected: a string representation of the projected tree
+    change_set: dict of dialog node ids in the target by type of change
+        ('added', 'removed', 'moved', 'modified'). 'changed_subtrees' lists
+        the highest nodes whose subtrees differ (None for root); it is
+        empty when the copy is a no-op
+    """
+
+    #validate that values are provided
+    args = locals()
+    required = ['root_node', 'target_node', 'target_insert_as']
+    if source_export is None:
+        required += [
+            'source_username',
+            'source_password',
+            'source_workspace',
+            'version']
+    if target_export is None:
+        required += [
+            'target_username',
+            'target_password',
+            'target_workspace',
+            'version']
+    for key in required:
+        if args[key] == '':
+            raise ValueError("Argument '{}' requires a value".format(key))
+
+    # can't copy the entire root
+    if root_node == 'root' or root_node is None:
+        raise ValueError("""Root node cannot be the source root.
+                            Import the workspace instead.""")
+    # need a valid insert type
+    target_insert_as = target_insert_as.lower()
+    if target_insert_as not in ['child', 'last_child', 'sibling']:
+        raise ValueError("""'target_insert_as is required to be one of
+                            'child', 'last_child', or 'sibling'""")
+
+    # set root references to None for consistency
+    if target_node == 'root':
+        target_node = None
+
+    # get export of workspaces
+    if source_export is None:
+        source_export = get_and_backup_workspace(
+            username=source_username,
+            password=source_password,
+            version=version,
+            workspace=source_workspace,
+            export_path=None)
+    else:
+        source_export = load_workspace_export(source_export)
+
+    if target_export is None:
+        target_export = get_and_backup_workspace(
+            username=target_username,
+            password=target_password,
+            version=version,
+            workspace=target_workspace,
+            export_path=None)
+    else:
+        target_export = load_workspace_export(target_export)
+
+    # the projection updates target nodes in place
+    original_nodes = target_export['dialog_nodes']
+    hashes = {}
+    target_nodes = _project_branch_copy(
+        source_export['dialog_nodes'],
+        deepcopy(original_nodes),
+        root_node,
+        target_node,
+        target_insert_as,
+        hashes=hashes)
+
+    change_set = _get_change_set(
+        original_nodes,
+        [x.node for x in LevelOrderIter(target_nodes) if x.id is not None])
+    change_set['changed_subtrees'] = _get_changed_subtrees(
+        hashes['original'],
+        hashes['projected'])
+
+    # projected rendering of tree
+    projected = _render_tree(target_nodes)
+
+    return target_nodes, projected, change_set
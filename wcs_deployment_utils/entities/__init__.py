@@ -1,6 +1,8 @@
 """ Intents package
 """
-from .copy_entity_data import copy_entity_data as copy_entity_data
-from .load_csv_as_entity_data import load_csv_as_entity_data  as load_csv_as_entity_data
+from .._lazy import _make_lazy
 
-__all__ = ['copy_entity_data', 'load_csv_as_entity_data']
+__all__ = ['copy_entity_data', 'copy_entities', 'load_csv_as_entity_data']
+
+# functions are imported from their modules on first use
+_make_lazy(__name__, {name: '.' + name for name in __all__})
@@ -1,19 +1,259 @@
 """ Module containing utility functions for entity operations
 """
 
+from typing import Dict, List, Tuple, Union
 import pandas as pd
 from watson_developer_cloud import ConversationV1, WatsonException
 
+from .._api import _map_concurrently, _update_workspace_collection
+from .._constants import (
+    _AUDIT_KEYS,
+    _DEFAULT_CHUNK_SIZE,
+    _DEFAULT_MAX_WORKERS
+    )
+from .._journal import _Journal
+
+# rough cost of one request, in values and synonyms sent with a full
+# replacement. used to choose between delta and full entity updates
+_REQUEST_COST = 100
+
 # Right now this doesn't support patterns. This should be
 # updated when the APIs for managing patterns are made available
 # Alternatively, this can be updated with the values API to move
 # beyond this limitation or an alternative function could be developed
 # to specifically handle patterns
 
+def _group_values(entity_data: pd.DataFrame) -> Dict[str, List[dict]]:
+    """ Collect the values and synonyms of ADD rows by entity
+
+    parameters:
+    entity_data: DataFrame of entity data with columns
+        [action, entity, value, synonym]
+
+    returns:
+    entities_to_add: dict of entity name to a list of values (with
+        optional synonyms), in the order given
+    """
+    # entity -> value -> synonyms, dicts keep the order and drop duplicates
+    grouped = {}
+    rows_to_add = entity_data[entity_data['action'] == 'ADD']
+    for _, row in rows_to_add.iterrows():
+        values = grouped.setdefault(row['entity'], {})
+        # rows without a value only make sure the entity exists
+        if row['value'] == '':
+            continue
+        synonyms = values.setdefault(row['value'], {})
+        if row['synonym'] != '':
+            synonyms[row['synonym']] = None
+
+    entities_to_add = {}
+    for entity_name, values in grouped.items():
+        new_values = []
+        for value_name, synonyms in values.items():
+            value = {
+                "value": value_name
+            }
+            if synonyms:
+                value['synonyms'] = list(synonyms)
+            new_values.append(value)
+        entities_to_add[entity_name] = new_values
+    return entities_to_add
+
+def _get_export_values(entity: dict) -> List[dict]:
+    """ Values of an exported entity as they are added, without audit
+    fields or metadata. Only synonyms values are copied
+
+    parameters:
+    entity: entity from a workspace export
+
+    returns:
+    values: list of values (with optional synonyms), in the order given
+    """
+    values = []
+    for value in entity['values']:
+        # break out of anything except synonyms
+        if value.get('type', 'synonyms') != 'synonyms':
+            continue
+        new_value = {
+            "value": value['value']
+        }
+        if value.get('synonyms'):
+            new_value['synonyms'] = list(dict.fromkeys(value['synonyms']))
+        values.append(new_value)
+    return values
+
+def _merge_values(
+        entity_name: str,
+        existing_values: List[dict],
+        new_values: List[dict]) -> Tuple[List[dict], bool]:
+    """ Merge new values (and synonyms) into the existing values of an
+    entity. Existing values and synonyms keep their order, new ones are
+    appended in the order given, without duplicates
+
+    parameters:
+    entity_name: name of the entity, for messages
+    existing_values: values of the existing entity
+    new_values: values to add, with optional synonyms
+
+    returns:
+    final_values: merged list of values
+    changed: True if the merged values differ from the existing values
+    """
+    new_value_dict = {value['value']: value for value in new_values}
+    final_values = []
+    changed = False
+
+    # keep existing values in place, merging synonyms where needed
+    for existing_value in existing_values:
+        new_value = new_value_dict.pop(existing_value['value'], None)
+        if new_value is None:
+            final_values.append(existing_value)
+            continue
+        # confirm that we're working with synonyms
+        if existing_value.get('type', 'synonyms') != 'synonyms':
+            print(("Value type mismatch for value '{}' "
+                   " in entity '{}'. Cannot process value.").format(
+                       existing_value['value'],
+                       entity_name))
+            final_values.append(existing_value)
+            continue
+        # existing and new synonyms (either may be empty)
+        existing_synonyms = existing_value.get('synonyms', [])
+        merged_synonyms = list(dict.fromkeys(
+            existing_synonyms + new_value.get('synonyms', [])))
+        if len(merged_synonyms) == len(existing_synonyms):
+            final_values.append(existing_value)
+            continue
+        merged_value = dict(existing_value)
+        merged_value['synonyms'] = merged_synonyms
+        final_values.append(merged_value)
+        changed = True
+
+    # anything left is a new value
+    if new_value_dict:
+        final_values.extend(new_value_dict.values())
+        changed = True
+
+    return final_values, changed
+
+def _get_value_deltas(
+        existing_values: List[dict],
+        final_values: List[dict]) -> \
+            List[Tuple[str, Union[dict, None], List[str]]]:
+    """ Finds the values and synonyms that have to be created to turn the
+    existing values into the final values
+
+    parameters:
+    existing_values: values of the existing entity
+    final_values: merged values of the entity
+
+    returns:
+    deltas: list of (value name, value to create or None, synonyms to
+        create on an existing value)
+    """
+    existing_value_dict = {value['value']: value for value in existing_values}
+    deltas = []
+    for value in final_values:
+        existing_value = existing_value_dict.get(value['value'])
+        if existing_value is None:
+            deltas.append((value['value'], value, []))
+            continue
+        existing_synonyms = set(existing_value.get('synonyms', []))
+        new_synonyms = [synonym for synonym in value.get('synonyms', []) \
+            if synonym not in existing_synonyms]
+        if new_synonyms:
+            deltas.append((value['value'], None, new_synonyms))
+    return deltas
+
+def _use_value_deltas(
+        delta: Union[bool, None],
+        deltas: List[Tuple[str, Union[dict, None], List[str]]],
+        entity_size: int,
+        max_workers: int) -> bool:
+    """ Decides between delta and full entity updates. A full update is one
+    request that re-sends the whole entity, deltas are one request per new
+    value or synonym spread over `max_workers` threads
+
+    parameters:
+    delta: True or False to force a mode, None to decide by cost
+    deltas: value deltas from `_get_value_deltas`
+    entity_size: number of values and synonyms in the existing entity
+    max_workers: number of concurrent delta requests
+
+    returns:
+    use_deltas: True if delta updates should be used
+    """
+    if delta is not None:
+        return delta
+    request_count = sum(1 if value is not None else len(synonyms) \
+        for _, value, synonyms in deltas)
+    return request_count / max_workers < 1 + entity_size / _REQUEST_COST
+
+def _apply_value_deltas(
+        conversation: ConversationV1,
+        workspace_id: str,
+        entity_name: str,
+        deltas: List[Tuple[str, Union[dict, None], List[str]]],
+        max_workers: int) -> int:
+    """ Creates new values and synonyms of an existing entity with the
+    value and synonym endpoints. Each value is handled by one thread, so
+    new values may be created in any order
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: target workspace id
+    entity_name: name of the existing entity
+    deltas: value deltas from `_get_value_deltas`
+    max_workers: number of concurrent requests
+
+    returns:
+    failures: number of values and synonyms that failed to create
+    """
+    def _apply(delta: Tuple[str, Union[dict, None], List[str]]) -> int:
+        value_name, value, synonyms = delta
+        if value is not None:
+            try:
+                conversation.create_value(
+                    workspace_id=workspace_id,
+                    entity=entity_name,
+                    value=value_name,
+                    metadata=value.get('metadata'),
+                    synonyms=value.get('synonyms'))
+                return 0
+            except WatsonException as err:
+                print(repr(err))
+                print("Value '{}' failed to create for entity '{}'".format(
+                    value_name,
+                    entity_name))
+                return 1
+        failures = 0
+        for synonym in synonyms:
+            try:
+                conversation.create_synonym(
+                    workspace_id=workspace_id,
+                    entity=entity_name,
+                    value=value_name,
+                    synonym=synonym)
+            except WatsonException as err:
+                # the synonym already exists
+                if getattr(err, 'code', None) == 409:
+                    continue
+                print(repr(err))
+                print(("Synonym '{}' for value '{}' failed to create "
+                       "for entity '{}'").format(
+                           synonym,
+                           value_name,
+                           entity_name))
+                failures += 1
+        return failures
+
+    return sum(_map_concurrently(_apply, deltas, max_workers))
+
 def _load_entity_data(conversation: ConversationV1 = None,
                       workspace_id: str = None,
                       entity_data: pd.DataFrame = None,
-                      config_data: dict = None):
+                      config_data: dict = None,
+                      entities_to_add: Dict[str, List[dict]] = None):
     
     """ Add all the entity data to the target workspace
 
@@ -22,14 +262,51 @@ def _load_entity_data(conversation: ConversationV1 = None,
     workspace_id: target workspace id
     entity_data: DataFrame of intent data with columns
         [action, entity, value, synonym]
+    entities_to_add: dict of entity name to values (with optional
+        synonyms), in place of entity_data. used by copies, which have no
+        removes
     config_data: Dict of configuration options
         clear_existing: will clear existing examples from target
+        bulk: apply every change through workspace updates instead of
+            one request per entity
+        chunk_size: bulk only, maximum number of values and synonyms per
+            update
+        workspace_export: bulk only, export of the target workspace. the
+            workspace is exported if not provided
+        delta: create new values and synonyms of existing entities with
+            the value and synonym endpoints (True), re-send the whole
+            entity (False) or pick whichever is cheaper (None, default)
+        max_workers: number of entities added at the same time, and of
+            concurrent requests for the delta updates of each. Default 1
+            entity at a time and 8 delta requests
+        journal: `_Journal` of the units already applied, which are
+            skipped. applied units are recorded in it
     """
-    
+    if entities_to_add is not None:
+        # like an empty DataFrame, entities without values change nothing:
+        # they are neither created nor cleared
+        entities_to_add = {x: y for x, y in entities_to_add.items() if y}
+
+    if config_data.get('bulk'):
+        _load_entity_data_bulk(
+            conversation,
+            workspace_id,
+            entity_data,
+            config_data,
+            entities_to_add)
+        return
+
+    journal = config_data.get('journal') or _Journal()
+    entity_names = list(entities_to_add) if entities_to_add is not None \
+        else entity_data['entity'].unique()
+
     # optionally destroy any existing entities
     try:
         if config_data['clear_existing']:
-            for entity_name in entity_data['entity'].unique():
+            for entity_name in entity_names:
+                unit = 'clear:{}'.format(entity_name)
+                if unit in journal:
+                    continue
                 try:
                     conversation.delete_entity(workspace_id=workspace_id,
                                                entity=entity_name)
@@ -37,13 +314,19 @@ def _load_entity_data(conversation: ConversationV1 = None,
                 except WatsonException:
                     print(("entity '{}' does not exist"
                            ", nothing to remove").format(entity_name))
+                journal.record(unit)
     except KeyError:
         print('Invalid config.json file')
 
 
     # remove all the requested deletions first
-    rows_to_remove = entity_data[entity_data['action'] == 'REMOVE']
-    for _, row in rows_to_remove.iterrows():
+    # copies have no removes
+    rows_to_remove = entity_data[entity_data['action'] == 'REMOVE'].iterrows() \
+        if entity_data is not None else []
+    for index, row in rows_to_remove:
+        unit = 'remove:{}'.format(index)
+        if unit in journal:
+            continue
         try:
             deletion_type = None
             # remove entire entity
@@ -78,6 +361,8 @@ def _load_entity_data(conversation: ConversationV1 = None,
                                                 entity=row['entity'])
                         print("Entity '{}' failed to remove.".format(
                             row['entity']))
+                        journal.failed = True
+                        continue
                     except WatsonException:
                         # if it doesn't exist, then there was nothing to
                         # delete
@@ -105,6 +390,8 @@ def _load_entity_data(conversation: ConversationV1 = None,
                                "remove for entity '{}'").format(
                                    row['value'],
                                    row['entity']))
+                        journal.failed = True
+                        continue
                     except WatsonException:
                         # if it doesn't exist, then there was nothing to
                         # delete
@@ -139,6 +426,8 @@ def _load_entity_data(conversation: ConversationV1 = None,
                                    row['synonym'],
                                    row['value'],
                                    row['entity']))
+                        journal.failed = True
+                        continue
                     except WatsonException:
                         # if it doesn't exist, then there was nothing to
                         # delete
@@ -152,43 +441,19 @@ def _load_entity_data(conversation: ConversationV1 = None,
             print(repr(err))
         except KeyError:
             print('entity data is not properly formed')
+            continue
+        journal.record(unit)
 
     # process the additions
-    # collect all intents and examples into a dictionary
-    entities_to_add = []
-    rows_to_add = entity_data[entity_data['action'] == 'ADD']
-    entities_to_add = list(rows_to_add['entity'].unique())
-
-    # iterate through entities
-    for entity_name in entities_to_add:
-
-        new_values = []
-        # rows containing data on the current entity
-        entity_rows = rows_to_add[rows_to_add['entity'] == entity_name]
-
-        # unique values for that entity
-        values_to_add = list(entity_rows['value'].unique())
-
-        for value in values_to_add:
-            if value == '':
-                continue
-            # rows for current entity and value
-            value_rows = entity_rows[entity_rows['value'] == value]
-            # unique synonyms for current entity and value
-            synonyms = list(value_rows['synonym'].unique())
-
-            # remove empty strings
-            synonyms = [synonym for synonym in synonyms if synonym != '']
-
-            value = {
-                "value": value
-            }
-
-            if synonyms:
-                value['synonyms'] = synonyms
-
-            new_values.append(value)
-
+    if entities_to_add is None:
+        entities_to_add = _group_values(entity_data)
+    # skip the entities already added
+    entities_to_add = [x for x in entities_to_add.items() \
+        if 'add:{}'.format(x[0]) not in journal]
+
+    def _add_entity(group: Tuple[str, List[dict]]) -> None:
+        entity_name, new_values = group
+        unit = 'add:{}'.format(entity_name)
         try:
             # check if there is an existing entity
             existing_entity = conversation.get_entity(
@@ -208,79 +473,49 @@ def _load_entity_data(conversation: ConversationV1 = None,
                     values=new_values)
                 print(("Entity '{}' update complete for all "
                        "values and synyonyms").format(entity_name))
+                journal.record(unit)
             except WatsonException as err:
                 print(repr(err))
                 print(("Entity '{}' creation failed for all "
                        "values and synyonyms").format(entity_name))
-        # now things get tricky. we need to combine entity values
+                journal.failed = True
+        # merge with the existing values, only updating on a change
         else:
-            new_values_names = [value['value'] for value in new_values]
-            existing_values_names = [value['value'] \
-                for value in existing_entity['values']]
-
-            # dictionaries to make life easier
-            new_value_dict = {}
-            existing_value_dict = {}
-
-            for value in new_values:
-                value_name = value['value']
-                new_value_dict[value_name] = value
-
-            for value in existing_entity['values']:
-                value_name = value['value']
-                existing_value_dict[value_name] = value
-
-            # leave existing, add new ones, and merge intersection
-            value_names_to_append = list(set(new_values_names) - \
-                set(existing_values_names))
-            values_to_merge = list(set(new_values_names) & \
-                set(existing_values_names))
-            value_names_to_retain = list(set(existing_values_names) - \
-                set(new_values_names))
-
-            # we'll store the updated value list here
-            # list is retained + new + merged
-            final_values = []
-
-            # add in the retained
-            for value_name in value_names_to_retain:
-                final_values.append(existing_value_dict[value_name])
-
-            # add in the new
-            for value_name in value_names_to_append:
-                final_values.append(new_value_dict[value_name])
-
-            # merge the values that need to be merged
-            # then add them to the list
-            for value_name in values_to_merge:
-                existing_value = existing_value_dict[value_name]
-                new_value = new_value_dict[value_name]
-                # confirm that we're working with synonyms
-                if existing_value['type'] != 'synonyms':
-                    print(("Value type mismatch for value '{}' "
-                           " in entity '{}'. Cannot process value.").format(
-                               value_name,
-                               entity_name))
-                    continue
-                # get a list of the synonyms
-                # existing synonyms (may be empty set)
-                try:
-                    existing_synoyms = existing_value['synonyms']
-                except KeyError:
-                    existing_synoyms = []
-
-                # new synonyms (may be empty set)
-                try:
-                    new_synonyms = new_value['synonyms']
-                except KeyError:
-                    new_synonyms = []
-                # merge the set
-                merged_synonyms = list(set(existing_synoyms + new_synonyms))
-
-                # add the new value to the master list
-                merged_value = existing_value
-                merged_value['synonyms'] = merged_synonyms
-                final_values.append(merged_value)
+            final_values, changed = _merge_values(
+                entity_name,
+                existing_entity['values'],
+                new_values)
+            if not changed:
+                print("Entity '{}' unchanged, skipping update".format(
+                    entity_name))
+                journal.record(unit)
+                return
+
+            # small changes to large entities are sent as deltas
+            deltas = _get_value_deltas(existing_entity['values'], final_values)
+            max_workers = config_data.get('max_workers', _DEFAULT_MAX_WORKERS)
+            if _use_value_deltas(
+                    config_data.get('delta'),
+                    deltas,
+                    _get_entity_size(existing_entity),
+                    max_workers):
+                failures = _apply_value_deltas(
+                    conversation,
+                    workspace_id,
+                    entity_name,
+                    deltas,
+                    max_workers)
+                if failures:
+                    print(("Entity '{}' update failed for {} "
+                           "values and synyonyms").format(
+                               entity_name,
+                               failures))
+                    journal.failed = True
+                else:
+                    print(("Entity '{}' update complete for all "
+                           "values and synyonyms").format(entity_name))
+                    journal.record(unit)
+                return
 
             # finally update the original entity
             try:
@@ -290,8 +525,192 @@ def _load_entity_data(conversation: ConversationV1 = None,
                     new_values=final_values)
                 print(("Entity '{}' update complete for all "
                        "values and synyonyms").format(entity_name))
+                journal.record(unit)
             except WatsonException as err:
                 print(final_values)
                 print(repr(err))
                 print(("Entity '{}' update failed for all "
                        "values and synyonyms").format(entity_name))
+                journal.failed = True
+
+    # entities are independent of each other, so they can be added at the
+    # same time
+    _map_concurrently(
+        _add_entity,
+        entities_to_add,
+        config_data.get('max_workers', 1))
+
+def _get_entity_size(entity: dict) -> int:
+    return 1 + sum(1 + len(value.get('synonyms', [])) \
+        for value in entity['values'])
+
+def _load_entity_data_bulk(
+        conversation: ConversationV1 = None,
+        workspace_id: str = None,
+        entity_data: pd.DataFrame = None,
+        config_data: dict = None,
+        entities_to_add: Dict[str, List[dict]] = None):
+    """ Apply all the entity data to the target workspace with as few
+    workspace updates as possible. The changes are applied to an export
+    of the workspace in memory, then every entity is sent in chunks
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: target workspace id
+    entity_data: DataFrame of intent data with columns
+        [action, entity, value, synonym]
+    config_data: Dict of configuration options (see `_load_entity_data`)
+    entities_to_add: dict of entity name to values, in place of
+        entity_data
+    """
+    journal = config_data.get('journal') or _Journal()
+    # without a journal file a failed update can not be resumed, the
+    # original entities are restored instead
+    original = [] if journal.path is None else None
+    # a resumed load sends the entities planned by the interrupted one, the
+    # workspace may already be partly updated
+    if journal.plan is None:
+        entities = _plan_entities_bulk(conversation, workspace_id,
+                                       entity_data, config_data,
+                                       entities_to_add, original)
+        if entities is None:
+            print('Entities unchanged, skipping update')
+            return
+        journal.set_plan(entities)
+
+    completed = 0
+    while 'update:{}'.format(completed) in journal:
+        completed += 1
+    updates = _update_workspace_collection(
+        conversation,
+        workspace_id,
+        'entities',
+        journal.plan,
+        config_data.get('chunk_size', _DEFAULT_CHUNK_SIZE),
+        _get_entity_size,
+        completed,
+        lambda index: journal.record('update:{}'.format(index)),
+        original)
+    print('{} entities updated in {} workspace updates'.format(
+        len(journal.plan),
+        updates))
+
+def _plan_entities_bulk(
+        conversation: ConversationV1,
+        workspace_id: str,
+        entity_data: pd.DataFrame,
+        config_data: dict,
+        entities_to_add: Dict[str, List[dict]] = None,
+        original: List[dict] = None) -> Union[List[dict], None]:
+    """ Apply the entity data to an export of the workspace in memory
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: target workspace id
+    entity_data: DataFrame of entity data with columns
+        [action, entity, value, synonym]
+    config_data: Dict of configuration options (see `_load_entity_data`)
+    entities_to_add: dict of entity name to values, in place of
+        entity_data
+    original: list filled with every entity of the workspace before the
+        changes, as they would be sent
+
+    returns:
+    entities: every entity of the updated workspace, or None if nothing
+        changed
+    """
+    export = config_data.get('workspace_export')
+    if export is None:
+        export = conversation.get_workspace(
+            workspace_id=workspace_id,
+            export=True)
+
+    # entities as they will be sent, without audit fields
+    existing = {}
+    for entity in export.get('entities', []):
+        existing[entity['entity']] = {
+            key: value for key, value in entity.items() \
+                if key not in _AUDIT_KEYS + ['values']}
+        existing[entity['entity']]['values'] = [
+            {key: value for key, value in entity_value.items() \
+                if key not in _AUDIT_KEYS} \
+            for entity_value in entity.get('values', [])]
+    entities = {name: dict(entity) for name, entity in existing.items()}
+    if original is not None:
+        original.extend(existing.values())
+    entity_names = list(entities_to_add) if entities_to_add is not None \
+        else entity_data['entity'].unique()
+
+    # optionally destroy any existing entities
+    if config_data.get('clear_existing'):
+        for entity_name in entity_names:
+            if entities.pop(entity_name, None) is not None:
+                print("entity '{}' removed".format(entity_name))
+
+    # remove all the requested deletions first
+    # copies have no removes
+    rows_to_remove = entity_data[entity_data['action'] == 'REMOVE'].iterrows() \
+        if entity_data is not None else []
+    for _, row in rows_to_remove:
+        if row['entity'] == '' or \
+                (row['value'] == '' and row['synonym'] != ''):
+            print(repr(ValueError('Invalid REMOVE in entity data')))
+            continue
+        if row['entity'] not in entities:
+            print(("Entity '{}' does not exist. "
+                   "Nothing to remove").format(row['entity']))
+            continue
+        # remove entire entity
+        if row['value'] == '':
+            del entities[row['entity']]
+            print("Entity '{}' removed.".format(row['entity']))
+            continue
+
+        entity = entities[row['entity']]
+        values = [x for x in entity['values'] if x['value'] != row['value']]
+        if len(values) == len(entity['values']):
+            print(("Value '{}' does not exist "
+                   "for entity '{}'. Nothing to "
+                   "remove").format(
+                       row['value'],
+                       row['entity']))
+        # remove entire value
+        elif row['synonym'] == '':
+            entity['values'] = values
+        # remove single synonym
+        else:
+            final_values = []
+            for value in entity['values']:
+                if value['value'] == row['value'] and \
+                        row['synonym'] in value.get('synonyms', []):
+                    value = dict(value)
+                    value['synonyms'] = [x for x in value['synonyms'] \
+                        if x != row['synonym']]
+                elif value['value'] == row['value']:
+                    print(("Synyonym '{}' for value '{}' does not exist "
+                           "for entity '{}'. Nothing to "
+                           "remove").format(
+                               row['synonym'],
+                               row['value'],
+                               row['entity']))
+                final_values.append(value)
+            entity['values'] = final_values
+
+    # merge in the adds
+    if entities_to_add is None:
+        entities_to_add = _group_values(entity_data)
+    for entity_name, new_values in entities_to_add.items():
+        entity = entities.get(entity_name)
+        if entity is None:
+            entities[entity_name] = {
+                'entity': entity_name,
+                'values': new_values}
+            continue
+        entity['values'], _ = _merge_values(
+            entity_name,
+            entity['values'],
+            new_values)
+
+    if entities == existing:
+        return None
+    return list(entities.values())
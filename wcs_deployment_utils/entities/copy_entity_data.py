@@ -8,11 +8,14 @@ Included in this module are:
 copy_entity_data: copies entity data from a source workspace
 """
 from datetime import datetime
-import pandas as pd
-from watson_developer_cloud import ConversationV1, WatsonException
+from typing import Union
+from watson_developer_cloud import WatsonException
 from ..util.get_and_backup_workspace import get_and_backup_workspace
-from ._util import _load_entity_data
+from ..util.load_workspace_export import load_workspace_export
+from ._util import _get_export_values, _load_entity_data
+from .._api import _get_conversation
 from .._constants import _DEFAULT_BACKUP_FILE
+from .._instrumentation import _span
 
 def copy_entity_data(entity=None,
                      source_username=None,
@@ -23,7 +26,9 @@ def copy_entity_data(entity=None,
                      target_workspace=None,
                      version=None,
                      clear_existing=False,
-                     target_backup_file: str = _DEFAULT_BACKUP_FILE) -> None:
+                     target_backup_file: str = _DEFAULT_BACKUP_FILE,
+                     source_export: Union[str, dict, None] = None,
+                     delta: Union[bool, None] = None) -> None:
     """ Copy entity data from a WCS workspace
 
     Copy entity data in an additive pattern from a source workspace
@@ -41,19 +46,27 @@ def copy_entity_data(entity=None,
     version: version of WCS instances
     clear_existing: boolean to clear existing intent data from target
     target_backup_file: backup existing target workspace to this file
+    source_export: export of the source workspace (dict or file path). if
+        provided, the source credentials are not required
+    delta: create new values and synonyms of an existing entity one by
+        one (True), re-send the whole entity (False) or pick whichever is
+        cheaper (None)
     """
 
     # validate that values are provided
     args = locals()
-    for key in [
-            'entity',
+    required = [
+        'entity',
+        'target_username',
+        'target_password',
+        'target_workspace',
+        'version']
+    if source_export is None:
+        required += [
             'source_username',
             'source_password',
-            'source_workspace',
-            'target_username',
-            'target_password',
-            'target_workspace',
-            'version']:
+            'source_workspace']
+    for key in required:
         if args[key] is None:
             raise ValueError("Argument '{}' requires a value".format(key))
 
@@ -72,58 +85,44 @@ def copy_entity_data(entity=None,
         export_path=target_backup_file)
 
     # setup conversation class
-    target_conv = ConversationV1(
-        username=target_username,
-        password=target_password,
-        version=version
-    )
-
-    source_conv = ConversationV1(
-        username=source_username,
-        password=source_password,
-        version=version
-    )
+    target_conv = _get_conversation(
+        target_username,
+        target_password,
+        version)
 
     # load data
-    try:
-        entity_data_res = source_conv.get_entity(
-            workspace_id=source_workspace,
-            entity=entity,
-            export=True
-        )
-    except WatsonException:
-        raise ValueError("Unable to read source entity")
-
-    entity_values = []
-    entity_synonyms = []
-    for value in entity_data_res['values']:
-        # break out of anything except synonyms
-        if value['type'] != 'synonyms':
-            continue
-
-        if not value['synonyms']:
-            entity_values.append(value['value'])
-            entity_synonyms.append('')
-
-        for synonym in value['synonyms']:
-            entity_values.append(value['value'])
-            entity_synonyms.append(synonym)
-
-    # generate the dataframe
-    entity_data = pd.DataFrame(data={
-        "action": ['ADD'] * len(entity_synonyms),
-        "entity": [entity] * len(entity_synonyms),
-        "value": entity_values,
-        "synonym": entity_synonyms
-    })
+    if source_export is None:
+        source_conv = _get_conversation(
+            source_username,
+            source_password,
+            version)
+        try:
+            entity_data_res = source_conv.get_entity(
+                workspace_id=source_workspace,
+                entity=entity,
+                export=True
+            )
+        except WatsonException:
+            raise ValueError("Unable to read source entity")
+    else:
+        source_export = load_workspace_export(source_export)
+        matches = [x for x in source_export['entities'] if x['entity'] == entity]
+        if not matches:
+            raise ValueError("Unable to read source entity")
+        entity_data_res = matches[0]
+
+    # the values go straight to the merge, without a DataFrame
+    entities_to_add = {entity: _get_export_values(entity_data_res)}
     config_data = {
-        "clear_existing": clear_existing
+        "clear_existing": clear_existing,
+        "delta": delta
     }
 
     # call the function
-    _load_entity_data(conversation=target_conv,
-                      workspace_id=target_workspace,
-                      entity_data=entity_data,
-                      config_data=config_data)
+    with _span('apply'):
+        _load_entity_data(conversation=target_conv,
+                          workspace_id=target_workspace,
+                          config_data=config_data,
+                          entities_to_add=entities_to_add)
 
     print("copy_entity_data for '{}' complete.".format(entity))
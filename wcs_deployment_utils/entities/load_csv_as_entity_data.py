@@ -9,11 +9,20 @@ load_csv_as_entity_data: Loads entity data from a CSV
 """
 
 from datetime import datetime
+from typing import Union
 import pandas as pd
-from watson_developer_cloud import ConversationV1
 from ..util.get_and_backup_workspace import get_and_backup_workspace
 from ._util import _load_entity_data
-from .._constants import _DEFAULT_BACKUP_FILE
+from .._api import _get_conversation
+from .._constants import _DEFAULT_BACKUP_FILE, _DEFAULT_CHUNK_SIZE
+from .._instrumentation import _span
+from .._journal import _Journal, _get_fingerprint
+from .._state import (
+    _get_applied_groups,
+    _hash_groups,
+    _read_state,
+    _write_state
+    )
 
 # Right now this doesn't support patterns. This should be
 # updated when the APIs for managing patterns are made available
@@ -29,7 +38,12 @@ def load_csv_as_entity_data(
         workspace: str = None,
         csv_file: str = None,
         clear_existing: bool = False,
-        target_backup_file: str = _DEFAULT_BACKUP_FILE) -> None:
+        target_backup_file: str = _DEFAULT_BACKUP_FILE,
+        bulk: bool = False,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        delta: Union[bool, None] = None,
+        journal_file: Union[str, None] = None,
+        state_file: Union[str, None] = None) -> None:
 
     """ Load entity data from a CSV file
 
@@ -53,6 +67,21 @@ def load_csv_as_entity_data(
     csv_file: CSV file containing data
     clear_existing: if true, any specified intents that exist will be cleared
     target_backup_file: backup workspace to this file before making changes
+    bulk: apply every change through a few chunked workspace updates
+        instead of one request per entity
+    chunk_size: bulk only, maximum number of values and synonyms per workspace
+        update
+    delta: create new values and synonyms of an existing entity one by
+        one (True), re-send the whole entity (False) or pick whichever is
+        cheaper (None)
+    journal_file: record each change in this file once applied. if the
+        load is interrupted, running it again with the same file and
+        options resumes with the first change not applied. the file is
+        removed once every change is applied
+    state_file: record a hash of the rows of each entity in this file once
+        they are applied to the workspace. later loads with the same file
+        skip the entities whose rows have not changed. remove the file to
+        apply every row again
     """
 
     # validate that values are provided
@@ -66,12 +95,44 @@ def load_csv_as_entity_data(
         if args[key] is None:
             raise ValueError("Argument '{}' requires a value".format(key))
 
+    # load data
+    with _span('csv_read'):
+        entity_data = pd.read_csv(
+            csv_file,
+            dtype='str',
+            keep_default_na=False)
+
+    # entities whose rows were all applied by an earlier load are skipped
+    if state_file is not None:
+        hashes = _hash_groups(
+            entity_data,
+            'entity',
+            clear_existing=clear_existing)
+        applied = _read_state(state_file, workspace, 'entities')
+        unchanged = [x for x, digest in hashes.items() \
+            if applied.get(x) == digest]
+        entity_data = entity_data[~entity_data['entity'].isin(unchanged)]
+        if entity_data.empty:
+            print(("load_csv_as_entity_data for '{}' unchanged "
+                   "since the last load, skipping").format(csv_file))
+            return
+
+    # changes already applied by an interrupted load are skipped
+    journal = _Journal()
+    if journal_file is not None:
+        journal = _Journal(journal_file, _get_fingerprint(
+            csv_file,
+            load='entity',
+            workspace=workspace,
+            clear_existing=clear_existing,
+            bulk=bulk,
+            chunk_size=chunk_size))
+
     # setup conversation class
-    conversation = ConversationV1(
-        username=conversation_username,
-        password=conversation_password,
-        version=version
-    )
+    conversation = _get_conversation(
+        conversation_username,
+        conversation_password,
+        version)
 
     # build backup file if not specified
     # otherwise just call it the POSIX timestamp
@@ -80,7 +141,7 @@ def load_csv_as_entity_data(
             str(datetime.now().timestamp()))
 
     # backup our target instance
-    _ = get_and_backup_workspace(
+    target_export = get_and_backup_workspace(
         username=conversation_username,
         password=conversation_password,
         workspace=workspace,
@@ -88,21 +149,30 @@ def load_csv_as_entity_data(
         export_path=target_backup_file
     )
 
-    # load data
-    entity_data = pd.read_csv(
-        csv_file,
-        dtype='str',
-        keep_default_na=False)
-
     # default values
     config_data = {
-        "clear_existing": clear_existing
+        "clear_existing": clear_existing,
+        "bulk": bulk,
+        "chunk_size": chunk_size,
+        "workspace_export": target_export,
+        "journal": journal,
+        "delta": delta
     }
 
     # call the function
-    _load_entity_data(conversation=conversation,
-                      workspace_id=workspace,
-                      entity_data=entity_data,
-                      config_data=config_data)
+    with _span('apply'):
+        _load_entity_data(conversation=conversation,
+                          workspace_id=workspace,
+                          entity_data=entity_data,
+                          config_data=config_data)
+    if state_file is not None:
+        applied = _get_applied_groups(
+            entity_data,
+            'entity',
+            None if bulk else journal.applied,
+            clear_existing)
+        _write_state(state_file, workspace, 'entities',
+                     {x: hashes[x] for x in applied})
+    journal.finish()
     print(("load_csv_as_entity_data "
            "for '{}' complete.").format(csv_file))
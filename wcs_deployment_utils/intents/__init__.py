@@ -1,6 +1,8 @@
 """ Intents package
 """
-from .copy_intent_data import copy_intent_data as copy_intent_data
-from .load_csv_as_intent_data import load_csv_as_intent_data  as load_csv_as_intent_data
+from .._lazy import _make_lazy
 
-__all__ = ['copy_intent_data', 'load_csv_as_intent_data']
+__all__ = ['copy_intent_data', 'copy_intents', 'load_csv_as_intent_data']
+
+# functions are imported from their modules on first use
+_make_lazy(__name__, {name: '.' + name for name in __all__})
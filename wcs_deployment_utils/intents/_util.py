@@ -2,13 +2,61 @@
 """
 
 import pandas as pd
+from typing import Dict, List, Tuple, Union
 from watson_developer_cloud import ConversationV1, WatsonException
 
+from .._api import _map_concurrently, _update_workspace_collection
+from .._constants import _AUDIT_KEYS, _DEFAULT_CHUNK_SIZE
+from .._journal import _Journal
+
+def _merge_examples(
+        existing_examples: List[str],
+        new_examples: List[str]) -> List[str]:
+    """ Merge new examples into existing examples. Existing examples keep
+    their order and new examples are appended in the order given, without
+    duplicates
+
+    parameters:
+    existing_examples: example texts of the existing intent
+    new_examples: example texts to add
+
+    returns:
+    examples: merged list of example texts
+    """
+    return list(dict.fromkeys(existing_examples + new_examples))
+
+def _group_examples(intent_data: pd.DataFrame) -> Dict[str, List[str]]:
+    """ Collect the examples of ADD rows by intent
+
+    parameters:
+    intent_data: DataFrame of intent data with columns
+        [action, intent, example]
+
+    returns:
+    intents_to_add: dict of intent name to examples, in the order given
+    """
+    intents_to_add = {}
+    rows_to_add = intent_data[intent_data['action'] == 'ADD']
+
+    for intent_name in rows_to_add['intent'].unique():
+        # load dictionary with empty lists
+        intents_to_add[intent_name] = []
+
+    # build intent data
+    for _, row in rows_to_add.iterrows():
+        # add the example to the to_add dictionary
+        # skip empty entries
+        if row['example'] == '':
+            continue
+        intents_to_add[row['intent']].append(row['example'])
+    return intents_to_add
+
 def _load_intent_data(
         conversation: ConversationV1 = None,
         workspace_id: str = None,
         intent_data: pd.DataFrame = None,
-        config_data: dict = None):
+        config_data: dict = None,
+        intents_to_add: Dict[str, List[str]] = None):
     """ Add all the intent data to the target workspace
 
     parameters:
@@ -16,14 +64,44 @@ def _load_intent_data(
     workspace_id: target workspace id
     intent_data: DataFrame of intent data with columns
         [action, intent, example]
+    intents_to_add: dict of intent name to examples, in place of
+        intent_data. used by copies, which have no removes
     config_data: Dict of configuration options
         clear_existing: will clear existing examples from target
+        bulk: apply every change through workspace updates instead of
+            one request per intent
+        chunk_size: bulk only, maximum number of examples per update
+        workspace_export: bulk only, export of the target workspace. the
+            workspace is exported if not provided
+        journal: `_Journal` of the units already applied, which are
+            skipped. applied units are recorded in it
+        max_workers: number of intents added at the same time. Default 1
     """
+    if intents_to_add is not None:
+        # like an empty DataFrame, intents without examples change nothing:
+        # they are neither created nor cleared
+        intents_to_add = {x: y for x, y in intents_to_add.items() if y}
+
+    if config_data.get('bulk'):
+        _load_intent_data_bulk(
+            conversation,
+            workspace_id,
+            intent_data,
+            config_data,
+            intents_to_add)
+        return
+
+    journal = config_data.get('journal') or _Journal()
+    intent_names = list(intents_to_add) if intents_to_add is not None \
+        else intent_data['intent'].unique()
 
     # optionally destroy any existing intents
     try:
         if config_data['clear_existing']:
-            for intent_name in intent_data['intent'].unique():
+            for intent_name in intent_names:
+                unit = 'clear:{}'.format(intent_name)
+                if unit in journal:
+                    continue
                 try:
                     conversation.delete_intent(workspace_id=workspace_id,
                                                intent=intent_name)
@@ -31,12 +109,18 @@ def _load_intent_data(
                 except WatsonException:
                     print(("Intent '{}' does not exist"
                            ", nothing to remove").format(intent_name))
+                journal.record(unit)
     except KeyError:
         print('Invalid config.json file')
 
     # handle removes
-    rows_to_remove = intent_data[intent_data['action'] == 'REMOVE']
-    for _, row in rows_to_remove.iterrows():
+    # copies have no removes
+    rows_to_remove = intent_data[intent_data['action'] == 'REMOVE'].iterrows() \
+        if intent_data is not None else []
+    for index, row in rows_to_remove:
+        unit = 'remove:{}'.format(index)
+        if unit in journal:
+            continue
         try:
             # delete entire intent
             if row['intent'] != '' and row['example'] == '':
@@ -52,6 +136,8 @@ def _load_intent_data(
                         # If no error is thrown, the intent failed to remove
                         print("Intent '{}' failed to remove".format(
                             row['intent']))
+                        journal.failed = True
+                        continue
                     # if error is thrown, the example never existed so
                     # nothing else to do
                     except WatsonException:
@@ -78,6 +164,8 @@ def _load_intent_data(
                                "example {}").format(
                                    row['example'],
                                    row['intent']))
+                        journal.failed = True
+                        continue
                     # if error is thrown, the example never existed so
                     # nothing else to do
                     except WatsonException:
@@ -89,27 +177,23 @@ def _load_intent_data(
         except KeyError:
             print('Intent data is not properly formed.')
             return
+        journal.record(unit)
 
     # collect all intents and examples into a dictionary
-    intents_to_add = {}
-    rows_to_add = intent_data[intent_data['action'] == 'ADD']
+    if intents_to_add is None:
+        intents_to_add = _group_examples(intent_data)
+    # skip the intents already added
+    intents_to_add = [x for x in intents_to_add.items() \
+        if 'add:{}'.format(x[0]) not in journal]
 
-    for intent_name in rows_to_add['intent'].unique():
-        # load dictionary with empty lists
-        intents_to_add[intent_name] = []
-
-    # build intent data
-    for _, row in rows_to_add.iterrows():
-        # add the example to the to_add dictionary
-        # skip empty entries
-        if row['example'] == '':
-            continue
-        intents_to_add[row['intent']].append(row['example'])
-    for intent_name, examples in intents_to_add.items():
+    def _add_intent(group: Tuple[str, List[str]]) -> None:
+        intent_name, examples = group
+        unit = 'add:{}'.format(intent_name)
         if intent_name != '' and not examples:
             print("No examples for intent '{}'".format(
                 intent_name))
-            continue
+            journal.record(unit)
+            return
         try:
             # check if intent exists already
             _existing_intent_response = conversation.get_intent(
@@ -125,8 +209,14 @@ def _load_intent_data(
             intent_exists = False
             existing_examples = []
         # combine the existing examples with the new ones
+        examples = _merge_examples(existing_examples, examples)
+        # merging only ever appends, so nothing new means nothing changed
+        if intent_exists and len(examples) == len(existing_examples):
+            print("Intent '{}' unchanged, skipping update".format(
+                intent_name))
+            journal.record(unit)
+            return
         try:
-            examples = list(set(existing_examples + examples))
             example_array = [{"text": x} for x in examples]
             # if the intent exists, we update, otherwise create
             if intent_exists:
@@ -146,6 +236,157 @@ def _load_intent_data(
                 print("Intent '{}' created with {} examples".format(
                     intent_name,
                     len(examples)))
+            journal.record(unit)
         except WatsonException as err:
             print(repr(err))
             print("Intent '{}' failed to create".format(intent_name))
+            journal.failed = True
+
+    # intents are independent of each other, so they can be added at the
+    # same time
+    _map_concurrently(
+        _add_intent,
+        intents_to_add,
+        config_data.get('max_workers', 1))
+
+def _load_intent_data_bulk(
+        conversation: ConversationV1 = None,
+        workspace_id: str = None,
+        intent_data: pd.DataFrame = None,
+        config_data: dict = None,
+        intents_to_add: Dict[str, List[str]] = None):
+    """ Apply all the intent data to the target workspace with as few
+    workspace updates as possible. The changes are applied to an export
+    of the workspace in memory, then every intent is sent in chunks
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: target workspace id
+    intent_data: DataFrame of intent data with columns
+        [action, intent, example]
+    config_data: Dict of configuration options (see `_load_intent_data`)
+    intents_to_add: dict of intent name to examples, in place of
+        intent_data
+    """
+    journal = config_data.get('journal') or _Journal()
+    # without a journal file a failed update can not be resumed, the
+    # original intents are restored instead
+    original = [] if journal.path is None else None
+    # a resumed load sends the intents planned by the interrupted one, the
+    # workspace may already be partly updated
+    if journal.plan is None:
+        intents = _plan_intents_bulk(conversation, workspace_id, intent_data,
+                                     config_data, intents_to_add, original)
+        if intents is None:
+            print('Intents unchanged, skipping update')
+            return
+        journal.set_plan(intents)
+
+    completed = 0
+    while 'update:{}'.format(completed) in journal:
+        completed += 1
+    updates = _update_workspace_collection(
+        conversation,
+        workspace_id,
+        'intents',
+        journal.plan,
+        config_data.get('chunk_size', _DEFAULT_CHUNK_SIZE),
+        lambda intent: max(1, len(intent['examples'])),
+        completed,
+        lambda index: journal.record('update:{}'.format(index)),
+        original)
+    print('{} intents updated in {} workspace updates'.format(
+        len(journal.plan),
+        updates))
+
+def _plan_intents_bulk(
+        conversation: ConversationV1,
+        workspace_id: str,
+        intent_data: pd.DataFrame,
+        config_data: dict,
+        intents_to_add: Dict[str, List[str]] = None,
+        original: List[dict] = None) -> Union[List[dict], None]:
+    """ Apply the intent data to an export of the workspace in memory
+
+    parameters:
+    conversation: instance of Conversation from WDC SDK
+    workspace_id: target workspace id
+    intent_data: DataFrame of intent data with columns
+        [action, intent, example]
+    config_data: Dict of configuration options (see `_load_intent_data`)
+    intents_to_add: dict of intent name to examples, in place of
+        intent_data
+    original: list filled with every intent of the workspace before the
+        changes, as they would be sent
+
+    returns:
+    intents: every intent of the updated workspace, or None if nothing
+        changed
+    """
+    export = config_data.get('workspace_export')
+    if export is None:
+        export = conversation.get_workspace(
+            workspace_id=workspace_id,
+            export=True)
+
+    # intents as they will be sent, without audit fields
+    existing = {}
+    for intent in export.get('intents', []):
+        existing[intent['intent']] = {
+            key: value for key, value in intent.items() \
+                if key not in _AUDIT_KEYS + ['examples']}
+        existing[intent['intent']]['examples'] = [{'text': example['text']} \
+            for example in intent.get('examples', [])]
+    intents = {name: dict(intent) for name, intent in existing.items()}
+    if original is not None:
+        original.extend(existing.values())
+    intent_names = list(intents_to_add) if intents_to_add is not None \
+        else intent_data['intent'].unique()
+
+    # optionally destroy any existing intents
+    if config_data.get('clear_existing'):
+        for intent_name in intent_names:
+            if intents.pop(intent_name, None) is not None:
+                print("Intent '{}' removed".format(intent_name))
+
+    # handle removes
+    # copies have no removes
+    rows_to_remove = intent_data[intent_data['action'] == 'REMOVE'].iterrows() \
+        if intent_data is not None else []
+    for _, row in rows_to_remove:
+        if row['intent'] not in intents:
+            print(("Intent '{}' does not "
+                   "exist. Nothing to remove").format(row['intent']))
+        # delete entire intent
+        elif row['example'] == '':
+            del intents[row['intent']]
+            print("Intent '{}' removed".format(row['intent']))
+        # delete intent example
+        else:
+            intent = intents[row['intent']]
+            examples = [x for x in intent['examples'] \
+                if x['text'] != row['example']]
+            if len(examples) == len(intent['examples']):
+                print(("Example '{}' does not "
+                       "exist for intent '{}'. Nothing "
+                       "to remove").format(
+                           row['example'],
+                           row['intent']))
+            intent['examples'] = examples
+
+    # merge in the adds
+    if intents_to_add is None:
+        intents_to_add = _group_examples(intent_data)
+    for intent_name, examples in intents_to_add.items():
+        if intent_name != '' and not examples:
+            print("No examples for intent '{}'".format(
+                intent_name))
+            continue
+        intent = intents.setdefault(intent_name, {'intent': intent_name})
+        existing_examples = [x['text'] for x in intent.get('examples', [])]
+        intent['examples'] = [{'text': x} for x in \
+            _merge_examples(existing_examples, examples)]
+
+    if intents == existing:
+        return None
+    return list(intents.values())
@@ -8,11 +8,14 @@ Included in this module are:
 copy_intent_data: copies intent data from a source workspace
 """
 from datetime import datetime
-import pandas as pd
-from watson_developer_cloud import ConversationV1, WatsonException
+from typing import Union
+from watson_developer_cloud import WatsonException
 from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
 from ._util import _load_intent_data
+from .._api import _get_conversation
 from .._constants import _DEFAULT_BACKUP_FILE
+from .._instrumentation import _span
 
 def copy_intent_data(intent: str = None,
                      source_username: str = None,
@@ -23,7 +26,8 @@ def copy_intent_data(intent: str = None,
                      target_workspace: str = None,
                      version: str = None,
                      clear_existing: bool = False,
-                     target_backup_file: str = _DEFAULT_BACKUP_FILE) -> None:
+                     target_backup_file: str = _DEFAULT_BACKUP_FILE,
+                     source_export: Union[str, dict, None] = None) -> None:
     """ Copy intent data from a WCS workspace
 
     Copy intent data in an additive pattern from a source workspace
@@ -42,19 +46,24 @@ def copy_intent_data(intent: str = None,
     version: version of WCS instances
     clear_existing: boolean to clear existing intent data from target
     target_backup_file: backup existing target workspace to this file
+    source_export: export of the source workspace (dict or file path). if
+        provided, the source credentials are not required
     """
 
     # validate that values are provided
     args = locals()
-    for key in [
-            'intent',
+    required = [
+        'intent',
+        'target_username',
+        'target_password',
+        'target_workspace',
+        'version']
+    if source_export is None:
+        required += [
             'source_username',
             'source_password',
-            'source_workspace',
-            'target_username',
-            'target_password',
-            'target_workspace',
-            'version']:
+            'source_workspace']
+    for key in required:
         if args[key] is None:
             raise ValueError("Argument '{}' requires a value".format(key))
 
@@ -73,46 +82,46 @@ def copy_intent_data(intent: str = None,
         export_path=target_backup_file)
 
     # setup conversation class
-    target_conv = ConversationV1(
-        username=target_username,
-        password=target_password,
-        version=version
-    )
-
-    source_conv = ConversationV1(
-        username=source_username,
-        password=source_password,
-        version=version
-    )
+    target_conv = _get_conversation(
+        target_username,
+        target_password,
+        version)
 
     # load data
-    try:
-        intent_data_res = source_conv.get_intent(
-            workspace_id=source_workspace,
-            intent=intent,
-            export=True
-        )
-    except WatsonException:
-        raise ValueError("Unable to read source intent")
-
-    intent_examples = []
-    for example in intent_data_res['examples']:
-        intent_examples.append(example['text'])
-
-    intent_data = pd.DataFrame(data={
-        "action": ['ADD'] * len(intent_examples),
-        "intent": [intent] * len(intent_examples),
-        "example": intent_examples
-    })
+    if source_export is None:
+        source_conv = _get_conversation(
+            source_username,
+            source_password,
+            version)
+        try:
+            intent_data_res = source_conv.get_intent(
+                workspace_id=source_workspace,
+                intent=intent,
+                export=True
+            )
+        except WatsonException:
+            raise ValueError("Unable to read source intent")
+    else:
+        source_export = load_workspace_export(source_export)
+        matches = [x for x in source_export['intents'] if x['intent'] == intent]
+        if not matches:
+            raise ValueError("Unable to read source intent")
+        intent_data_res = matches[0]
+
+    # the examples go straight to the merge, without a DataFrame
+    intents_to_add = {
+        intent: [example['text'] for example in intent_data_res['examples']]
+    }
 
     config_data = {
         "clear_existing": clear_existing
     }
 
     # call the function
-    _load_intent_data(conversation=target_conv,
-                      workspace_id=target_workspace,
-                      intent_data=intent_data,
-                      config_data=config_data)
+    with _span('apply'):
+        _load_intent_data(conversation=target_conv,
+                          workspace_id=target_workspace,
+                          config_data=config_data,
+                          intents_to_add=intents_to_add)
 
     print("copy_intent_data for '{}' complete.".format(intent))
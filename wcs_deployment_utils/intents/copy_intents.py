@@ -0,0 +1,142 @@
+""" Copy Intents Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+copy_intents: copies many intents from a source workspace at once
+"""
+from datetime import datetime
+from typing import List, Union
+from ..util.get_and_backup_workspace import get_and_backup_workspace
+from ..util.load_workspace_export import load_workspace_export
+from ._util import _load_intent_data
+from .._api import _get_conversation
+from .._constants import (
+    _DEFAULT_BACKUP_FILE,
+    _DEFAULT_CHUNK_SIZE,
+    _DEFAULT_MAX_WORKERS
+    )
+from .._instrumentation import _span
+from .._patterns import _match_names
+
+def copy_intents(intents: Union[str, List[str]] = None,
+                 source_username: str = None,
+                 source_password: str = None,
+                 source_workspace: str = None,
+                 target_username: str = None,
+                 target_password: str = None,
+                 target_workspace: str = None,
+                 version: str = None,
+                 clear_existing: bool = False,
+                 target_backup_file: str = _DEFAULT_BACKUP_FILE,
+                 source_export: Union[str, dict, None] = None,
+                 regex: bool = False,
+                 bulk: bool = False,
+                 chunk_size: int = _DEFAULT_CHUNK_SIZE,
+                 max_workers: int = _DEFAULT_MAX_WORKERS) -> List[str]:
+    """ Copy many intents from a WCS workspace
+
+    Intents are selected from a single export of the source workspace, the
+    target workspace is backed up once and the intents are copied at the
+    same time. Like `copy_intent_data`, copies are additive with existing
+    data unless clear_existing is specified
+
+    parameters:
+    intents: name or pattern, or list of names and patterns, of the intents
+        to copy. patterns are shell style wildcards (ex. 'order_*') unless
+        `regex` is set. each pattern must match at least one intent
+    source_username: username for source WCS instance
+    source_password: password for source WCS instance
+    source_workspace: workspace id for source WCS instance
+    target_username: username for target WCS instance
+    target_password: password for target WCS instance
+    target_workspace: workspace id for target WCS instance
+    version: version of WCS instances
+    clear_existing: boolean to clear existing intent data from target
+    target_backup_file: backup existing target workspace to this file
+    source_export: export of the source workspace (dict or file path). if
+        provided, the source credentials are not required
+    regex: patterns are regular expressions matching the whole intent name
+    bulk: apply every change through a few chunked workspace updates
+        instead of one request per intent
+    chunk_size: bulk only, maximum number of examples per workspace
+        update
+    max_workers: number of intents copied at the same time
+
+    returns:
+    intents: names of the intents copied
+    """
+    # validate that values are provided
+    args = locals()
+    required = [
+        'intents',
+        'target_username',
+        'target_password',
+        'target_workspace',
+        'version']
+    if source_export is None:
+        required += [
+            'source_username',
+            'source_password',
+            'source_workspace']
+    for key in required:
+        if args[key] is None:
+            raise ValueError("Argument '{}' requires a value".format(key))
+
+    # select the intents from a single export of the source
+    if source_export is None:
+        source_export = get_and_backup_workspace(
+            username=source_username,
+            password=source_password,
+            workspace=source_workspace,
+            version=version)
+    else:
+        source_export = load_workspace_export(source_export)
+    source_intents = {x['intent']: x for x in source_export['intents']}
+    names = _match_names(list(source_intents), intents, regex)
+
+    # build backup file if not specified
+    # otherwise just call it the POSIX timestamp
+    if target_backup_file == _DEFAULT_BACKUP_FILE:
+        target_backup_file = _DEFAULT_BACKUP_FILE.format(
+            str(datetime.now().timestamp()))
+
+    # backup our target instance
+    target_export = get_and_backup_workspace(
+        username=target_username,
+        password=target_password,
+        workspace=target_workspace,
+        version=version,
+        export_path=target_backup_file)
+
+    # setup conversation class
+    target_conv = _get_conversation(
+        target_username,
+        target_password,
+        version)
+
+    # the examples go straight to the merge, without a DataFrame
+    intents_to_add = {
+        name: [example['text'] for example in source_intents[name]['examples']]
+        for name in names
+    }
+
+    config_data = {
+        "clear_existing": clear_existing,
+        "bulk": bulk,
+        "chunk_size": chunk_size,
+        "workspace_export": target_export,
+        "max_workers": max_workers
+    }
+
+    # call the function
+    with _span('apply'):
+        _load_intent_data(conversation=target_conv,
+                          workspace_id=target_workspace,
+                          config_data=config_data,
+                          intents_to_add=intents_to_add)
+
+    print("copy_intents for {} intents complete.".format(len(names)))
+    return names
@@ -9,11 +9,20 @@ load_csv_as_intent_data: Loads intent data from a CSV
 """
 
 from datetime import datetime
+from typing import Union
 import pandas as pd
-from watson_developer_cloud import ConversationV1
 from ..util.get_and_backup_workspace import get_and_backup_workspace
 from ._util import _load_intent_data
-from .._constants import _DEFAULT_BACKUP_FILE
+from .._api import _get_conversation
+from .._constants import _DEFAULT_BACKUP_FILE, _DEFAULT_CHUNK_SIZE
+from .._instrumentation import _span
+from .._journal import _Journal, _get_fingerprint
+from .._state import (
+    _get_applied_groups,
+    _hash_groups,
+    _read_state,
+    _write_state
+    )
 
 def load_csv_as_intent_data(
         conversation_username: str = None,
@@ -22,7 +31,11 @@ def load_csv_as_intent_data(
         workspace: str = None,
         csv_file: str = None,
         clear_existing: bool = False,
-        target_backup_file: str = _DEFAULT_BACKUP_FILE) -> None:
+        target_backup_file: str = _DEFAULT_BACKUP_FILE,
+        bulk: bool = False,
+        chunk_size: int = _DEFAULT_CHUNK_SIZE,
+        journal_file: Union[str, None] = None,
+        state_file: Union[str, None] = None) -> None:
     """ Load intent data from a CSV file
 
     CSV file will be of the following structure:
@@ -43,6 +56,18 @@ def load_csv_as_intent_data(
     csv_file: CSV file containing data
     clear_existing: if true, any specified intents that exist will be cleared
     target_backup_file: backup workspace to this file before making changes
+    bulk: apply every change through a few chunked workspace updates
+        instead of one request per intent
+    chunk_size: bulk only, maximum number of examples per workspace
+        update
+    journal_file: record each change in this file once applied. if the
+        load is interrupted, running it again with the same file and
+        options resumes with the first change not applied. the file is
+        removed once every change is applied
+    state_file: record a hash of the rows of each intent in this file once
+        they are applied to the workspace. later loads with the same file
+        skip the intents whose rows have not changed. remove the file to
+        apply every row again
     """
     # validate that values are provided
     args = locals()
@@ -55,12 +80,44 @@ def load_csv_as_intent_data(
         if args[key] is None:
             raise ValueError("Argument '{}' requires a value".format(key))
 
+    # load data
+    with _span('csv_read'):
+        intent_data = pd.read_csv(
+            csv_file,
+            dtype='str',
+            keep_default_na=False)
+
+    # intents whose rows were all applied by an earlier load are skipped
+    if state_file is not None:
+        hashes = _hash_groups(
+            intent_data,
+            'intent',
+            clear_existing=clear_existing)
+        applied = _read_state(state_file, workspace, 'intents')
+        unchanged = [x for x, digest in hashes.items() \
+            if applied.get(x) == digest]
+        intent_data = intent_data[~intent_data['intent'].isin(unchanged)]
+        if intent_data.empty:
+            print(("load_csv_as_intent_data for '{}' unchanged "
+                   "since the last load, skipping").format(csv_file))
+            return
+
+    # changes already applied by an interrupted load are skipped
+    journal = _Journal()
+    if journal_file is not None:
+        journal = _Journal(journal_file, _get_fingerprint(
+            csv_file,
+            load='intent',
+            workspace=workspace,
+            clear_existing=clear_existing,
+            bulk=bulk,
+            chunk_size=chunk_size))
+
     # setup conversation class
-    conversation = ConversationV1(
-        username=conversation_username,
-        password=conversation_password,
-        version=version
-    )
+    conversation = _get_conversation(
+        conversation_username,
+        conversation_password,
+        version)
 
     # build backup file if not specified
     # otherwise just call it the POSIX timestamp
@@ -69,7 +126,7 @@ def load_csv_as_intent_data(
             str(datetime.now().timestamp()))
 
     # backup our target instance
-    _ = get_and_backup_workspace(
+    target_export = get_and_backup_workspace(
         username=conversation_username,
         password=conversation_password,
         workspace=workspace,
@@ -77,21 +134,29 @@ def load_csv_as_intent_data(
         export_path=target_backup_file
     )
 
-    # load data
-    intent_data = pd.read_csv(
-        csv_file,
-        dtype='str',
-        keep_default_na=False)
-
     # config values
     config_data = {
-        "clear_existing": clear_existing
+        "clear_existing": clear_existing,
+        "bulk": bulk,
+        "chunk_size": chunk_size,
+        "workspace_export": target_export,
+        "journal": journal
     }
 
     # call the function
-    _load_intent_data(conversation=conversation,
-                      workspace_id=workspace,
-                      intent_data=intent_data,
-                      config_data=config_data)
+    with _span('apply'):
+        _load_intent_data(conversation=conversation,
+                          workspace_id=workspace,
+                          intent_data=intent_data,
+                          config_data=config_data)
+    if state_file is not None:
+        applied = _get_applied_groups(
+            intent_data,
+            'intent',
+            None if bulk else journal.applied,
+            clear_existing)
+        _write_state(state_file, workspace, 'intents',
+                     {x: hashes[x] for x in applied})
+    journal.finish()
     print(("load_csv_as_intent_data "
            "for '{}' complete.").format(csv_file))
@@ -1,5 +1,28 @@
 """ Utility Functions
 """
-from .get_and_backup_workspace import get_and_backup_workspace as get_and_backup_workspace
+from .._lazy import _make_lazy
 
-__all__ = ['get_and_backup_workspace']
\ No newline at end of file
+__all__ = [
+    'configure_api',
+    'diff_workspaces',
+    'get_and_backup_workspace',
+    'index_workspaces',
+    'instrument',
+    'Instrumentation',
+    'load_workspace_export',
+    'run_manifest',
+    'sync_workspace',
+    'WorkspaceIndex']
+
+# functions are imported from their modules on first use
+_make_lazy(__name__, {
+    'configure_api': '.configure_api',
+    'diff_workspaces': '.diff_workspaces',
+    'get_and_backup_workspace': '.get_and_backup_workspace',
+    'index_workspaces': '.index_workspaces',
+    'instrument': '.instrument',
+    'Instrumentation': '.instrument',
+    'load_workspace_export': '.load_workspace_export',
+    'run_manifest': '.run_manifest',
+    'sync_workspace': '.sync_workspace',
+    'WorkspaceIndex': '.index_workspaces'})
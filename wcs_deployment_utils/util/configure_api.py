@@ -0,0 +1,50 @@
+""" Configure API Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+configure_api: Sets the rate limit, retry and timeout policy for WCS calls
+"""
+
+from typing import Union
+
+from .._api import _set_policy
+
+def configure_api(username: Union[str, None] = None,
+                  rate_limit: Union[float, None] = None,
+                  burst: Union[int, None] = None,
+                  max_retries: Union[int, None] = None,
+                  backoff: Union[float, None] = None,
+                  max_backoff: Union[float, None] = None,
+                  timeout: Union[float, None] = None) -> dict:
+    """ Sets the policy used for every call made to a WCS instance. Calls
+    are rate limited with a token bucket per instance. Throttled (429),
+    failed (5xx) and timed out calls are retried with exponential backoff
+    and jitter, or after the delay given by `Retry-After`
+
+    Only the values provided are changed.
+
+    parameters:
+    username: WCS username of the instance to configure. Default None
+        configures every instance without its own policy
+    rate_limit: maximum requests per second, 0 for no limit. Default 0
+    burst: requests that can be made at once before the rate limit
+        applies. Default 1
+    max_retries: retries per call before giving up. Default 5
+    backoff: seconds to wait before the first retry, doubled for each
+        retry. Default 0.5
+    max_backoff: maximum seconds to wait between retries. Default 30
+    timeout: seconds to wait for the service to respond. Default 60
+
+    returns:
+    policy: the resulting policy for the instance
+    """
+    args = locals()
+    values = {key: value for key, value in args.items() \
+        if key != 'username' and value is not None}
+    for key, value in values.items():
+        if value < 0:
+            raise ValueError("Argument '{}' can not be negative".format(key))
+    return _set_policy(username, **values)
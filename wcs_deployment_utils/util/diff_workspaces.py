@@ -0,0 +1,148 @@
+""" Diff Workspaces Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+diff_workspaces: Structural diff of two workspace exports
+"""
+
+from typing import Dict, Iterable, List, Tuple, Union
+
+from .._constants import _AUDIT_KEYS
+from .._instrumentation import _span
+from .load_workspace_export import load_workspace_export
+
+# dialog node keys that determine position in the tree
+_POSITION_KEYS = ['parent', 'previous_sibling']
+
+def diff_workspaces(
+        base: Union[str, dict] = None,
+        other: Union[str, dict] = None) -> Dict[str, Dict[str, list]]:
+    """ Compares two workspace exports (ex. a backup written by
+    `get_and_backup_workspace` and a live workspace). Every collection is
+    indexed by key, so the diff is linear in the size of the exports.
+    Audit timestamps are ignored
+
+    parameters:
+    base: workspace export (dict or file path, optionally `.gz`)
+    other: workspace export (dict or file path, optionally `.gz`) to
+        compare against `base`
+
+    returns:
+    diff: dict keyed by 'intents', 'examples', 'counterexamples',
+        'entities', 'values', 'synonyms' and 'dialog_nodes'. Each has lists
+        of 'added', 'removed' and (except examples, counterexamples and
+        synonyms) 'modified' keys in `other`; dialog nodes also have
+        'moved'. Intents, entities, counterexamples and dialog nodes are
+        keyed by name/id/text, examples by (intent, text), values by
+        (entity, value) and synonyms by (entity, value, synonym). Nested
+        changes are only listed for parents that are in both exports
+    """
+    base = load_workspace_export(base)
+    other = load_workspace_export(other)
+
+    with _span('diff'):
+        base_intents = _index(base.get('intents', []), 'intent')
+        other_intents = _index(other.get('intents', []), 'intent')
+        base_entities = _index(base.get('entities', []), 'entity')
+        other_entities = _index(other.get('entities', []), 'entity')
+        base_values = _index_values(base_entities, other_entities)
+        other_values = _index_values(other_entities, base_entities)
+
+        return {
+            'intents': _diff_index(
+                base_intents,
+                other_intents,
+                ['examples']),
+            'examples': _diff_keys(
+                _iter_examples(base_intents, other_intents),
+                _iter_examples(other_intents, base_intents)),
+            'counterexamples': _diff_keys(
+                (x['text'] for x in base.get('counterexamples', [])),
+                (x['text'] for x in other.get('counterexamples', []))),
+            'entities': _diff_index(
+                base_entities,
+                other_entities,
+                ['values']),
+            'values': _diff_index(
+                base_values,
+                other_values,
+                ['synonyms']),
+            'synonyms': _diff_keys(
+                _iter_synonyms(base_values, other_values),
+                _iter_synonyms(other_values, base_values)),
+            'dialog_nodes': _diff_dialog_nodes(
+                base.get('dialog_nodes', []),
+                other.get('dialog_nodes', []))}
+
+def _index(items: List[dict], key: str) -> Dict[str, dict]:
+    return {item[key]: item for item in items}
+
+# nested collections are only diffed when their parent is in both exports,
+# an added or removed parent already accounts for its contents
+
+def _index_values(
+        entities: Dict[str, dict],
+        shared: Dict[str, dict]) -> Dict[Tuple[str, str], dict]:
+    return {(entity, value['value']): value \
+        for entity, item in entities.items() if entity in shared \
+        for value in item.get('values', [])}
+
+def _iter_examples(
+        intents: Dict[str, dict],
+        shared: Dict[str, dict]) -> Iterable[Tuple[str, str]]:
+    for intent, item in intents.items():
+        if intent not in shared:
+            continue
+        for example in item.get('examples', []):
+            yield (intent, example['text'])
+
+def _iter_synonyms(
+        values: Dict[Tuple[str, str], dict],
+        shared: Dict[Tuple[str, str], dict]) -> \
+            Iterable[Tuple[str, str, str]]:
+    for (entity, value), item in values.items():
+        if (entity, value) not in shared:
+            continue
+        for synonym in item.get('synonyms', []):
+            yield (entity, value, synonym)
+
+def _content(item: dict, ignore: List[str]) -> dict:
+    return {key: value for key, value in item.items() \
+        if key not in _AUDIT_KEYS and key not in ignore}
+
+def _diff_keys(base: Iterable, other: Iterable) -> Dict[str, list]:
+    """ Diff of two collections that are identified entirely by key
+    """
+    # dicts keep the order of the export and drop duplicates
+    base = dict.fromkeys(base)
+    other = dict.fromkeys(other)
+    return {
+        'added': [x for x in other if x not in base],
+        'removed': [x for x in base if x not in other]}
+
+def _diff_index(
+        base: dict,
+        other: dict,
+        ignore: List[str]) -> Dict[str, list]:
+    """ Diff of two indexed collections. Nested collections in `ignore`
+    are diffed separately and do not count as modifications
+    """
+    diff = _diff_keys(base, other)
+    diff['modified'] = [key for key, item in other.items() \
+        if key in base and \
+            _content(item, ignore) != _content(base[key], ignore)]
+    return diff
+
+def _diff_dialog_nodes(
+        base_nodes: List[dict],
+        other_nodes: List[dict]) -> Dict[str, list]:
+    base = _index(base_nodes, 'dialog_node')
+    other = _index(other_nodes, 'dialog_node')
+    diff = _diff_index(base, other, _POSITION_KEYS)
+    diff['moved'] = [key for key, node in other.items() \
+        if key in base and \
+            any(node.get(x) != base[key].get(x) for x in _POSITION_KEYS)]
+    return diff
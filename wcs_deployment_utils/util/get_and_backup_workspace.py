@@ -10,10 +10,13 @@ get_and_backup_workspace: Copy dialog nodes from a source WCS workspace to a
 """
 
 from typing import Union
-from os import makedirs, path
+from os import close, makedirs, path, remove, replace
+from tempfile import mkstemp
+import gzip
 import json
 
-from watson_developer_cloud import ConversationV1
+from .._api import _get_conversation
+from .._instrumentation import _span
 
 def get_and_backup_workspace(username: str = None,
                              password: str = None,
@@ -27,28 +30,42 @@ def get_and_backup_workspace(username: str = None,
     password: WCS password
     workspace: WCS workspace id
     version: WCS API version
-    export_path: store export at this path
+    export_path: store export at this path. Paths ending in `.gz` are
+        written as gzip compressed JSON
 
     returns
     export: dict representation of WCS workspace
     """
     # build Conversation SDK object
-    conv = ConversationV1(
-        username=username,
-        password=password,
-        version=version
-    )
+    conv = _get_conversation(username, password, version)
 
     # get export of workspaces
-    export = conv.get_workspace(
-        workspace_id=workspace,
-        export=True)
+    with _span('export_download'):
+        export = conv.get_workspace(
+            workspace_id=workspace,
+            export=True)
 
     if export_path is not None:
         # make the directories if needed
         if path.dirname(export_path):
             makedirs(path.dirname(export_path), exist_ok=True)
-        with open(export_path, mode='w') as export_file:
-            json.dump(export, export_file)
+        # write to a temporary file first, so that backups of the same
+        # workspace written at the same time can not be interleaved
+        handle, temp_path = mkstemp(
+            dir=path.dirname(export_path) or '.',
+            suffix='.tmp')
+        close(handle)
+        try:
+            with _span('backup_write'):
+                if export_path.endswith('.gz'):
+                    export_file = gzip.open(temp_path, 'wt', encoding='utf8')
+                else:
+                    export_file = open(temp_path, mode='w')
+                with export_file:
+                    json.dump(export, export_file)
+            replace(temp_path, export_path)
+        except BaseException:
+            remove(temp_path)
+            raise
 
     return export
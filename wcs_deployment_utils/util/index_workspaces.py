@@ -0,0 +1,461 @@
+""" Index Workspaces Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+index_workspaces: Crawls every workspace of a WCS instance into a local
+    SQLite index
+WorkspaceIndex: Queries across the workspaces of the index
+"""
+
+import sqlite3
+import threading
+from os import makedirs, path
+from typing import Dict, List, Union
+from urllib.request import pathname2url
+
+from .._api import _get_conversation, _list_collection, _map_concurrently
+from ..dialog._util import _get_condition_references
+from .._constants import _DEFAULT_INDEX_FILE, _DEFAULT_MAX_WORKERS
+from .._instrumentation import _span
+
+# indexes built with another schema version are rebuilt
+_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE workspaces (
+    workspace_id TEXT PRIMARY KEY,
+    name TEXT,
+    username TEXT,
+    updated TEXT);
+CREATE TABLE intents (
+    workspace_id TEXT,
+    intent TEXT,
+    description TEXT,
+    PRIMARY KEY (workspace_id, intent));
+CREATE INDEX intents_intent ON intents (intent);
+CREATE TABLE examples (
+    workspace_id TEXT,
+    intent TEXT,
+    text TEXT);
+CREATE INDEX examples_workspace ON examples (workspace_id);
+CREATE INDEX examples_text ON examples (text COLLATE NOCASE);
+CREATE TABLE entities (
+    workspace_id TEXT,
+    entity TEXT,
+    description TEXT,
+    PRIMARY KEY (workspace_id, entity));
+CREATE INDEX entities_entity ON entities (entity);
+CREATE TABLE entity_values (
+    workspace_id TEXT,
+    entity TEXT,
+    value TEXT,
+    type TEXT);
+CREATE INDEX entity_values_workspace ON entity_values (workspace_id);
+CREATE INDEX entity_values_value ON entity_values (entity, value);
+CREATE TABLE synonyms (
+    workspace_id TEXT,
+    entity TEXT,
+    value TEXT,
+    synonym TEXT);
+CREATE INDEX synonyms_workspace ON synonyms (workspace_id);
+CREATE INDEX synonyms_synonym ON synonyms (synonym COLLATE NOCASE);
+CREATE TABLE dialog_nodes (
+    workspace_id TEXT,
+    dialog_node TEXT,
+    title TEXT,
+    type TEXT,
+    parent TEXT,
+    previous_sibling TEXT,
+    conditions TEXT,
+    PRIMARY KEY (workspace_id, dialog_node));
+CREATE TABLE jumps (
+    workspace_id TEXT,
+    dialog_node TEXT,
+    target TEXT,
+    selector TEXT);
+CREATE INDEX jumps_workspace ON jumps (workspace_id);
+CREATE INDEX jumps_target ON jumps (target);
+CREATE TABLE condition_references (
+    workspace_id TEXT,
+    dialog_node TEXT,
+    reference TEXT);
+CREATE INDEX condition_references_workspace
+    ON condition_references (workspace_id);
+CREATE INDEX condition_references_reference
+    ON condition_references (reference);
+"""
+
+# tables holding the contents of a workspace, cleared when it is indexed
+_CONTENT_TABLES = [
+    'intents',
+    'examples',
+    'entities',
+    'entity_values',
+    'synonyms',
+    'dialog_nodes',
+    'jumps',
+    'condition_references']
+
+def index_workspaces(username: str = None,
+                     password: str = None,
+                     version: str = None,
+                     index_file: str = _DEFAULT_INDEX_FILE,
+                     workspaces: Union[List[str], None] = None,
+                     max_workers: int = _DEFAULT_MAX_WORKERS) -> \
+                         Dict[str, List[str]]:
+    """ Crawls the workspaces of a WCS instance into a local SQLite index
+    of their intents, examples, entities, values, synonyms and dialog nodes
+    (with their conditions, the references in them and their jumps). Only
+    workspaces updated since they were last indexed are exported again,
+    several at the same time. Workspaces of several instances can share an
+    index
+
+    parameters:
+    username: WCS username
+    password: WCS password
+    version: WCS API version
+    index_file: path of the SQLite index, created if needed
+    workspaces: ids of the workspaces to index. Default every workspace of
+        the instance, in which case workspaces of the instance that no
+        longer exist are removed from the index
+    max_workers: number of workspaces exported at the same time
+
+    returns:
+    workspaces: dict of 'indexed', 'unchanged' and 'removed' workspace ids
+    """
+    # validate that values are provided
+    args = locals()
+    for key in ['username', 'password', 'version', 'index_file']:
+        if args[key] is None:
+            raise ValueError("Argument '{}' requires a value".format(key))
+
+    conv = _get_conversation(username, password, version)
+    with _span('list'):
+        listed = _list_collection(
+            conv,
+            None,
+            'workspaces',
+            include_audit=True)
+    if workspaces is not None:
+        missing = set(workspaces) - set(x['workspace_id'] for x in listed)
+        if missing:
+            raise ValueError("Workspaces not found: {}".format(
+                ', '.join(sorted(missing))))
+        listed = [x for x in listed if x['workspace_id'] in workspaces]
+
+    connection = _connect(index_file)
+    lock = threading.Lock()
+    try:
+        indexed = {row[0]: row[1] for row in connection.execute(
+            'SELECT workspace_id, updated FROM workspaces WHERE username = ?',
+            (username,))}
+
+        # workspaces without a timestamp are always indexed
+        changed = [x for x in listed if not x.get('updated') or \
+            x['updated'] != indexed.get(x['workspace_id'])]
+        removed = []
+        if workspaces is None:
+            listed_ids = set(x['workspace_id'] for x in listed)
+            removed = [x for x in indexed if x not in listed_ids]
+
+        def _index(workspace: dict) -> None:
+            with _span('export_download'):
+                export = conv.get_workspace(
+                    workspace_id=workspace['workspace_id'],
+                    export=True)
+            # sqlite connections can only be used by one thread at a time
+            with lock, _span('index'):
+                with connection:
+                    _clear_workspace(connection, workspace['workspace_id'])
+                    _insert_workspace(
+                        connection,
+                        export,
+                        workspace['workspace_id'],
+                        username,
+                        workspace.get('updated'))
+            print("Workspace '{}' indexed".format(workspace['workspace_id']))
+
+        _map_concurrently(_index, changed, max_workers)
+
+        with connection:
+            for workspace_id in removed:
+                _clear_workspace(connection, workspace_id)
+                connection.execute(
+                    'DELETE FROM workspaces WHERE workspace_id = ?',
+                    (workspace_id,))
+    finally:
+        connection.close()
+
+    changed_ids = set(x['workspace_id'] for x in changed)
+    return {
+        'indexed': [x['workspace_id'] for x in changed],
+        'unchanged': [x['workspace_id'] for x in listed \
+            if x['workspace_id'] not in changed_ids],
+        'removed': removed}
+
+def _connect(index_file: str) -> sqlite3.Connection:
+    """ Opens the index, creating or rebuilding its tables if needed
+    """
+    if path.dirname(index_file):
+        makedirs(path.dirname(index_file), exist_ok=True)
+    connection = sqlite3.connect(index_file, check_same_thread=False)
+    if connection.execute('PRAGMA user_version').fetchone()[0] != \
+            _SCHEMA_VERSION:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+        with connection:
+            for table in tables:
+                connection.execute('DROP TABLE {}'.format(table))
+        connection.executescript(_SCHEMA)
+        connection.execute('PRAGMA user_version = {}'.format(_SCHEMA_VERSION))
+    return connection
+
+def _clear_workspace(
+        connection: sqlite3.Connection,
+        workspace_id: str) -> None:
+    for table in _CONTENT_TABLES:
+        connection.execute(
+            'DELETE FROM {} WHERE workspace_id = ?'.format(table),
+            (workspace_id,))
+
+def _insert_workspace(
+        connection: sqlite3.Connection,
+        export: dict,
+        workspace_id: str,
+        username: str,
+        updated: Union[str, None]) -> None:
+    """ Adds the rows of a workspace export to the index
+    """
+    connection.execute(
+        'INSERT OR REPLACE INTO workspaces VALUES (?, ?, ?, ?)',
+        (workspace_id, export.get('name'), username, updated))
+
+    intents = export.get('intents', [])
+    connection.executemany(
+        'INSERT INTO intents VALUES (?, ?, ?)',
+        [(workspace_id, x['intent'], x.get('description')) for x in intents])
+    connection.executemany(
+        'INSERT INTO examples VALUES (?, ?, ?)',
+        [(workspace_id, x['intent'], example['text']) \
+            for x in intents for example in x.get('examples', [])])
+
+    entities = export.get('entities', [])
+    connection.executemany(
+        'INSERT INTO entities VALUES (?, ?, ?)',
+        [(workspace_id, x['entity'], x.get('description')) \
+            for x in entities])
+    connection.executemany(
+        'INSERT INTO entity_values VALUES (?, ?, ?, ?)',
+        [(workspace_id, x['entity'], value['value'],
+          value.get('type', 'synonyms')) \
+            for x in entities for value in x.get('values', [])])
+    connection.executemany(
+        'INSERT INTO synonyms VALUES (?, ?, ?, ?)',
+        [(workspace_id, x['entity'], value['value'], synonym) \
+            for x in entities for value in x.get('values', []) \
+            for synonym in value.get('synonyms', [])])
+
+    dialog_nodes = export.get('dialog_nodes', [])
+    connection.executemany(
+        'INSERT INTO dialog_nodes VALUES (?, ?, ?, ?, ?, ?, ?)',
+        [(workspace_id, x['dialog_node'], x.get('title'), x.get('type'),
+          x.get('parent'), x.get('previous_sibling'), x.get('conditions')) \
+            for x in dialog_nodes])
+    connection.executemany(
+        'INSERT INTO jumps VALUES (?, ?, ?, ?)',
+        [(workspace_id, x['dialog_node'], x['next_step']['dialog_node'],
+          x['next_step'].get('selector')) \
+            for x in dialog_nodes \
+            if (x.get('next_step') or {}).get('behavior') == 'jump_to'])
+    connection.executemany(
+        'INSERT INTO condition_references VALUES (?, ?, ?)',
+        [(workspace_id, x['dialog_node'], reference) \
+            for x in dialog_nodes \
+            for reference in _get_condition_references(x.get('conditions'))])
+
+class WorkspaceIndex:
+    """ Queries across the workspaces of an index built by
+    `index_workspaces`. Every query is answered from indexed tables
+
+    ex:
+
+    with WorkspaceIndex('index/workspaces.sqlite') as index:
+        print(index.find_intent('billing'))
+    """
+
+    def __init__(self, index_file: str = _DEFAULT_INDEX_FILE):
+        if not path.exists(index_file):
+            raise ValueError("No index at '{}'".format(index_file))
+        self._connection = sqlite3.connect(
+            'file:{}?mode=ro'.format(pathname2url(path.abspath(index_file))),
+            uri=True,
+            check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'WorkspaceIndex':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ Close the index
+        """
+        self._connection.close()
+
+    def query(self, sql: str, params: Union[tuple, dict] = ()) -> List[dict]:
+        """ Run a read only SQL query against the index
+
+        parameters:
+        sql: SQL query. tables are workspaces, intents, examples, entities,
+            entity_values, synonyms, dialog_nodes, jumps and
+            condition_references
+        params: query parameters
+
+        returns:
+        rows: list of dicts of column name to value
+        """
+        with self._lock:
+            return [dict(row) for row in \
+                self._connection.execute(sql, params).fetchall()]
+
+    def find_intent(self, intent: str) -> List[dict]:
+        """ Workspaces defining an intent
+
+        parameters:
+        intent: intent name, without '#'
+
+        returns:
+        rows: workspace_id, name and number of examples of each workspace
+        """
+        return self.query(
+            """SELECT i.workspace_id, w.name, COUNT(e.text) AS examples
+            FROM intents i
+            JOIN workspaces w ON w.workspace_id = i.workspace_id
+            LEFT JOIN examples e
+                ON e.workspace_id = i.workspace_id AND e.intent = i.intent
+            WHERE i.intent = ?
+            GROUP BY i.workspace_id, w.name
+            ORDER BY i.workspace_id""",
+            (intent,))
+
+    def find_entity(
+            self,
+            entity: str,
+            value: Union[str, None] = None) -> List[dict]:
+        """ Workspaces defining an entity, or a value of an entity
+
+        parameters:
+        entity: entity name, without '@'
+        value: value of the entity
+
+        returns:
+        rows: workspace_id and name of each workspace
+        """
+        if value is None:
+            return self.query(
+                """SELECT x.workspace_id, w.name FROM entities x
+                JOIN workspaces w ON w.workspace_id = x.workspace_id
+                WHERE x.entity = ? ORDER BY x.workspace_id""",
+                (entity,))
+        return self.query(
+            """SELECT x.workspace_id, w.name FROM entity_values x
+            JOIN workspaces w ON w.workspace_id = x.workspace_id
+            WHERE x.entity = ? AND x.value = ? ORDER BY x.workspace_id""",
+            (entity, value))
+
+    def find_example(self, text: str) -> List[dict]:
+        """ Intents with an example, ignoring case
+
+        parameters:
+        text: example text
+
+        returns:
+        rows: workspace_id, intent and text of each example
+        """
+        return self.query(
+            """SELECT workspace_id, intent, text FROM examples
+            WHERE text = ? COLLATE NOCASE ORDER BY workspace_id, intent""",
+            (text,))
+
+    def find_synonym(self, synonym: str) -> List[dict]:
+        """ Entity values with a synonym, ignoring case
+
+        parameters:
+        synonym: synonym text
+
+        returns:
+        rows: workspace_id, entity, value and synonym of each synonym
+        """
+        return self.query(
+            """SELECT workspace_id, entity, value, synonym FROM synonyms
+            WHERE synonym = ? COLLATE NOCASE
+            ORDER BY workspace_id, entity, value""",
+            (synonym,))
+
+    def find_conditions(self, text: str) -> List[dict]:
+        """ Dialog nodes whose conditions contain some text, ex. '#billing'
+
+        parameters:
+        text: text to look for, ignoring case
+
+        returns:
+        rows: workspace_id, dialog_node, title and conditions of each node
+        """
+        return self.query(
+            """SELECT workspace_id, dialog_node, title, conditions
+            FROM dialog_nodes WHERE instr(lower(conditions), lower(?)) > 0
+            ORDER BY workspace_id, dialog_node""",
+            (text,))
+
+    def find_references(self, reference: str) -> List[dict]:
+        """ Dialog nodes whose conditions use an intent, entity, entity
+        value or context variable
+
+        parameters:
+        reference: reference written as in conditions, ex. '#billing',
+            '@city', '@city:(New York)' or '$reprompt'
+
+        returns:
+        rows: workspace_id, dialog_node and title of each node
+        """
+        tokens = _get_condition_references(reference)
+        if not tokens:
+            raise ValueError("Invalid reference '{}'".format(reference))
+        return self.query(
+            """SELECT r.workspace_id, r.dialog_node, n.title
+            FROM condition_references r
+            JOIN dialog_nodes n ON n.workspace_id = r.workspace_id
+                AND n.dialog_node = r.dialog_node
+            WHERE r.reference = ?
+            ORDER BY r.workspace_id, r.dialog_node""",
+            (tokens[0],))
+
+    def find_jumps(
+            self,
+            dialog_node: str,
+            workspace_id: Union[str, None] = None) -> List[dict]:
+        """ Dialog nodes that jump to a node
+
+        parameters:
+        dialog_node: id of the node jumped to
+        workspace_id: only nodes of this workspace. Default every workspace
+
+        returns:
+        rows: workspace_id, dialog_node, title and selector of each jump
+        """
+        sql = """SELECT j.workspace_id, j.dialog_node, n.title, j.selector
+            FROM jumps j
+            JOIN dialog_nodes n ON n.workspace_id = j.workspace_id
+                AND n.dialog_node = j.dialog_node
+            WHERE j.target = ?"""
+        params = (dialog_node,)
+        if workspace_id is not None:
+            sql += ' AND j.workspace_id = ?'
+            params += (workspace_id,)
+        return self.query(sql + ' ORDER BY j.workspace_id, j.dialog_node',
+                          params)
@@ -0,0 +1,163 @@
+""" Instrument Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+instrument: collect per-phase timings and API call counts for any calls
+    made within a `with` block
+Instrumentation: default observer, records timings and writes a JSON report
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from os import makedirs, path
+from time import perf_counter
+from typing import Iterator, Union
+
+from .._instrumentation import _add_observer, _remove_observer
+
+class Instrumentation:
+    """ Records timed phases and API calls and can write them as a JSON
+    timing report.
+
+    Any object implementing `on_span` and `on_request` can be used as an
+    observer in place of this class. `stop` is called on it if present, and
+    `write_report` is required only with a `report_path`.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.requests = {}
+        self._start = perf_counter()
+        self._elapsed = None
+        self._lock = threading.Lock()
+
+    def on_span(self, phase: str, elapsed: float, depth: int) -> None:
+        """ Called when a timed phase completes
+
+        parameters:
+        phase: name of the phase
+        elapsed: duration of the phase in seconds
+        depth: nesting depth of the phase (0 for outermost)
+        """
+        with self._lock:
+            self.spans.append({
+                'phase': phase,
+                'seconds': elapsed,
+                'depth': depth})
+
+    def on_request(
+            self,
+            method: str,
+            endpoint: str,
+            status: int,
+            bytes_sent: int,
+            bytes_received: int,
+            elapsed: float) -> None:
+        """ Called when an API call completes
+
+        parameters:
+        method: HTTP method
+        endpoint: templated endpoint (ex. workspaces/{}/intents/{})
+        status: HTTP status code
+        bytes_sent: size of the request body
+        bytes_received: size of the response body
+        elapsed: time until the response was received in seconds
+        """
+        key = '{} {}'.format(method, endpoint)
+        with self._lock:
+            if key not in self.requests:
+                self.requests[key] = {
+                    'count': 0,
+                    'errors': 0,
+                    'bytes_sent': 0,
+                    'bytes_received': 0,
+                    'seconds': 0.0}
+            stats = self.requests[key]
+            stats['count'] += 1
+            if status >= 400:
+                stats['errors'] += 1
+            stats['bytes_sent'] += bytes_sent
+            stats['bytes_received'] += bytes_received
+            stats['seconds'] += elapsed
+
+    def stop(self) -> None:
+        """ Stop the overall timer for the report
+        """
+        self._elapsed = perf_counter() - self._start
+
+    def report(self) -> dict:
+        """ Build the timing report
+
+        returns:
+        report: dict with total time, individual phases, totals per phase
+            and API call statistics per endpoint
+        """
+        with self._lock:
+            phase_totals = {}
+            for span in self.spans:
+                phase_totals[span['phase']] = \
+                    phase_totals.get(span['phase'], 0.0) + span['seconds']
+            elapsed = self._elapsed
+            if elapsed is None:
+                elapsed = perf_counter() - self._start
+            return {
+                'total_seconds': elapsed,
+                'phases': list(self.spans),
+                'phase_totals': phase_totals,
+                'requests': {key: dict(value) \
+                    for key, value in self.requests.items()},
+                'request_count': sum(
+                    x['count'] for x in self.requests.values())}
+
+    def write_report(self, report_path: str) -> None:
+        """ Write the timing report as JSON
+
+        parameters:
+        report_path: write the report to this file
+        """
+        if path.dirname(report_path):
+            makedirs(path.dirname(report_path), exist_ok=True)
+        with open(report_path, mode='w', encoding='utf8') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+@contextmanager
+def instrument(
+        report_path: Union[str, None] = None,
+        observer=None) -> Iterator:
+    """ Collect timings for each phase and API call made in the `with` block
+
+    ex:
+
+    with instrument('reports/timing.json') as timings:
+        copy_dialog_branch(...)
+    print(timings.report()['phase_totals'])
+
+    parameters:
+    report_path: write a JSON timing report to this file on exit, with the
+        `write_report` method of the observer
+    observer: object implementing `on_span` and `on_request`, and
+        `write_report` if a report_path is given. Defaults to a new
+        `Instrumentation`
+
+    returns:
+    observer: the registered observer
+    """
+    if observer is None:
+        observer = Instrumentation()
+    # fail before the block runs rather than after
+    if report_path is not None and not hasattr(observer, 'write_report'):
+        raise ValueError('report_path requires an observer with write_report')
+
+    _add_observer(observer)
+    try:
+        yield observer
+    finally:
+        _remove_observer(observer)
+        if hasattr(observer, 'stop'):
+            observer.stop()
+        if report_path is not None:
+            observer.write_report(report_path)
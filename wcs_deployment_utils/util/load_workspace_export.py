@@ -0,0 +1,45 @@
+""" Load Workspace Export Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+load_workspace_export: Loads a workspace export from a local file or dict
+"""
+
+from typing import Union
+import gzip
+import json
+
+from .._instrumentation import _span
+
+def load_workspace_export(export: Union[str, dict] = None) -> dict:
+    """ Loads a workspace export from a local file. Exports that are
+    already loaded as a dict are returned as is. Files ending in `.gz` are
+    read as gzip compressed JSON
+
+    parameters:
+    export: path of a JSON workspace export, or the export as a dict
+
+    returns:
+    export: dict representation of WCS workspace
+    """
+    if isinstance(export, dict):
+        return export
+
+    if not isinstance(export, str):
+        raise ValueError('export must be a file path or a dict')
+
+    with _span('export_load'):
+        if export.endswith('.gz'):
+            export_file = gzip.open(export, 'rt', encoding='utf8')
+        else:
+            export_file = open(export, 'r', encoding='utf8')
+        with export_file:
+            loaded = json.load(export_file)
+
+    if not isinstance(loaded, dict) or 'dialog_nodes' not in loaded:
+        raise ValueError('{} is not a workspace export'.format(export))
+
+    return loaded
@@ -0,0 +1,492 @@
+""" Run Manifest Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+run_manifest: Runs a manifest of deployment steps in a single process,
+    in parallel where they do not conflict
+"""
+
+import json
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from copy import deepcopy
+from importlib import import_module
+from inspect import signature
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple, Union
+
+from .._constants import _DEFAULT_MAX_WORKERS
+from .._instrumentation import _span
+from .get_and_backup_workspace import get_and_backup_workspace
+
+# every public function that can be run as a step.
+# 'exports': maps each export parameter to the (username, password,
+#     workspace) parameters of the workspace it exports
+# 'reads'/'writes': parameters of the workspaces read and updated
+# 'resource': part of those workspaces used, None for all of it
+# 'item': parameter naming the single intent or entity used, if any
+# 'widen': optional parameter that, when set, makes the step use all of
+#     those workspaces instead of just the resource
+_COMMANDS = {
+    'copy_dialog_branch': {
+        'package': 'dialog',
+        'exports': {'source_export': (
+            'source_username', 'source_password', 'source_workspace')},
+        'reads': ['source_workspace'],
+        'writes': 'target_workspace',
+        'resource': 'dialog',
+        'item': None,
+        'widen': 'copy_references'},
+    'delete_branch_from_csv': {
+        'package': 'dialog',
+        'exports': {},
+        'reads': [],
+        'writes': 'workspace',
+        'resource': 'dialog',
+        'item': None},
+    'generate_wcs_diagram': {
+        'package': 'dialog',
+        'exports': {'export': (
+            'conversation_username', 'conversation_password', 'workspace')},
+        'reads': ['workspace'],
+        'writes': None,
+        'resource': 'dialog',
+        'item': None},
+    'get_dialog_metrics': {
+        'package': 'dialog',
+        'exports': {'export': (
+            'conversation_username', 'conversation_password', 'workspace')},
+        'reads': ['workspace'],
+        'writes': None,
+        'resource': 'dialog',
+        'item': None},
+    'find_references': {
+        'package': 'dialog',
+        'exports': {'export': (
+            'conversation_username', 'conversation_password', 'workspace')},
+        'reads': ['workspace'],
+        'writes': None,
+        'resource': 'dialog',
+        'item': None},
+    'plan_dialog_branch': {
+        'package': 'dialog',
+        'exports': {
+            'source_export': (
+                'source_username', 'source_password', 'source_workspace'),
+            'target_export': (
+                'target_username', 'target_password', 'target_workspace')},
+        'reads': ['source_workspace', 'target_workspace'],
+        'writes': None,
+        'resource': 'dialog',
+        'item': None},
+    'copy_intent_data': {
+        'package': 'intents',
+        'exports': {'source_export': (
+            'source_username', 'source_password', 'source_workspace')},
+        'reads': ['source_workspace'],
+        'writes': 'target_workspace',
+        'resource': 'intents',
+        'item': 'intent'},
+    'copy_intents': {
+        'package': 'intents',
+        'exports': {'source_export': (
+            'source_username', 'source_password', 'source_workspace')},
+        'reads': ['source_workspace'],
+        'writes': 'target_workspace',
+        'resource': 'intents',
+        'item': None},
+    'load_csv_as_intent_data': {
+        'package': 'intents',
+        'exports': {},
+        'reads': [],
+        'writes': 'workspace',
+        'resource': 'intents',
+        'item': None},
+    'copy_entity_data': {
+        'package': 'entities',
+        'exports': {'source_export': (
+            'source_username', 'source_password', 'source_workspace')},
+        'reads': ['source_workspace'],
+        'writes': 'target_workspace',
+        'resource': 'entities',
+        'item': 'entity'},
+    'copy_entities': {
+        'package': 'entities',
+        'exports': {'source_export': (
+            'source_username', 'source_password', 'source_workspace')},
+        'reads': ['source_workspace'],
+        'writes': 'target_workspace',
+        'resource': 'entities',
+        'item': None},
+    'load_csv_as_entity_data': {
+        'package': 'entities',
+        'exports': {},
+        'reads': [],
+        'writes': 'workspace',
+        'resource': 'entities',
+        'item': None},
+    'configure_api': {
+        'package': 'util',
+        'exports': {},
+        'reads': [],
+        'writes': None,
+        'resource': None,
+        'item': None},
+    'diff_workspaces': {
+        'package': 'util',
+        'exports': {},
+        'reads': [],
+        'writes': None,
+        'resource': None,
+        'item': None},
+    'get_and_backup_workspace': {
+        'package': 'util',
+        'exports': {},
+        'reads': ['workspace'],
+        'writes': None,
+        'resource': None,
+        'item': None},
+    'index_workspaces': {
+        'package': 'util',
+        'exports': {},
+        'reads': [],
+        'writes': None,
+        'resource': None,
+        'item': None},
+    'load_workspace_export': {
+        'package': 'util',
+        'exports': {},
+        'reads': [],
+        'writes': None,
+        'resource': None,
+        'item': None},
+    'sync_workspace': {
+        'package': 'util',
+        'exports': {},
+        'reads': ['source_workspace'],
+        'writes': 'target_workspace',
+        'resource': None,
+        'item': None}}
+
+# commands that every earlier and later step is ordered against
+_BARRIERS = ['configure_api', 'index_workspaces']
+
+def _get_command(name: str) -> Callable:
+    """ Returns the public function run by command `name`
+    """
+    if name not in _COMMANDS:
+        raise ValueError("Unknown command '{}'".format(name))
+    package = import_module(
+        'wcs_deployment_utils.' + _COMMANDS[name]['package'])
+    return getattr(package, name)
+
+class _Step:
+    """ A step of the manifest, with the workspace resources it reads and
+    writes
+    """
+
+    def __init__(self, index: int, name: str, command: str, args: dict):
+        self.index = index
+        self.name = name
+        self.command = command
+        self.args = args
+        self.depends_on = []
+        self.reads, self.writes = _get_resources(command, args)
+
+    def conflicts(self, other: '_Step') -> bool:
+        """ True if the steps can not run at the same time
+        """
+        if self.command in _BARRIERS or other.command in _BARRIERS:
+            return True
+        return _overlaps(self.writes, other.reads + other.writes) or \
+            _overlaps(other.writes, self.reads)
+
+class _ExportCache:
+    """ Workspace exports shared by the steps of a run, keyed by
+    (username, workspace, version). An export is only kept if no step
+    updated its workspace while it was being downloaded
+    """
+
+    def __init__(self):
+        self._exports = {}
+        self._generations = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, password: str) -> dict:
+        """ Returns the export for `key`, downloading it if needed. Steps
+        needing the same export wait for a single download
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._exports:
+                    return self._exports[key]
+                generation = self._generations.get(key[1], 0)
+            export = get_and_backup_workspace(
+                username=key[0],
+                password=password,
+                workspace=key[1],
+                version=key[2])
+            self.put(key, export, generation)
+            return export
+
+    def put(self, key: tuple, export: dict, generation: int) -> None:
+        """ Stores an export downloaded at `generation` of its workspace
+        """
+        with self._lock:
+            if generation == self._generations.get(key[1], 0):
+                self._exports[key] = export
+
+    def get_generation(self, workspace: str) -> int:
+        """ Returns the number of updates made to a workspace
+        """
+        with self._lock:
+            return self._generations.get(workspace, 0)
+
+    def invalidate(self, workspace: str) -> None:
+        """ Drops every export of a workspace that was updated
+        """
+        with self._lock:
+            self._generations[workspace] = \
+                self._generations.get(workspace, 0) + 1
+            for key in [x for x in self._exports if x[1] == workspace]:
+                del self._exports[key]
+
+def run_manifest(
+        manifest: Union[str, dict] = None,
+        max_workers: int = _DEFAULT_MAX_WORKERS) -> dict:
+    """ Runs a manifest of deployment steps in a single process, so that
+    startup is paid once for the whole deployment. Workspace exports are
+    downloaded once and reused by later steps that read the same
+    workspace, until a step updates that workspace.
+
+    Steps run in parallel unless they conflict. A step waits for every
+    earlier step that updates a resource (the dialog, the intents or one
+    intent, the entities or one entity of a workspace) it reads or updates,
+    or that reads a resource it updates, and for the steps named in its
+    `depends_on`. `configure_api` steps are ordered against every step.
+
+    Every step is checked before the first one runs. After a step fails, no
+    new steps are started and the run fails once running steps finish.
+
+    ex:
+
+    {
+        "defaults": {"version": "2017-05-26", "target_username": "..."},
+        "steps": [
+            {"command": "copy_intent_data", "args": {"intent": "hello"}},
+            {"name": "greeting", "command": "copy_dialog_branch",
+             "args": {"root_node": "greeting"}, "depends_on": ["0"]}
+        ]
+    }
+
+    parameters:
+    manifest: manifest (dict or path of a JSON file) with a list of
+        `steps`, each with a `command` (name of a public function), its
+        `args`, an optional `name` (default its position) and optional
+        `depends_on` names of earlier steps. `defaults` are passed to every
+        step whose command accepts them, unless the step sets them itself
+    max_workers: maximum number of steps running at the same time
+
+    returns:
+    report: dict with the 'steps' in manifest order, each a dict with its
+        'name', 'command', 'depends_on' (names of the steps it waited for),
+        'start' (seconds after the run started), 'seconds' and the 'result'
+        returned by the command. 'critical_path' lists the names of the
+        chain of dependent steps that took longest, 'critical_path_seconds'
+        is its duration and 'seconds' the duration of the run
+    """
+    if isinstance(manifest, str):
+        with open(manifest, 'r', encoding='utf8') as manifest_file:
+            manifest = json.load(manifest_file)
+    if max_workers < 1:
+        raise ValueError("Argument 'max_workers' must be at least 1")
+
+    steps = _get_steps(manifest)
+    exports = _ExportCache()
+    run_start = perf_counter()
+    timings = {}
+
+    def _run(step: _Step):
+        start = perf_counter()
+        try:
+            with _span('step'):
+                return _run_step(step, exports)
+        finally:
+            timings[step.index] = (start - run_start, perf_counter() - start)
+
+    results = {}
+    failed = None
+    pending = list(steps)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if failed is None:
+                ready = [x for x in pending \
+                    if all(y.index in results for y in x.depends_on)]
+                for step in ready:
+                    pending.remove(step)
+                    running[executor.submit(_run, step)] = step
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                try:
+                    results[step.index] = future.result()
+                except Exception as err: # pylint: disable=W0703
+                    if failed is None or step.index < failed[0].index:
+                        failed = (step, err)
+
+    if failed is not None:
+        step, err = failed
+        raise RuntimeError("Step '{}' ({}) failed: {}".format(
+            step.name, step.command, err)) from err
+
+    critical_path = _get_critical_path(steps, timings)
+    return {
+        'steps': [{
+            'name': x.name,
+            'command': x.command,
+            'depends_on': [y.name for y in x.depends_on],
+            'start': timings[x.index][0],
+            'seconds': timings[x.index][1],
+            'result': results[x.index]} for x in steps],
+        'critical_path': [x.name for x in critical_path],
+        'critical_path_seconds': sum(
+            timings[x.index][1] for x in critical_path),
+        'seconds': perf_counter() - run_start}
+
+def _get_steps(manifest: dict) -> List[_Step]:
+    """ Validates the manifest and returns its steps, with the defaults
+    applied and the earlier steps each one depends on
+    """
+    if not isinstance(manifest, dict) or \
+            not isinstance(manifest.get('steps'), list):
+        raise ValueError("Manifest must have a list of 'steps'")
+    defaults = manifest.get('defaults', {})
+
+    steps = []
+    names = {}
+    for index, step in enumerate(manifest['steps']):
+        command = step.get('command')
+        parameters = signature(_get_command(command)).parameters
+        name = str(step.get('name', index))
+        if name in names:
+            raise ValueError("Step name '{}' is used more than once".format(
+                name))
+
+        unknown = set(step.get('args', {})) - set(parameters)
+        if unknown:
+            raise ValueError("Step '{}' has unknown arguments: {}".format(
+                name,
+                ', '.join(sorted(unknown))))
+
+        args = {key: value for key, value in defaults.items() \
+            if key in parameters}
+        args.update(step.get('args', {}))
+        current = _Step(index, name, command, args)
+
+        for dependency in step.get('depends_on', []):
+            if str(dependency) not in names:
+                raise ValueError(
+                    "Step '{}' depends on '{}', which is not an earlier "
+                    "step".format(name, dependency))
+            current.depends_on.append(names[str(dependency)])
+        current.depends_on.extend(
+            x for x in steps \
+                if x not in current.depends_on and current.conflicts(x))
+
+        names[name] = current
+        steps.append(current)
+    return steps
+
+def _get_resources(
+        command: str,
+        args: dict) -> Tuple[List[tuple], List[tuple]]:
+    """ Resources read and written by a step, as paths of workspace,
+    resource and item. A path covers every path it is a prefix of
+    """
+    spec = _COMMANDS[command]
+    path = ()
+    if spec['resource'] is not None and \
+            not args.get(spec.get('widen', '')):
+        path = (spec['resource'],)
+        if spec['item'] is not None and args.get(spec['item']):
+            path += (args[spec['item']],)
+
+    reads = [(args.get(x),) + path for x in spec['reads']]
+    writes = []
+    if spec['writes'] is not None:
+        writes.append((args.get(spec['writes']),) + path)
+    return reads, writes
+
+def _overlaps(paths: List[tuple], others: List[tuple]) -> bool:
+    return any(x[:len(y)] == y or y[:len(x)] == x \
+        for x in paths for y in others)
+
+def _get_critical_path(
+        steps: List[_Step],
+        timings: Dict[int, Tuple[float, float]]) -> List[_Step]:
+    """ The chain of dependent steps with the longest total duration.
+    Steps only depend on earlier steps, so manifest order is topological
+    """
+    if not steps:
+        return []
+
+    finish = {}
+    previous = {}
+    for step in steps:
+        before = max(
+            step.depends_on,
+            key=lambda x: finish[x.index],
+            default=None)
+        finish[step.index] = timings[step.index][1] + \
+            (finish[before.index] if before is not None else 0)
+        previous[step.index] = before
+
+    step = max(steps, key=lambda x: finish[x.index])
+    path = []
+    while step is not None:
+        path.append(step)
+        step = previous[step.index]
+    return path[::-1]
+
+def _run_step(step: _Step, exports: _ExportCache):
+    """ Runs a single step, reading exports from and adding them to the
+    shared `exports`
+    """
+    version = step.args.get('version')
+    spec = _COMMANDS[step.command]
+    args = dict(step.args)
+
+    for export_key, (username_key, password_key, workspace_key) in \
+            spec['exports'].items():
+        if args.get(export_key) is not None or not args.get(workspace_key):
+            continue
+        export = exports.get(
+            (args.get(username_key), args[workspace_key], version),
+            args.get(password_key))
+        # commands can change the export they are given
+        args[export_key] = deepcopy(export)
+
+    generation = exports.get_generation(args.get('workspace'))
+    try:
+        result = _get_command(step.command)(**args)
+    finally:
+        if spec['writes'] is not None:
+            # later steps need to see the updated workspace
+            exports.invalidate(args.get(spec['writes']))
+
+    if step.command == 'get_and_backup_workspace':
+        exports.put(
+            (args.get('username'), args.get('workspace'), version),
+            deepcopy(result),
+            generation)
+
+    return result
@@ -0,0 +1,407 @@
+""" Sync Workspace Module
+
+Part of a set of helper functions to allow Watson Conversation Developers
+perform tasks around managing WCS workspaces.
+
+Included in this module are:
+
+sync_workspace: Applies the changes made to a workspace since the last sync
+    to a replica
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple, Union
+from watson_developer_cloud import ConversationV1, WatsonException
+
+from .._api import (
+    _get_conversation,
+    _list_collection,
+    _map_concurrently,
+    _update_workspace_collection
+    )
+from .._constants import (
+    _AUDIT_KEYS,
+    _DEFAULT_BACKUP_FILE,
+    _DEFAULT_CHUNK_SIZE,
+    _DEFAULT_MAX_WORKERS,
+    _DEFAULT_SYNC_STATE_FILE
+    )
+from .._instrumentation import _span
+from .._state import _read_state, _write_state
+from ..entities._util import _get_entity_size
+from .get_and_backup_workspace import get_and_backup_workspace
+
+# key of each synced collection
+_KEYS = {
+    'intents': 'intent',
+    'entities': 'entity',
+    'dialog_nodes': 'dialog_node'}
+
+# size of each item when a collection is sent in chunks. dialog nodes are
+# always sent in a single update
+_SIZES = {
+    'intents': lambda intent: max(1, len(intent.get('examples', []))),
+    'entities': _get_entity_size}
+
+def sync_workspace(source_username: str = None,
+                   source_password: str = None,
+                   source_workspace: str = None,
+                   target_username: str = None,
+                   target_password: str = None,
+                   target_workspace: str = None,
+                   version: str = None,
+                   state_file: str = _DEFAULT_SYNC_STATE_FILE,
+                   target_backup_file: Union[str, None] = _DEFAULT_BACKUP_FILE,
+                   chunk_size: int = _DEFAULT_CHUNK_SIZE,
+                   max_workers: int = _DEFAULT_MAX_WORKERS) -> \
+                       Dict[str, Dict[str, List[str]]]:
+    """ Keeps a replica of a workspace in sync with its source. The first
+    sync replaces the intents, entities and dialog nodes of the target with
+    those of the source. Later syncs list the source, fetch only the
+    intents and entities updated since the last sync and apply just those,
+    deleting the ones that are no longer in the source. Dialog nodes are
+    sent again only if any of them changed
+
+    The latest `updated` timestamp of the source is recorded in the state
+    file as the watermark of the next sync, once every change is applied.
+    Changes made directly to the target are not reverted, but intents,
+    entities and dialog nodes missing from either workspace are copied or
+    deleted
+
+    parameters:
+    source_username: username for source WCS instance
+    source_password: password for source WCS instance
+    source_workspace: workspace id for source WCS instance
+    target_username: username for target WCS instance
+    target_password: password for target WCS instance
+    target_workspace: workspace id for target WCS instance
+    version: version of WCS instances
+    state_file: JSON file recording the watermark of each source and
+        target. can be shared with the `state_file` of CSV loads
+    target_backup_file: backup existing target workspace to this file. if
+        None, the target is not backed up and its keys are listed instead
+    chunk_size: maximum number of examples, values and synonyms per
+        workspace update when whole collections are sent. dialog nodes are
+        validated and sent in a single update
+    max_workers: number of intents and entities synced at the same time
+
+    returns:
+    changes: dict keyed by 'intents', 'entities' and 'dialog_nodes', each
+        with lists of the 'updated' (or created) and 'deleted' keys
+    """
+    # validate that values are provided
+    args = locals()
+    for key in [
+            'source_username',
+            'source_password',
+            'source_workspace',
+            'target_username',
+            'target_password',
+            'target_workspace',
+            'version',
+            'state_file']:
+        if args[key] is None:
+            raise ValueError("Argument '{}' requires a value".format(key))
+
+    watermark = _read_state(state_file, target_workspace, 'sync').get(
+        source_workspace)
+
+    # build backup file if not specified
+    # otherwise just call it the POSIX timestamp
+    target_export = None
+    if target_backup_file is not None:
+        if target_backup_file == _DEFAULT_BACKUP_FILE:
+            target_backup_file = _DEFAULT_BACKUP_FILE.format(
+                str(datetime.now().timestamp()))
+        target_export = get_and_backup_workspace(
+            username=target_username,
+            password=target_password,
+            workspace=target_workspace,
+            version=version,
+            export_path=target_backup_file)
+
+    source_conv = _get_conversation(
+        source_username,
+        source_password,
+        version)
+    target_conv = _get_conversation(
+        target_username,
+        target_password,
+        version)
+
+    # keys of the target, to find what was deleted from the source
+    target_keys = {}
+    for collection, key in _KEYS.items():
+        if target_export is not None:
+            items = target_export.get(collection, [])
+        else:
+            items = _list_target(target_conv, target_workspace, collection)
+        target_keys[collection] = [x[key] for x in items]
+
+    if watermark is None:
+        changes, latest = _mirror(
+            source_conv,
+            source_workspace,
+            target_conv,
+            target_workspace,
+            target_keys,
+            chunk_size)
+        failed = False
+    else:
+        changes, latest, failed = _sync_changes(
+            source_conv,
+            source_workspace,
+            target_conv,
+            target_workspace,
+            target_keys,
+            watermark,
+            chunk_size,
+            max_workers)
+
+    if failed:
+        print(("Some changes failed, the next sync of workspace '{}' "
+               "applies them again").format(target_workspace))
+    elif latest is not None:
+        _write_state(
+            state_file,
+            target_workspace,
+            'sync',
+            {source_workspace: latest})
+
+    print("sync_workspace for '{}' complete. {} changes applied".format(
+        target_workspace,
+        sum(len(x['updated']) + len(x['deleted']) for x in changes.values())))
+    return changes
+
+def _list_target(
+        conversation: ConversationV1,
+        workspace_id: str,
+        collection: str) -> List[dict]:
+    # intents and entities are listed without their examples and values
+    if collection == 'dialog_nodes':
+        return _list_collection(conversation, workspace_id, collection)
+    return _list_collection(conversation, workspace_id, collection,
+                            export=False)
+
+def _strip_audit(item: Union[dict, list]) -> Union[dict, list]:
+    """ Copy of an item without the audit fields of it and its children
+    """
+    if isinstance(item, list):
+        return [_strip_audit(x) for x in item]
+    if isinstance(item, dict):
+        return {key: _strip_audit(value) for key, value in item.items() \
+            if key not in _AUDIT_KEYS}
+    return item
+
+def _get_latest(items: List[dict], latest: Union[str, None]) -> \
+        Union[str, None]:
+    """ Latest `updated` timestamp of the items and `latest`. Timestamps
+    are ISO 8601 strings in UTC, so they sort as text
+    """
+    timestamps = [x['updated'] for x in items if x.get('updated')]
+    if latest is not None:
+        timestamps.append(latest)
+    return max(timestamps) if timestamps else None
+
+def _mirror(
+        source_conv: ConversationV1,
+        source_workspace: str,
+        target_conv: ConversationV1,
+        target_workspace: str,
+        target_keys: Dict[str, List[str]],
+        chunk_size: int) -> Tuple[dict, Union[str, None]]:
+    """ Replaces every synced collection of the target with the source
+
+    returns:
+    changes: see `sync_workspace`
+    latest: latest `updated` timestamp of the source
+    """
+    with _span('export_download'):
+        source_export = source_conv.get_workspace(
+            workspace_id=source_workspace,
+            export=True,
+            include_audit=True)
+
+    changes = {}
+    latest = None
+    for collection, key in _KEYS.items():
+        items = source_export.get(collection, [])
+        latest = _get_latest(items, latest)
+        _update_workspace_collection(
+            target_conv,
+            target_workspace,
+            collection,
+            _strip_audit(items),
+            chunk_size,
+            _SIZES.get(collection))
+        source_keys = set(x[key] for x in items)
+        changes[collection] = {
+            'updated': [x[key] for x in items],
+            'deleted': [x for x in target_keys[collection] \
+                if x not in source_keys]}
+    return changes, latest
+
+def _sync_changes(
+        source_conv: ConversationV1,
+        source_workspace: str,
+        target_conv: ConversationV1,
+        target_workspace: str,
+        target_keys: Dict[str, List[str]],
+        watermark: str,
+        chunk_size: int,
+        max_workers: int) -> Tuple[dict, Union[str, None], bool]:
+    """ Applies the changes made to the source after the watermark
+
+    returns:
+    changes: see `sync_workspace`
+    latest: latest `updated` timestamp of the source
+    failed: True if any change failed
+    """
+    changes = {}
+    latest = watermark
+    failed = False
+    for collection, key in _KEYS.items():
+        with _span('list'):
+            if collection == 'dialog_nodes':
+                items = _list_collection(
+                    source_conv,
+                    source_workspace,
+                    collection,
+                    include_audit=True)
+            else:
+                items = _list_collection(
+                    source_conv,
+                    source_workspace,
+                    collection,
+                    export=False,
+                    include_audit=True)
+        latest = _get_latest(items, latest)
+
+        # items missing from the target or without timestamps are always
+        # synced
+        existing = set(target_keys[collection])
+        updated = [x[key] for x in items if x[key] not in existing or \
+            not x.get('updated') or x['updated'] > watermark]
+        source_keys = set(x[key] for x in items)
+        deleted = [x for x in target_keys[collection] \
+            if x not in source_keys]
+        changes[collection] = {'updated': updated, 'deleted': deleted}
+        if not updated and not deleted:
+            continue
+
+        # the dialog tree is sent whole in a single update, nodes are
+        # positioned by their siblings and can not be moved one at a time
+        if collection == 'dialog_nodes':
+            _update_workspace_collection(
+                target_conv,
+                target_workspace,
+                collection,
+                _strip_audit(items),
+                chunk_size,
+                None)
+            continue
+
+        results = _map_concurrently(
+            _get_update(source_conv, source_workspace, target_conv,
+                        target_workspace, collection, existing),
+            updated,
+            max_workers)
+        results += _map_concurrently(
+            _get_delete(target_conv, target_workspace, collection),
+            deleted,
+            max_workers)
+        failed = failed or not all(results)
+    return changes, latest, failed
+
+def _get_update(
+        source_conv: ConversationV1,
+        source_workspace: str,
+        target_conv: ConversationV1,
+        target_workspace: str,
+        collection: str,
+        existing: set) -> Callable[[str], bool]:
+    """ Returns a function that copies an intent or entity from the source,
+    returning False if it failed
+    """
+    def _update_intent(name: str) -> None:
+        intent = source_conv.get_intent(
+            workspace_id=source_workspace,
+            intent=name,
+            export=True)
+        examples = [{'text': x['text']} for x in intent.get('examples', [])]
+        if name in existing:
+            target_conv.update_intent(
+                workspace_id=target_workspace,
+                intent=name,
+                new_description=intent.get('description'),
+                new_examples=examples)
+        else:
+            target_conv.create_intent(
+                workspace_id=target_workspace,
+                intent=name,
+                description=intent.get('description'),
+                examples=examples)
+        print("Intent '{}' synced".format(name))
+
+    def _update_entity(name: str) -> None:
+        entity = source_conv.get_entity(
+            workspace_id=source_workspace,
+            entity=name,
+            export=True)
+        values = _strip_audit(entity.get('values', []))
+        if name in existing:
+            target_conv.update_entity(
+                workspace_id=target_workspace,
+                entity=name,
+                new_description=entity.get('description'),
+                new_metadata=entity.get('metadata'),
+                new_fuzzy_match=entity.get('fuzzy_match'),
+                new_values=values)
+        else:
+            target_conv.create_entity(
+                workspace_id=target_workspace,
+                entity=name,
+                description=entity.get('description'),
+                metadata=entity.get('metadata'),
+                values=values,
+                fuzzy_match=entity.get('fuzzy_match'))
+        print("Entity '{}' synced".format(name))
+
+    update = _update_intent if collection == 'intents' else _update_entity
+
+    def _update(name: str) -> bool:
+        try:
+            update(name)
+            return True
+        except WatsonException as err:
+            print(repr(err))
+            print("'{}' failed to sync".format(name))
+            return False
+    return _update
+
+def _get_delete(
+        target_conv: ConversationV1,
+        target_workspace: str,
+        collection: str) -> Callable[[str], bool]:
+    """ Returns a function that deletes an intent or entity from the
+    target, returning False if it failed
+    """
+    def _delete(name: str) -> bool:
+        try:
+            if collection == 'intents':
+                target_conv.delete_intent(
+                    workspace_id=target_workspace,
+                    intent=name)
+            else:
+                target_conv.delete_entity(
+                    workspace_id=target_workspace,
+                    entity=name)
+            print("'{}' removed".format(name))
+        except WatsonException as err:
+            # it was already removed
+            if getattr(err, 'code', None) != 404:
+                print(repr(err))
+                print("'{}' failed to remove".format(name))
+                return False
+        return True
+    return _delete